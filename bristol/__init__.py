@@ -1,5 +1,9 @@
 from bristol import ensembles
 from bristol import stats
 from bristol import spectral
+from bristol import ragged
+from bristol import cache
+from bristol import instrument
+from bristol import eigensolver
 import numpy as np
 from .version import __version__
@@ -0,0 +1,4 @@
+import sys
+from bristol.cli import main
+
+sys.exit(main())
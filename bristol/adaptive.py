@@ -0,0 +1,219 @@
+"""
+
+     Adaptive sampling: draw matrices in batches until TM or D_se
+     converges to a tolerance, or a budget is spent
+
+
+"""
+
+import time
+import multiprocessing as mp
+import numpy as np
+from functools import partial
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity, _row_counts
+
+
+def _binned_indexed(indices, N, root_seed, bin_edges, ensemble='CUE'):
+    """
+
+    Bin counts of eigenphases of matrices `indices`, counter-based
+    streams, see `Circular.matrix_rng`, for worker processes.
+
+    """
+    ce = Circular()
+    e = np.array([ce.eigen_circular_indexed(N, i, root_seed, ensemble=ensemble)
+                  for i in indices])
+    return _row_counts(np.angle(e), bin_edges)
+
+
+def _omega(S1, S2, M, N):
+    rho = S1 / float(M)
+    return (S2 - 2.0 * rho * S1 + M * rho * rho) / M / N
+
+
+def _jackknife(estimates):
+    """
+
+    Delete-one-batch jackknife standard error of `estimates`,
+    an array of leave-one-out estimates along axis 0.
+
+    """
+    B = estimates.shape[0]
+    mean = estimates.mean(axis=0)
+    return np.sqrt((B - 1.0) / B * np.power(estimates - mean, 2).sum(axis=0))
+
+
+class _BatchSums:
+    """
+
+    Per batch sums and sums of squares of bin counts of one matrix size,
+    TM metric of all batches and with each batch left out.
+
+    """
+
+    def __init__(self, N):
+        self.N = N
+        self.S1 = []
+        self.S2 = []
+        self.M = []
+
+    def add(self, counts):
+        counts = counts.astype(float)
+        self.S1.append(counts.sum(axis=0))
+        self.S2.append((counts * counts).sum(axis=0))
+        self.M.append(counts.shape[0])
+
+    def omega(self):
+        return _omega(sum(self.S1), sum(self.S2), sum(self.M), self.N)
+
+    def omega_leave_one_out(self):
+        S1, S2, M = sum(self.S1), sum(self.S2), sum(self.M)
+        return np.array([_omega(S1 - s1, S2 - s2, M - m, self.N)
+                         for s1, s2, m in zip(self.S1, self.S2, self.M)])
+
+
+def _adaptive_run(Ns, statistic, tol, ensemble, batch_size, nchunks,
+                  min_batches, max_matrices, max_seconds, root_seed,
+                  delta_rad, parallel, executor):
+    t0 = time.time()
+    bin_edges = np.arange(-np.pi, np.pi, delta_rad)
+    sums = {N: _BatchSums(N) for N in Ns}
+    history = []
+    pool = None
+    if parallel and executor is None:
+        pool = mp.Pool(processes=nchunks)
+        executor = pool
+    try:
+        M = 0
+        while True:
+            indices = np.arange(M, M + batch_size)
+            chunks = [c for c in np.array_split(indices, nchunks) if len(c) > 0]
+            for N in Ns:
+                wrap_f = partial(_binned_indexed, N=N, root_seed=root_seed,
+                                 bin_edges=bin_edges, ensemble=ensemble)
+                if executor is None:
+                    counts = [wrap_f(c) for c in chunks]
+                else:
+                    counts = list(executor.map(wrap_f, chunks))
+                sums[N].add(np.concatenate(counts))
+            M = M + batch_size
+            value, stderr = statistic(sums)
+            precision = float(np.max(stderr))
+            history.append(precision)
+            converged = len(history) >= min_batches and precision <= tol
+            seconds = time.time() - t0
+            if converged or M + batch_size > max_matrices or \
+               (max_seconds is not None and seconds >= max_seconds):
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return {'value': value, 'stderr': stderr, 'precision': precision,
+            'converged': converged, 'number_of_matrices': M,
+            'batches': len(history), 'history': history, 'seconds': seconds,
+            'omegas': {N: sums[N].omega() for N in Ns}}
+
+
+def _tm_statistic(sums):
+    s = list(sums.values())[0]
+    omega = s.omega()
+    if len(s.M) < 2:
+        return omega, np.full(omega.shape, np.inf)
+    return omega, _jackknife(s.omega_leave_one_out())
+
+
+def _dse_statistic(sums):
+    ergo = Ergodicity()
+    Ns = list(sums.keys())
+    dse = np.array([ergo.kl_distance_symmetric(sums[Ns[i]].omega(),
+                                               sums[Ns[i - 1]].omega())
+                    for i in range(1, len(Ns))])
+    B = len(sums[Ns[0]].M)
+    if B < 2:
+        return dse, np.full(dse.shape, np.inf)
+    loo = {N: sums[N].omega_leave_one_out() for N in Ns}
+    dse_loo = np.array([[ergo.kl_distance_symmetric(loo[Ns[i]][b],
+                                                    loo[Ns[i - 1]][b])
+                         for i in range(1, len(Ns))] for b in range(B)])
+    return dse, _jackknife(dse_loo)
+
+
+def adaptive_thirumalai_mountain(N, tol=1e-3, ensemble='CUE', batch_size=20,
+                                 nchunks=4, min_batches=3, max_matrices=10000,
+                                 max_seconds=None, root_seed=42391,
+                                 delta_rad=0.2, parallel=False, executor=None):
+    """
+
+    TM metric with adaptive ensemble size: matrices are drawn in batches
+    and the run stops once the standard error of omega, largest over
+    bins, is within `tol`, or the matrix or time budget is spent. The
+    standard error is a delete-one-batch jackknife estimate. Matrices
+    come from counter-based streams, see `Circular.matrix_rng`, so that
+    results do not depend on nchunks or workers, and eigenphases are
+    binned in workers.
+
+    params:
+    N             Size of the matrices.
+    tol           Target standard error of omega, defaults to 1e-3.
+    ensemble      One of the circular ensemble 'CUE', 'COE', 'CSE', defaults to 'CUE'.
+    batch_size    Number of matrices per batch, defaults to 20.
+    nchunks       Number of chunks a batch is split into, defaults to 4.
+    min_batches   Minimum number of batches, defaults to 3.
+    max_matrices  Matrix budget, defaults to 10000.
+    max_seconds   Wall time budget, defaults to None, no limit.
+    root_seed     Integer root seed, defaults to 42391.
+    delta_rad     Bin spacing in radians, defaults to 0.2.
+    parallel      Run chunks on a multiprocessing pool, defaults to False.
+    executor      Optional concurrent.futures compatible executor, used
+                  instead of a pool.
+
+    output:
+    Dictionary with keys `omega`, `stderr` per bin, `precision` achieved,
+    largest stderr, `converged`, `number_of_matrices`, `batches`,
+    `history` of precision after each batch and `seconds`.
+
+    Example:
+    from bristol.adaptive import adaptive_thirumalai_mountain
+    res = adaptive_thirumalai_mountain(32, tol=0.05)
+    res['omega'], res['precision'], res['number_of_matrices']
+
+    """
+    res = _adaptive_run([N], _tm_statistic, tol, ensemble, batch_size,
+                        nchunks, min_batches, max_matrices, max_seconds,
+                        root_seed, delta_rad, parallel, executor)
+    res['omega'] = res.pop('value')
+    res.pop('omegas')
+    return res
+
+
+def adaptive_approach_se(Ns, tol=1e-2, ensemble='CUE', batch_size=20,
+                         nchunks=4, min_batches=3, max_matrices=10000,
+                         max_seconds=None, root_seed=42391, delta_rad=0.2,
+                         parallel=False, executor=None):
+    """
+
+    Approach to spectral ergodicity D_se between consecutive Ns, see
+    `Ergodicity.approach_se`, with adaptive ensemble size: all Ns grow
+    by a batch at a time until the standard error of every D_se is
+    within `tol`, or the budget is spent. Parameters as in
+    `adaptive_thirumalai_mountain`.
+
+    output:
+    Dictionary with keys `D_se`, `stderr` per consecutive pair,
+    `precision`, `converged`, `omegas` keyed by N, `number_of_matrices`
+    per N, `batches`, `history` and `seconds`.
+
+    Example:
+    from bristol.adaptive import adaptive_approach_se
+    res = adaptive_approach_se([16, 32, 64], tol=0.1)
+
+    """
+    if len(Ns) < 2:
+        raise Exception("At least two matrix sizes must be given")
+    res = _adaptive_run(list(Ns), _dse_statistic, tol, ensemble, batch_size,
+                        nchunks, min_batches, max_matrices, max_seconds,
+                        root_seed, delta_rad, parallel, executor)
+    res['D_se'] = [float(d) for d in res.pop('value')]
+    return res
@@ -0,0 +1,189 @@
+"""
+
+     Asyncio API for ensemble generation and spectral metrics
+
+
+"""
+
+import asyncio
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from bristol.ensembles import _n_eigen_circular2
+from bristol.spectral import Ergodicity
+
+
+def _thirumalai_mountain(c_eigen_ensemble, ensemble_size, N, delta_rad):
+    return Ergodicity().thirumalai_mountain(c_eigen_ensemble, ensemble_size,
+                                            N, delta_rad)
+
+
+class AsyncBristol:
+    """
+
+    Async counterparts of bristol routines for asyncio services. Work is
+    offloaded to one shared, bounded executor, so that many concurrent
+    requests use a stable number of worker processes, and the event loop
+    is never blocked. At most `max_concurrency` executor calls, chunks
+    or metrics, run at a time, others wait. A slot is held only while
+    its call runs, not while a consumer handles a chunk. Cancelling a
+    request cancels its chunks that have not started.
+
+    params:
+    executor         concurrent.futures executor to share, defaults to a
+                     ProcessPoolExecutor of `max_workers` owned by this object.
+    max_workers      Number of worker processes if executor is not given,
+                     defaults to number of cores.
+    max_concurrency  Number of executor calls running at the same time,
+                     defaults to 4.
+
+    Example:
+    import asyncio
+    from bristol.aio import AsyncBristol
+
+    async def main():
+        async with AsyncBristol(max_workers=4) as ab:
+            res = await ab.eigen_circular_ensemble(64, cSize=10, nchunks=4,
+                                                   seeds=[1, 2, 3, 4])
+            async for chunk in ab.eigen_circular_ensemble_chunks(
+                                   1024, cSize=10, nchunks=4, seeds=[1, 2, 3, 4]):
+                print(chunk['chunk'], chunk['c_eigen'].shape)
+
+    asyncio.run(main())
+
+    """
+
+    def __init__(self, executor=None, max_workers=None, max_concurrency=4):
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    def _limit(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def _run_limited(self, fn, *args):
+        async with self._limit():
+            return await self._run(fn, *args)
+
+    async def eigen_circular_ensemble_chunks(self, N, cSize=100, nchunks=4,
+                                             ensemble='CUE', seeds=list(),
+                                             ordered=False):
+        """
+
+        Async iterator over chunks of eigenvalues of a circular ensemble,
+        see `Circular.eigen_circular_ensemble`, each chunk is delivered as
+        soon as it is ready.
+
+        params:
+        ordered   Deliver chunks in seed order, defaults to False, in order
+                  of completion.
+
+        output:
+        Dictionaries with keys `chunk` index, `local_seed` and `c_eigen`.
+
+        """
+        if len(seeds) != nchunks:
+            raise Exception("Seeds vector must be provided for each chunk")
+        wrap_f = partial(_n_eigen_circular2, N=N, size=cSize,
+                         ensemble=ensemble, adir='lower', set_seed=True)
+        # each chunk holds a slot only while it runs, so that a slow or
+        # abandoned consumer does not hold slots across yields
+        futures = [asyncio.ensure_future(self._run_limited(wrap_f, seed))
+                   for seed in seeds]
+        index = {f: i for i, f in enumerate(futures)}
+        try:
+            if ordered:
+                for i, f in enumerate(futures):
+                    res = await f
+                    yield {'chunk': i, 'local_seed': res['local_seed'],
+                           'c_eigen': np.ravel(res['c_eigen'])}
+            else:
+                pending = set(futures)
+                while pending:
+                    done, pending = await asyncio.wait(
+                               pending, return_when=asyncio.FIRST_COMPLETED)
+                    for f in sorted(done, key=lambda f: index[f]):
+                        res = f.result()
+                        yield {'chunk': index[f],
+                               'local_seed': res['local_seed'],
+                               'c_eigen': np.ravel(res['c_eigen'])}
+        finally:
+            for f in futures:
+                f.cancel()
+
+    async def eigen_circular_ensemble(self, N, cSize=100, nchunks=4,
+                                      ensemble='CUE', seeds=list()):
+        """
+
+        Async `Circular.eigen_circular_ensemble`, same output as a
+        parallel run with the same seeds.
+
+        """
+        local_seeds = [None] * nchunks
+        c_eigen = [None] * nchunks
+        async for chunk in self.eigen_circular_ensemble_chunks(
+                               N, cSize=cSize, nchunks=nchunks,
+                               ensemble=ensemble, seeds=seeds):
+            local_seeds[chunk['chunk']] = chunk['local_seed']
+            c_eigen[chunk['chunk']] = chunk['c_eigen']
+        return {'local_seeds': local_seeds, 'c_eigen': np.concatenate(c_eigen),
+                'matrix_size': N, 'number_of_matrices': nchunks * cSize}
+
+    async def thirumalai_mountain(self, c_eigen_ensemble, ensemble_size, N,
+                                  delta_rad=0.2):
+        """
+
+        Async `Ergodicity.thirumalai_mountain`.
+
+        """
+        return await self._run_limited(_thirumalai_mountain, c_eigen_ensemble,
+                                       ensemble_size, N, delta_rad)
+
+    async def cpse_measure(self, pmodel):
+        """
+
+        Async `cPSE.cpse_measure`, the model is sent to a worker.
+
+        """
+        from bristol import cPSE
+        return await self._run_limited(cPSE.cpse_measure, pmodel)
+
+    async def cpse_measure_vanilla(self, matrices):
+        """
+
+        Async `cPSE.cpse_measure_vanilla`.
+
+        """
+        from bristol import cPSE
+        return await self._run_limited(cPSE.cpse_measure_vanilla, matrices)
+
+    async def cpse_measure_checkpoint(self, path, state_key=None):
+        """
+
+        Async `cPSE.cpse_measure_checkpoint`, only the path is sent to
+        a worker.
+
+        """
+        from bristol import cPSE
+        return await self._run_limited(cPSE.cpse_measure_checkpoint, path,
+                                       state_key)
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+        return False
@@ -0,0 +1,272 @@
+"""
+
+     Benchmarks for ensembles, spectral metrics and cPSE
+
+     python -m bristol.bench --Ns 32 64 128 --save
+     python -m bristol.bench --Ns 32 64 128 --baseline --threshold 1.5
+
+     --save records the results as the baseline, by default in
+     bench_baseline.json of the working directory, and --baseline
+     compares against it. Timings depend on the machine, so a baseline
+     is recorded on the machine that runs the comparisons, i.e., on the
+     main branch before a change, and is not shipped with bristol.
+
+
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+
+ce = Circular()
+ergo = Ergodicity()
+
+_seeds = [997123, 1091645, 1352, 32718]
+
+DEFAULT_BASELINE = 'bench_baseline.json'
+
+
+def _bench_gen_cue(N):
+    return lambda: ce.gen_cue(N, set_seed=True, seed=_seeds[0])
+
+
+def _bench_gen_coe(N):
+    return lambda: ce.gen_coe(N, set_seed=True, seed=_seeds[0])
+
+
+def _bench_gen_cse(N):
+    return lambda: ce.gen_cse(N, set_seed=True, seed=_seeds[0])
+
+
+def _bench_ensemble_serial(N):
+    return lambda: ce.eigen_circular_ensemble(N, cSize=2, nchunks=4,
+                                              seeds=_seeds, parallel=False)
+
+
+def _bench_ensemble_parallel(N):
+    return lambda: ce.eigen_circular_ensemble(N, cSize=2, nchunks=4,
+                                              seeds=_seeds, parallel=True)
+
+
+def _bench_thirumalai_mountain(N):
+    e = ce.eigen_circular_ensemble(N, cSize=2, nchunks=4, seeds=_seeds,
+                                   parallel=False)['c_eigen']
+    return lambda: ergo.thirumalai_mountain(e, 8, N)
+
+
+def _bench_approach_se(N):
+    Ns = [N // 2, N]
+    eigen_data = {'N' + str(n): ce.eigen_circular_ensemble(n, cSize=2,
+                                                           nchunks=4,
+                                                           seeds=_seeds,
+                                                           parallel=False)
+                  for n in Ns}
+    return lambda: ergo.approach_se(Ns, 8, eigen_data)
+
+
+def _bench_cpse_measure_vanilla(N):
+    from bristol import cPSE
+    np.random.seed(42)
+    matrices = [np.random.normal(size=(N, N)) for _ in range(10)]
+    def f():
+        return cPSE.cpse_measure_vanilla(matrices)
+    return f
+
+
+def _bench_eigen_backend(backend, driver=None, structured=False):
+    def make(N):
+        from bristol import eigensolver
+        if backend == 'scipy':
+            import scipy.linalg  # recorded as an error if missing
+        np.random.seed(42)
+        A = np.random.normal(size=(N, N))
+        G = np.matmul(A, A.transpose())
+        def f():
+            with eigensolver.use_backend(backend, driver=driver,
+                                         structured=structured):
+                ce.eigen_circular(N, ensemble='COE', set_seed=True,
+                                  seed=_seeds[0])
+                eigensolver.eigvals(G.copy(), hermitian=True)
+        return f
+    return make
+
+
+BENCHMARKS = {
+              'gen_cue': _bench_gen_cue,
+              'gen_coe': _bench_gen_coe,
+              'gen_cse': _bench_gen_cse,
+              'eigen_circular_ensemble_serial': _bench_ensemble_serial,
+              'eigen_circular_ensemble_parallel': _bench_ensemble_parallel,
+              'thirumalai_mountain': _bench_thirumalai_mountain,
+              'approach_se': _bench_approach_se,
+              'cpse_measure_vanilla': _bench_cpse_measure_vanilla,
+              'eigen_backend_numpy': _bench_eigen_backend('numpy'),
+              'eigen_backend_numpy_structured': _bench_eigen_backend(
+                                                    'numpy', structured=True),
+              'eigen_backend_scipy': _bench_eigen_backend('scipy'),
+              'eigen_backend_scipy_evd': _bench_eigen_backend(
+                                             'scipy', 'evd', structured=True),
+              'eigen_backend_scipy_evr': _bench_eigen_backend(
+                                             'scipy', 'evr', structured=True)
+             }
+
+
+def time_call(f, repeat=3):
+    """
+
+    Best wall time of `repeat` calls of f, and peak memory of a traced call.
+
+    params:
+    f       Callable without arguments.
+    repeat  Number of timed calls, defaults to 3.
+
+    output:
+    Dictionary with keys `seconds` and `peak_bytes`.
+
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        f()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+
+def run_benchmarks(Ns=[32, 64, 128], repeat=3, names=None, verbose=False):
+    """
+
+    Run benchmarks across an N scaling grid.
+
+    params:
+    Ns       Matrix sizes, defaults to [32, 64, 128].
+    repeat   Number of timed calls per case, defaults to 3.
+    names    Benchmark names, see BENCHMARKS, defaults to all.
+    verbose  Print each result as it is measured, defaults to False.
+
+    output:
+    Dictionary with keys `meta` and `results`, results are keyed by
+    benchmark name then by 'N<size>'. A benchmark that can not run, i.e.,
+    cPSE without torch, records an `error`.
+
+    Example:
+    from bristol.bench import run_benchmarks
+    res = run_benchmarks(Ns=[16, 32], names=['gen_cue', 'thirumalai_mountain'])
+
+    """
+    if names is None:
+        names = list(BENCHMARKS.keys())
+    results = {}
+    for name in names:
+        results[name] = {}
+        for N in Ns:
+            try:
+                f = BENCHMARKS[name](N)
+                res = time_call(f, repeat=repeat)
+            except ImportError as e:
+                res = {'error': repr(e)}
+            results[name]['N' + str(N)] = res
+            if verbose:
+                print(name, 'N=' + str(N), res)
+    meta = {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'repeat': repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, threshold=1.5, memory_threshold=None):
+    """
+
+    Compare benchmark results against a baseline.
+
+    params:
+    current           Output of `run_benchmarks`.
+    baseline          Output of `run_benchmarks`, i.e., read from a JSON file.
+    threshold         Allowed ratio of current to baseline time, defaults to 1.5.
+    memory_threshold  Allowed ratio of peak memory, defaults to the time
+                      threshold.
+
+    output:
+    List of regressions, dictionaries with keys `name`, `N`, `metric`,
+    `ratio`, empty if none.
+
+    """
+    if memory_threshold is None:
+        memory_threshold = threshold
+    regressions = []
+    for name, by_N in current['results'].items():
+        for N, res in by_N.items():
+            base = baseline['results'].get(name, {}).get(N)
+            if base is None or 'error' in base or 'error' in res:
+                continue
+            for metric, limit in [('seconds', threshold),
+                                  ('peak_bytes', memory_threshold)]:
+                if base[metric] <= 0:
+                    continue
+                ratio = res[metric] / float(base[metric])
+                if ratio > limit:
+                    regressions.append({'name': name, 'N': N,
+                                        'metric': metric, 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bristol.bench',
+                                     description='bristol benchmarks')
+    parser.add_argument('--Ns', type=int, nargs='+', default=[32, 64, 128],
+                        help='matrix sizes')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed calls per case')
+    parser.add_argument('--only', nargs='+', default=None,
+                        choices=list(BENCHMARKS.keys()),
+                        help='benchmarks to run')
+    parser.add_argument('--output', default=None, help='write JSON results')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE,
+                        default=None,
+                        help='record results as baseline, defaults to ' +
+                        DEFAULT_BASELINE)
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        default=None,
+                        help='JSON results to compare against, defaults to ' +
+                        DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='allowed slowdown ratio against baseline')
+    args = parser.parse_args(argv)
+    current = run_benchmarks(Ns=args.Ns, repeat=args.repeat,
+                             names=args.only, verbose=True)
+    if args.output is not None:
+        with open(args.output, 'w') as fp:
+            json.dump(current, fp, indent=1)
+    elif args.save is None:
+        print(json.dumps(current, indent=1))
+    if args.baseline is not None:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        if baseline['meta'].get('machine') != current['meta']['machine']:
+            print('WARNING baseline recorded on', baseline['meta'].get('machine'))
+        regressions = compare(current, baseline, threshold=args.threshold)
+        for r in regressions:
+            print('REGRESSION', r['name'], r['N'], r['metric'],
+                  'x%.2f' % r['ratio'])
+        if len(regressions) > 0:
+            return 1
+    if args.save is not None:
+        with open(args.save, 'w') as fp:
+            json.dump(current, fp, indent=1)
+        print('baseline saved to', args.save)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,6 +11,8 @@ import numpy as np
 import sys
 import bristol
 from bristol.spectral import Ergodicity
+from bristol.ragged import RaggedEigenvalues
+from bristol import eigensolver
 import json
 from itertools import cycle
 
@@ -63,7 +65,164 @@ def get_layer_matrix_set(pmodel):
     return (A_set, A_set_N, A_set_types)
 
 
-def get_eigenvals_layer_matrix_set(A_set):
+def _open_checkpoint(path, state_key=None):
+    """
+
+    Load a checkpoint lazily, memory-mapped where possible.
+
+    Returns a mapping from parameter names to tensors and a flag telling
+    if it is a safetensors handle, whose tensors are read on access.
+
+    """
+    if str(path).endswith('.safetensors'):
+        try:
+            from safetensors import safe_open
+        except ImportError:
+            raise Exception("safetensors package is needed to read " + str(path))
+        return safe_open(str(path), framework='pt', device='cpu'), True
+    try:
+        state = torch.load(path, map_location='cpu', mmap=True,
+                           weights_only=True)
+    except TypeError:  # torch < 2.1 has no mmap
+        state = torch.load(path, map_location='cpu')
+    if state_key is not None:
+        state = state[state_key]
+    return state, False
+
+
+def iter_checkpoint_weights(path, state_key=None):
+    """
+
+    Iterate over 2D-reducible weight tensors of a checkpoint file,
+    one tensor at a time, without instantiating the model.
+
+    Input
+
+    path      : path to a torch state_dict file or a .safetensors file.
+    state_key : key of the state_dict in the checkpoint dictionary, i.e.,
+                'state_dict' or 'model', defaults to None, the file is the
+                state_dict itself.
+
+    Yields
+
+    (name, weights) : parameter name and tensor, for parameters named
+                      `weight` with at least two dimensions, in the order
+                      stored, which is the module registration order.
+
+    """
+    state, is_safetensors = _open_checkpoint(path, state_key)
+    for name in list(state.keys()):
+        if not name.split('.')[-1] == 'weight':
+            continue
+        if is_safetensors:
+            if len(state.get_slice(name).get_shape()) < 2:
+                continue
+            yield name, state.get_tensor(name)
+        else:
+            if state[name].dim() < 2:
+                continue
+            yield name, state[name]
+
+
+def get_eigenvals_named_weights(named_weights, cache=None,
+                                large_layer_lock=None, large_layer_size=4096):
+    """
+
+    Compute eigenvalues of layer matrices from an iterator of
+    (name, weight tensor) pairs in a streaming way: each weight tensor
+    is reduced to its Gram matrix and diagonalised before the next one
+    is touched, so that peak memory is bounded by the largest single layer.
+
+    Input
+
+    named_weights    : iterable of (name, tensor), i.e., from
+                       `iter_checkpoint_weights` or model.state_dict().items()
+    cache            : Optional bristol.cache.SpectrumCache, keyed on the layer
+                       weights, so unchanged layers skip the Gram and eigen solve.
+    large_layer_lock : Optional semaphore, acquired while a layer with 
+                       N >= large_layer_size is processed, used to bound memory
+                       of concurrent workers, defaults to None.
+    large_layer_size : Number of rows that make a layer large, defaults to 4096.
+
+    Output
+
+    (eigenvals_set, names) : List of eigenvalues of each layer, 
+                             see `get_eigenvals_layer_matrix_set`,
+                             and the parameter names used.
+
+    """
+    eigenvals_set = []
+    names = []
+    for name, layer_weights in named_weights:
+        shape_layer = list(layer_weights.shape)
+        if len(shape_layer) < 2:
+            continue
+        N = shape_layer[0]
+        M = np.prod(shape_layer[1:])
+        if N > 1 and M > 1:
+            is_large = large_layer_lock is not None and N >= large_layer_size
+            if is_large:
+                large_layer_lock.acquire()
+            try:
+                Ap = layer_weights.detach().float().reshape(N, M).numpy()
+                if cache is None:
+                    eigen_values = _layer_eigenvals(Ap)
+                else:
+                    eigen_values = cache.get_or_compute(
+                                          Ap, _layer_eigenvals,
+                                          tag=_gram_tag('cPSE.layer'))
+            finally:
+                if is_large:
+                    large_layer_lock.release()
+            eigenvals_set.append(eigen_values)
+            names.append(name)
+        del layer_weights
+    return eigenvals_set, names
+
+
+def get_eigenvals_checkpoint(path, state_key=None, cache=None):
+    """
+
+    Compute eigenvalues of layer matrices of a checkpoint file in a
+    streaming way, see `get_eigenvals_named_weights`.
+
+    Input
+
+    path      : path to a torch state_dict file or a .safetensors file.
+    state_key : see `iter_checkpoint_weights`.
+    cache     : Optional bristol.cache.SpectrumCache.
+
+    Output
+
+    (eigenvals_set, names) : List of eigenvalues of each layer, 
+                             see `get_eigenvals_layer_matrix_set`,
+                             and the parameter names used.
+
+    """
+    return get_eigenvals_named_weights(iter_checkpoint_weights(path, state_key),
+                                       cache=cache)
+
+
+def _gram_eigenvals(A):
+    return eigensolver.eigvals(np.matmul(A, np.transpose(A)), hermitian=True)
+
+
+def _gram_tag(tag):
+    # structured solvers order eigenvalues differently, cache them apart
+    if eigensolver.get_backend()['structured']:
+        return tag + '.structured'
+    return tag
+
+
+def _layer_eigenvals(Ap):
+    return _gram_eigenvals(np.matmul(Ap, np.transpose(Ap)))
+
+
+def _eigenvals(A):
+    return eigensolver.eigvals(np.array(A))
+
+
+def get_eigenvals_layer_matrix_set(A_set, cache=None, gram=True):
     """
     
     Compute eigenvalues of given set of matrices
@@ -71,6 +230,13 @@ def get_eigenvals_layer_matrix_set(A_set):
     Input: 
     
     A_set : list of 2D ndarrays, square real 
+    cache : Optional bristol.cache.SpectrumCache, eigenvalues of
+            matrices seen before are read from the cache instead of
+            being recomputed, defaults to None.
+    gram  : Eigenvalues of the Gram matrix A A^T, defaults to True. If
+            False, complex eigenvalues of the square matrices themselves,
+            for complex-plane densities, see
+            `Ergodicity.spectral_density_2d`.
     
     Output
     eigenvals_set : List of list of eigenvalues
@@ -79,7 +245,17 @@ def get_eigenvals_layer_matrix_set(A_set):
     """
     eigenvals_set = []
     for A in A_set:
-        eigen_values = np.linalg.eigvals(np.matmul(A, np.transpose(A)))
+        if not gram:
+            if cache is None:
+                eigen_values = _eigenvals(A)
+            else:
+                eigen_values = cache.get_or_compute(A, _eigenvals,
+                                                    tag='cPSE.eigvals')
+        elif cache is None:
+            eigen_values = _gram_eigenvals(A)
+        else:
+            eigen_values = cache.get_or_compute(A, _gram_eigenvals,
+                                                tag=_gram_tag('cPSE.gram'))
         eigenvals_set.append(eigen_values)
     return eigenvals_set
 
@@ -113,10 +289,33 @@ def eigenvals_set_to_periodic(layer_eigens):
     eset_period = [list2plist(e, upper_bound) for e in layer_eigens]
     return eset_period
 
-def d_layers_pse(eset_per):
+def eigenvals_set_to_ragged(layer_eigens):
+    """
+    
+    Layer matrix set eigenvalues to a RaggedEigenvalues container.
+
+    Absolute values are stored as in `eigenvals_set_to_periodic`, but
+    layers keep their own length, periodic extension to the longest 
+    layer is implicit in `d_layers_pse`.
+    
+    """
+    eset = []
+    for e in layer_eigens:
+        e = np.asarray(e)
+        if e.dtype == np.complex64:
+            e = e.real  # catch for numerical small-unstable numbers
+        eset.append(np.abs(e))
+    return RaggedEigenvalues.from_sets(eset)
+
+def d_layers_pse(eset_per, verbose=True, bins=None):
     """
     
-    Progression of D_layers given periodic set
+    Progression of D_layers given periodic set, or a RaggedEigenvalues
+    container that is extended periodically to its longest layer.
+    Number of layers used is printed if verbose, defaults to True.
+    If number of bins is given, all layers are binned on the same edges
+    over the range of all eigenvalues, see `Ergodicity.real_bin_edges`,
+    defaults to None, bins follow the range of each layer and prefix.
 
     Ex:
     from bristol import cPSE
@@ -130,25 +329,31 @@ def d_layers_pse(eset_per):
     
     """
     nlayers = len(eset_per) - 1  # minus 1 for the last layer
-    print(nlayers)
-    N = len(eset_per[0])
+    if verbose:
+        print(nlayers)
+    if isinstance(eset_per, RaggedEigenvalues):
+        N = eset_per.max_size()
+    else:
+        N = len(eset_per[0])
+    bin_edges = None
+    if bins is not None:
+        bin_edges = ergo.real_bin_edges(eset_per[0:nlayers], bins=bins)
+    # TM of all prefixes in one incremental pass, omegas[l-1] is for l layers
+    omegas = ergo.thirumalai_mountain_prefix(eset_per[0:nlayers], N,
+                                             bin_edges=bin_edges)
     D_layer = []
     for l in np.arange(1, nlayers):
-        eigen_l = np.ravel(np.array(eset_per[0:l]))
-        l1 = l + 1
-        eigen_l1 = np.ravel(np.array(eset_per[0:l1]))
-        omega_l = ergo.thirumalai_mountain(eigen_l, l, N)
-        omega_l1 = ergo.thirumalai_mountain(eigen_l1, l1, N)
-        dl = ergo.kl_distance_symmetric(omega_l, omega_l1)
+        dl = ergo.kl_distance_symmetric(omegas[l - 1], omegas[l])
         D_layer.append(dl)
     return D_layer
 
 
-def cpse_measure(pmodel):
+def cpse_measure(pmodel, cache=None):
     """
     Given torch model object pmodel return 
     pse on layers and mean log pse Cascading PSE
     (d_layers, cpse) : d_layers vector and real number cpse
+    Optional cache, a bristol.cache.SpectrumCache, reuses layer spectra.
      
     netname = 'vgg11'
     pmodel = getattr(models, netname)(pretrained=True)
@@ -156,24 +361,41 @@ def cpse_measure(pmodel):
      
     """
     A_t = get_layer_matrix_set(pmodel)
-    eset = get_eigenvals_layer_matrix_set(A_t[0])
-    eset_per = eigenvals_set_to_periodic(eset)
-    d_layers = d_layers_pse(eset_per)
+    eset = get_eigenvals_layer_matrix_set(A_t[0], cache=cache)
+    d_layers = d_layers_pse(eigenvals_set_to_ragged(eset))
+    return d_layers, np.mean(np.log10(d_layers))
+
+def cpse_measure_checkpoint(path, state_key=None, cache=None):
+    """
+    Given a checkpoint file of a torch model return 
+    pse on layers and mean log pse Cascading PSE, without
+    instantiating the model, see `get_eigenvals_checkpoint`.
+    (d_layers, cpse) : d_layers vector and real number cpse
+
+    Only parameters named `weight` are used, so for torchvision models
+    it matches `cpse_measure`. 
+
+    torch.save(pmodel.state_dict(), 'vgg11.pt')
+    (d_layers, cpse) = cPSE.cpse_measure_checkpoint('vgg11.pt')
+
+    """
+    eset, names = get_eigenvals_checkpoint(path, state_key, cache=cache)
+    d_layers = d_layers_pse(eigenvals_set_to_ragged(eset))
     return d_layers, np.mean(np.log10(d_layers))
 
-def cpse_measure_vanilla(matrices):
+def cpse_measure_vanilla(matrices, cache=None):
     """
 
     Given list of weight matrices.
     pse on layers and mean log pse Cascading PSE
     (d_layers, cpse) : d_layers vector and real number cpse
+    Optional cache, a bristol.cache.SpectrumCache, reuses layer spectra.
 
     np.random.seed(42)
     matrices = [np.random.normal(size=(64,64)) for _ in range(10)]
     (d_layers, cpse) = cPSE.cpse_measure_vanilla(matrices)
 
     """
-    eset = get_eigenvals_layer_matrix_set(matrices)
-    eset_per = eigenvals_set_to_periodic(eset)
-    d_layers = d_layers_pse(eset_per)
+    eset = get_eigenvals_layer_matrix_set(matrices, cache=cache)
+    d_layers = d_layers_pse(eigenvals_set_to_ragged(eset))
     return d_layers, np.mean(np.log10(d_layers))
@@ -0,0 +1,147 @@
+"""
+
+     Content-addressed on-disk cache of spectra
+
+
+"""
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+
+
+class SpectrumCache:
+    """
+
+    On-disk cache of eigenvalues keyed by a hash of the matrix bytes,
+    shape and dtype. Entries are .npy files in `cache_dir`, the least
+    recently used ones are evicted when the total size exceeds `max_bytes`.
+    The total size is scanned once and then tracked on writes, so the
+    directory is listed again only when the tracked size is over the
+    limit. Entries written by other processes are counted at that scan.
+
+    params:
+    cache_dir   Directory to keep the entries, created if missing.
+    max_bytes   Upper bound of the cache size in bytes, defaults to 1GB.
+
+    Example:
+    import numpy as np
+    from bristol.cache import SpectrumCache
+    cache = SpectrumCache('/tmp/bristol_cache')
+    A     = np.random.normal(size=(64, 64))
+    e     = cache.get_or_compute(A, np.linalg.eigvals)  # computed
+    e     = cache.get_or_compute(A, np.linalg.eigvals)  # from cache
+    cache.hits, cache.misses
+
+    """
+
+    def __init__(self, cache_dir, max_bytes=2**30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = None  # tracked total size, None until first scanned
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, A, tag=''):
+        """
+
+        Hash of the bytes, shape and dtype of array A, `tag` names the
+        computation so that different spectra of the same matrix do not
+        collide.
+
+        """
+        A = np.ascontiguousarray(A)
+        h = hashlib.blake2b(digest_size=20)
+        h.update((tag + str(A.shape) + A.dtype.str).encode())
+        h.update(A.data)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    def get(self, key):
+        """
+
+        Cached eigenvalues for `key` or None.
+
+        """
+        path = self._path(key)
+        try:
+            e = np.load(path)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass  # evicted by another process since the load
+        return e
+
+    def put(self, key, e):
+        """
+
+        Store eigenvalues `e` under `key`, atomically, and evict
+        least recently used entries if the tracked size exceeds
+        `max_bytes`. Returns the stored eigenvalues.
+
+        """
+        e = np.asarray(e)  # stored as is, so that hits keep the dtype
+        path = self._path(key)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fp:
+            np.save(fp, e)
+            new_size = fp.tell()
+        os.replace(tmp_path, path)
+        if self.size is None:
+            self.evict(keep=key)
+        else:
+            self.size = self.size + new_size - old_size
+            if self.size > self.max_bytes:
+                self.evict(keep=key)
+        return e
+
+    def evict(self, keep=None):
+        """
+
+        Remove least recently used entries until total size is
+        below `max_bytes`, entry `keep` is never removed. Sets the
+        tracked size from the directory.
+
+        """
+        entries = []
+        for f in os.listdir(self.cache_dir):
+            if f.endswith('.npy'):
+                st = os.stat(os.path.join(self.cache_dir, f))
+                entries.append((st.st_mtime, st.st_size, f))
+        total = sum([e[1] for e in entries])
+        for mtime, size, f in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if f == str(keep) + '.npy':
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, f))
+            except OSError:
+                pass
+            total = total - size
+        self.size = total
+
+    def get_or_compute(self, A, f_eigen, tag=''):
+        """
+
+        Eigenvalues f_eigen(A) from the cache, computed and stored
+        on a miss.
+
+        """
+        key = self.key(A, tag)
+        e = self.get(key)
+        if e is not None:
+            self.hits = self.hits + 1
+            return e
+        self.misses = self.misses + 1
+        return self.put(key, f_eigen(A))
@@ -0,0 +1,222 @@
+"""
+
+     bristol command line batch runner
+
+     bristol run job.json [job2.json ...] --out results --workers 4
+     bristol bench --Ns 32 64
+     BRISTOL_AUTHKEY=<secret> bristol worker --host node1 --port 6000
+
+     A job spec is a JSON file:
+
+     {
+      "name": "sweep01",
+      "ensembles": ["CUE", "COE", "CSE"],
+      "Ns": [64, 128, 256],
+      "cSize": 10,
+      "nchunks": 4,
+      "seeds": [997123, 1091645, 1352, 32718],
+      "metrics": ["TM", "D_se"],
+      "cpse": ["vgg11", "checkpoints/epoch10.pt"]
+     }
+
+     All jobs of a run share one warm worker pool. Each job writes to
+     <out>/<name>/: spectra/ (resumable task outputs and manifest),
+     TM_<ensemble>_N<N>.npy, D_se.json, cpse.jsonl and timings.json.
+
+
+"""
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from bristol import instrument
+from bristol.data import Generate, ENSEMBLES
+from bristol.spectral import Ergodicity
+
+_JOB_DEFAULTS = {
+                 'ensembles': ['CUE'],
+                 'Ns': [64],
+                 'cSize': 10,
+                 'nchunks': 4,
+                 'seeds': None,
+                 'metrics': ['TM'],
+                 'cpse': []
+                }
+
+
+def _recorded(fn, *args):
+    """
+
+    Run fn(*args) in a worker with a recorder, so that its spans and
+    counters come back with the result, see `_merged`.
+
+    """
+    with instrument.Recorder() as rec:
+        res = fn(*args)
+    return res, rec.summary()
+
+
+def _merged(future):
+    res, summary = future.result()
+    instrument.merge(summary)
+    return res
+
+
+def _thirumalai_mountain(c_eigen_ensemble, ensemble_size, N):
+    return Ergodicity().thirumalai_mountain(c_eigen_ensemble, ensemble_size, N)
+
+
+def _approach_se(Ns, ensemble_size, eigen_data):
+    return Ergodicity().approach_se(Ns, ensemble_size, eigen_data)
+
+
+def _cpse_spec(spec):
+    from bristol import sweep
+    return sweep._cpse_spec(spec)
+
+
+def load_job(path):
+    """
+
+    Read a job spec JSON file and fill in defaults.
+
+    """
+    with open(path) as fp:
+        job = json.load(fp)
+    for k, v in _JOB_DEFAULTS.items():
+        job.setdefault(k, v)
+    job.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    if job['seeds'] is None:
+        job['seeds'] = list(range(1, job['nchunks'] + 1))
+    if len(job['seeds']) != job['nchunks']:
+        raise Exception("Seeds vector must be provided for each chunk")
+    for k in ['ensembles', 'Ns', 'metrics', 'cpse']:
+        if not isinstance(job[k], list):
+            raise Exception("Job key '" + k + "' must be a list")
+    for e in job['ensembles']:
+        if e not in ENSEMBLES:
+            raise Exception("Circular ensemble of CUE, COE or CSE must " +
+                            "be selected.")
+    for N in job['Ns']:
+        if not isinstance(N, int) or isinstance(N, bool) or N < 1:
+            raise Exception("Matrix sizes 'Ns' must be positive integers")
+    for m in job['metrics']:
+        if m not in ['TM', 'D_se']:
+            raise Exception("Metrics 'TM' or 'D_se' must be selected, " +
+                            "cPSE is given with key 'cpse'.")
+    return job
+
+
+def run_job(job, out_dir, executor):
+    """
+
+    Run a job spec on a shared executor and write its results.
+
+    params:
+    job       Job dictionary, see `load_job`.
+    out_dir   Output directory of the run, job writes to out_dir/name.
+    executor  concurrent.futures executor shared by the jobs.
+
+    output:
+    Recorder of stage timings, with the spans and counters of the
+    workers merged in.
+
+    """
+    job_dir = os.path.join(out_dir, job['name'])
+    os.makedirs(job_dir, exist_ok=True)
+    with open(os.path.join(job_dir, 'job.json'), 'w') as fp:
+        json.dump(job, fp, indent=1)
+    ensemble_size = job['cSize'] * job['nchunks']
+    with instrument.Recorder() as rec:
+        data_ce = {}
+        if len(job['metrics']) > 0:
+            with instrument.span('generate'):
+                data_ce = Generate().spectra_ce(
+                                     range_N=job['Ns'],
+                                     cSize=job['cSize'],
+                                     nchunks=job['nchunks'],
+                                     seeds=job['seeds'],
+                                     ensemble=job['ensembles'],
+                                     parallel=True,
+                                     out_dir=os.path.join(job_dir, 'spectra'),
+                                     executor=executor
+                                    )
+        tm = {}
+        if 'TM' in job['metrics']:
+            with instrument.span('TM'):
+                futures = {}
+                for e in job['ensembles']:
+                    for N in job['Ns']:
+                        c_eigen = data_ce[e]['N' + str(N)]['c_eigen']
+                        futures[(e, N)] = executor.submit(
+                                _recorded, _thirumalai_mountain, c_eigen,
+                                ensemble_size, N)
+                for (e, N), f in futures.items():
+                    tm[(e, N)] = _merged(f)
+                    np.save(os.path.join(job_dir, 'TM_' + e + '_N' + str(N) +
+                                         '.npy'), tm[(e, N)])
+        if 'D_se' in job['metrics']:
+            with instrument.span('D_se'):
+                futures = {}
+                for e in job['ensembles']:
+                    eigen_data = {'N' + str(N): data_ce[e]['N' + str(N)]
+                                  for N in job['Ns']}
+                    futures[e] = executor.submit(_recorded, _approach_se,
+                                                 job['Ns'], ensemble_size,
+                                                 eigen_data)
+                d_se = {e: [float(d) for d in _merged(f)]
+                        for e, f in futures.items()}
+                with open(os.path.join(job_dir, 'D_se.json'), 'w') as fp:
+                    json.dump({'Ns': job['Ns'], 'D_se': d_se}, fp, indent=1)
+        if len(job['cpse']) > 0:
+            with instrument.span('cPSE'):
+                futures = [executor.submit(_recorded, _cpse_spec, spec)
+                           for spec in job['cpse']]
+                with open(os.path.join(job_dir, 'cpse.jsonl'), 'w') as fp:
+                    for f in futures:
+                        fp.write(json.dumps(_merged(f)) + '\n')
+    summary = rec.summary()
+    with open(os.path.join(job_dir, 'timings.json'), 'w') as fp:
+        json.dump(summary, fp, indent=1)
+    return rec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bristol',
+                                     description='bristol batch runner')
+    sub = parser.add_subparsers(dest='command')
+    p_run = sub.add_parser('run', help='run job spec JSON files')
+    p_run.add_argument('jobs', nargs='+', help='job spec JSON files')
+    p_run.add_argument('--out', default='bristol_out',
+                       help='output directory, defaults to bristol_out')
+    p_run.add_argument('--workers', type=int, default=None,
+                       help='worker processes, defaults to number of cores')
+    sub.add_parser('bench', help='run benchmarks, see python -m bristol.bench',
+                   add_help=False)
+    sub.add_parser('worker', help='run a socket worker, ' +
+                   'see python -m bristol.distributed', add_help=False)
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) > 0 and argv[0] == 'bench':
+        from bristol import bench
+        return bench.main(argv[1:])
+    if len(argv) > 0 and argv[0] == 'worker':
+        from bristol import distributed
+        return distributed.main(argv[1:])
+    args = parser.parse_args(argv)
+    if args.command != 'run':
+        parser.print_help()
+        return 2
+    jobs = [load_job(path) for path in args.jobs]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for job in jobs:
+            rec = run_job(job, args.out, executor)
+            print('job', job['name'])
+            print(rec.report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,88 +4,350 @@
      
 
 """
+import os
+import json
+import tempfile
 import numpy as np
-from bristol.ensembles import Circular
+import multiprocessing as mp
+from concurrent.futures import as_completed
+from bristol import instrument
+from bristol.ensembles import Circular, _n_eigen_circular2, \
+                              _n_eigen_circular_all2
+
+ENSEMBLES = ['CUE', 'COE', 'CSE']
+
+
+def _task_cost(task):
+    """
+
+    Estimated cost of a task, O(N^3) per matrix, CSE matrices are 2Nx2N.
+    A shared-draw task of all ensembles costs one CUE matrix less.
+
+    """
+    if task['ensemble'] == 'all':
+        return sum(_task_cost(dict(task, ensemble=e))
+                   for e in ENSEMBLES) - task['cSize'] * float(task['N']) ** 3
+    n = task['N'] * 2 if task['ensemble'] == 'CSE' else task['N']
+    return task['cSize'] * float(n) ** 3
+
+
+def _split_task(task, res=None):
+    """
+
+    Per ensemble tasks of a shared-draw task, and their results.
+
+    """
+    if task['ensemble'] != 'all':
+        return [(task, res)]
+    return [(dict(task, ensemble=e),
+             None if res is None else {'c_eigen':res['c_eigen'][e],
+                                       'local_seed':res['local_seed']})
+            for e in ENSEMBLES]
+
+
+def _run_task(task):
+    if task.get('instrumented'):
+        with instrument.Recorder() as rec:
+            task, res = _run_task(dict(task, instrumented=False))
+        res['instrument'] = rec.summary()
+        return task, res
+    if task['ensemble'] == 'all':
+        res = _n_eigen_circular_all2(task['seed'], N=task['N'],
+                                     size=task['cSize'], adir=task['adir'],
+                                     set_seed=True)
+    else:
+        res = _n_eigen_circular2(task['seed'], N=task['N'], size=task['cSize'],
+                                 ensemble=task['ensemble'], adir=task['adir'],
+                                 set_seed=True)
+    if 'out_dir' in task:
+        for sub_task, sub_res in _split_task(task, res):
+            _atomic_write_npz(os.path.join(task['out_dir'],
+                                           task_file(sub_task)),
+                              c_eigen=sub_res['c_eigen'],
+                              local_seed=sub_res['local_seed'])
+    return task, res
+
+
+def task_file(task):
+    """
+
+    File name of a task output, it encodes everything that determines
+    the generated data.
+
+    """
+    return (task['ensemble'] + '_N' + str(task['N']) + '_chunk' +
+            str(task['chunk']) + '_seed' + str(task['seed']) + '_size' +
+            str(task['cSize']) + '_' + task['adir'] + '.npz')
+
+
+def _atomic_write_npz(path, **arrays):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fp:
+        np.savez(fp, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path, obj):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as fp:
+        json.dump(obj, fp, indent=1)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(out_dir):
+    """
+
+    Manifest of a resumable generation in `out_dir`, a dictionary
+    with key `completed`, task records keyed by their file name.
+
+    """
+    path = os.path.join(out_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'completed':{}}
+    with open(path) as fp:
+        return json.load(fp)
+
 
 class Generate: 
 
-      def __init_(self):
+      def __init__(self):
           pass
 
+      def plan_spectra_ce(
+                          self,
+                          range_N=[64, 128],
+                          cSize=5,
+                          nchunks=2,
+                          seeds=[997123, 1091645],
+                          ensemble='all',
+                          adir='lower',
+                          shared=False
+                         ):
+          """
+
+          Expand a generation spec, ensembles x sizes x chunks, into
+          tasks ordered by estimated cost, largest first.
+
+
+           params:
+           range_N   set of Size of the rectangular matrix, NxN.
+           cSize     Number of random matrices to generate in a chunk.
+           nchunks   number of cSize chunks.
+           seeds     List of integer to use in random seed
+                     in every chunk.
+           ensemble  One of the circular ensemble 'CUE', 'COE', 'CSE',
+                     a list of them, or 'all', defaults to 'all'
+           adir      Direction of Antisymmetry, defaults to 'lower'.
+           shared    When all three ensembles are requested, plan one task
+                     per (N, chunk) generating them from shared draws, see
+                     `Circular.eigen_circular_all`, with ensemble 'all'.
+                     Results are the same, one NxN CUE generation per matrix
+                     and two thirds of the tasks are saved, defaults to False.
+
+          output:
+          List of task dictionaries, with keys `ensemble`, `N`, `chunk`,
+          `seed`, `cSize`, `adir` and `cost`.
+
+          """
+          if len(seeds) != nchunks:
+              raise Exception("Seeds vector must be provided for each chunk")
+          if ensemble == 'all':
+              ensembles = ENSEMBLES
+          elif isinstance(ensemble, str):
+              ensembles = [ensemble]
+          else:
+              ensembles = list(ensemble)
+          for e in ensembles:
+              if e not in ENSEMBLES:
+                  raise Exception("Circular ensemble of \
+                     CUE, COE or CSE must \
+                     be selected.")
+          if shared and sorted(set(ensembles)) == sorted(ENSEMBLES):
+              ensembles = ['all']
+          tasks = []
+          for e in ensembles:
+              for N in range_N:
+                  for i in range(nchunks):
+                      task = {'ensemble':e, 'N':N, 'chunk':i, 'seed':seeds[i],
+                              'cSize':cSize, 'adir':adir}
+                      task['cost'] = _task_cost(task)
+                      tasks.append(task)
+          tasks.sort(key=lambda t: -t['cost'])
+          return tasks
+
+      def run_plan(self, tasks, parallel=True, processes=None, out_dir=None,
+                   executor=None):
+          """
+
+          Run planned tasks on a single pool, largest first. Each worker
+          pulls the next task when it is done, so the small tasks fill
+          the cores at the end of a sweep.
+
+          If `out_dir` is given, generation is resumable: each task output
+          is written atomically to `out_dir` as soon as it finishes and is
+          recorded, with its seed, in `out_dir/manifest.json`. A rerun
+          skips recorded tasks and reads their outputs, producing exactly
+          the same data.
+
+
+           params:
+           tasks      List of tasks from `plan_spectra_ce`.
+           parallel   Run in multicore, defaults to True
+           processes  Number of worker processes, defaults to number of cores.
+           out_dir    Directory for resumable task outputs, defaults to None.
+           executor   Optional concurrent.futures compatible executor tasks
+                      are submitted to when parallel, instead of a new pool,
+                      i.e., bristol.distributed.SocketExecutor, defaults to None.
+                      With out_dir, it must be shared by all workers.
+
+          output:
+          Dictionary of dictionaries, see `spectra_ce`.
+
+          """
+          done = []
+          manifest = None
+          if out_dir is not None:
+              os.makedirs(out_dir, exist_ok=True)
+              manifest = read_manifest(out_dir)
+              todo = []
+              for task in tasks:
+                  sub_tasks = [t for t, r in _split_task(task)]
+                  fnames = [task_file(t) for t in sub_tasks]
+                  if all(fname in manifest['completed'] and
+                         os.path.exists(os.path.join(out_dir, fname))
+                         for fname in fnames):
+                      for sub_task, fname in zip(sub_tasks, fnames):
+                          with np.load(os.path.join(out_dir, fname)) as npz:
+                              res = {'c_eigen':npz['c_eigen'],
+                                     'local_seed':npz['local_seed'].item()}
+                          done.append((sub_task, res))
+                  else:
+                      task = dict(task)
+                      task['out_dir'] = out_dir
+                      todo.append(task)
+          else:
+              todo = tasks
+          if parallel and instrument.enabled():
+              # workers record their own spans, merged in _collect
+              todo = [dict(task, instrumented=True) for task in todo]
+          if parallel and len(todo) > 0 and executor is not None:
+              futures = [executor.submit(_run_task, task) for task in todo]
+              for future in as_completed(futures):
+                  task, res = future.result()
+                  self._collect(done, task, res, manifest, out_dir)
+          elif parallel and len(todo) > 0:
+              pool = mp.Pool(processes=processes)
+              try:
+                  for task, res in pool.imap_unordered(_run_task, todo,
+                                                       chunksize=1):
+                      self._collect(done, task, res, manifest, out_dir)
+              finally:
+                  pool.close()
+                  pool.join()
+          else:
+              for task in todo:
+                  task, res = _run_task(task)
+                  self._collect(done, task, res, manifest, out_dir)
+          chunks = {}
+          for task, res in done:
+              key = (task['ensemble'], task['N'])
+              chunks.setdefault(key, []).append((task, res))
+          data_ce = {
+                     'CUE':{},
+                     'COE':{},
+                     'CSE':{}
+                    }
+          for (e, N), key_chunks in chunks.items():
+              key_chunks.sort(key=lambda tr: tr[0]['chunk'])
+              local_seeds = [res['local_seed'] for task, res in key_chunks]
+              c_eigen = np.concatenate([np.ravel(res['c_eigen'])
+                                        for task, res in key_chunks])
+              cSize = sum([task['cSize'] for task, res in key_chunks])
+              data_ce[e]['N'+str(N)] = {
+                                        'local_seeds':local_seeds,
+                                        'c_eigen':c_eigen,
+                                        'matrix_size':N,
+                                        'number_of_matrices':cSize
+                                       }
+          return data_ce
+
+      def _collect(self, done, task, res, manifest, out_dir):
+          if 'instrument' in res:
+              instrument.merge(res.pop('instrument'))
+          for sub_task, sub_res in _split_task(task, res):
+              done.append((sub_task, sub_res))
+              if out_dir is not None:
+                  self._record_task(manifest, out_dir, sub_task)
+
+      def _record_task(self, manifest, out_dir, task):
+          record = {k:task[k] for k in ['ensemble', 'N', 'chunk', 'seed',
+                                        'cSize', 'adir']}
+          manifest['completed'][task_file(task)] = record
+          _atomic_write_json(os.path.join(out_dir, 'manifest.json'), manifest)
+
       def spectra_ce(
+                     self,
                      range_N=[64, 128],
                      cSize=5,
                      nchunks=2,
                      seeds=[997123, 1091645],
                      ensemble='all',
                      parallel=False,
+                     processes=None,
+                     out_dir=None,
+                     executor=None,
+                     shared=False
                     ):
           """
 
           Generate eigenvalues of matrices of different size
           drawn from a circular ensemble.
 
+          All (ensemble, N, chunk) tasks are scheduled on a single pool
+          by estimated cost, see `plan_spectra_ce` and `run_plan`. Results
+          are identical to `Circular.eigen_circular_ensemble` with the same
+          seeds.
+
 
            params:
            range_N   set of Size of the rectangular matrix, NxN.
            cSize     Number of random matrices to generate in a chunk.
            nchunks   number of cSize chunks.
            ensemble  One of the circular ensemble 
-                     'CUE', 'COE', 'CSE', defaults to 'all'
+                     'CUE', 'COE', 'CSE', a list of them, defaults to 'all'
            seeds     List of integer to use in random seed 
                      in every chunk.
-           parallel  Run in multicore, number of cores as nchunks, 
-                     defaults to False
+           parallel  Run in multicore, defaults to False
+           processes Number of worker processes, defaults to number of cores.
+           out_dir   Directory to write each task output as soon as it
+                     finishes, a rerun resumes from it, see `run_plan`,
+                     defaults to None.
+           executor  Optional concurrent.futures compatible executor,
+                     see `run_plan`, defaults to None.
+           shared    Generate all ensembles from shared draws, see
+                     `plan_spectra_ce`, defaults to False.
 
           output:
-          Dictionary of dictionaries. 
+          Dictionary of dictionaries.
           * Highest level keys for ensemble `CUE`, `COE` or `CSE`.
-          * Then, dictionary with keys describing size, such as 'N16. 
+          * Then, dictionary with keys describing size, such as 'N16.
           * Values will be an another dictionary
-            with keys `local_seed` integers for seeds 
-            used in the chunk, `c_eigen` 
-            numpy array of eigenvalues, `N` matrix size, 
-            `M` number of matrices used to generate `c_eigen`. Note
-            that `c_eigen` will be length NxM.
- 
+            with keys `local_seeds` integers for seeds
+            used in the chunk, `c_eigen`
+            numpy array of eigenvalues, `matrix_size` matrix size,
+            `number_of_matrices` number of matrices used to generate
+            `c_eigen`. Note that `c_eigen` will be length NxM.
+
             Example:
+            from bristol.data import Generate
+            gen     = Generate()
+            data_ce = gen.spectra_ce(range_N=[8, 16], cSize=2, nchunks=2,
+                                     seeds=[997123, 1091645], parallel=True)
+            data_ce['CSE']['N16']['c_eigen'].shape
 
           """
-          ce      = Circular()
-          data_ce = {
-                     'CUE':{},
-                     'COE':{},
-                     'CSE':{}
-                    }
-          for N in range_N: 
-              if(ensemble in ['CUE','all']):
-                e_dict = ce.eigen_circular_ensemble(
-                                                    N=N,
-                                                    cSize=cSize,
-                                                    nchunks=nchunks,
-                                                    ensemble='CUE',
-                                                    seeds=seeds,
-                                                    parallel=parallel
-                                                   )
-                data_ce['CUE']['N'+str(N)] = e_dict
-              if(ensemble in ['COE','all']):
-                e_dict = ce.eigen_circular_ensemble(
-                                                    N=N,
-                                                    cSize=cSize,
-                                                    nchunks=nchunks,
-                                                    ensemble='COE',
-                                                    seeds=seeds,
-                                                    parallel=parallel
-                                                   )
-                data_ce['COE']['N'+str(N)] = e_dict
-              if(ensemble in ['CSE','all']):
-                e_dict = ce.eigen_circular_ensemble(
-                                                    N=N,
-                                                    cSize=cSize,
-                                                    nchunks=nchunks,
-                                                    ensemble='CSE',
-                                                    seeds=seeds,
-                                                    parallel=parallel
-                                                   )
-                data_ce['COE']['N'+str(N)] = e_dict
-          return data_ce
+          tasks = self.plan_spectra_ce(range_N=range_N, cSize=cSize,
+                                       nchunks=nchunks, seeds=seeds,
+                                       ensemble=ensemble, shared=shared)
+          return self.run_plan(tasks, parallel=parallel, processes=processes,
+                               out_dir=out_dir, executor=executor)
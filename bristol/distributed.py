@@ -0,0 +1,284 @@
+"""
+
+     Socket based executor to spread chunk tasks over several hosts
+
+
+     On each worker host, on a trusted network interface:
+       export BRISTOL_AUTHKEY=<long random secret>
+       python -m bristol.distributed --host node1 --port 6000
+
+     On the client:
+       from bristol.distributed import SocketExecutor
+       from bristol.ensembles import Circular
+       ce = Circular()
+       with SocketExecutor([('node1', 6000), ('node2', 6000)],
+                           authkey=os.environb[b'BRISTOL_AUTHKEY']) as ex:
+           res = ce.eigen_circular_ensemble(1024, cSize=10, nchunks=8,
+                                            seeds=list(range(8)), executor=ex)
+
+     Workers unpickle and run any callable an authenticated client sends,
+     so that anyone holding `authkey` can run code on them. There is no
+     default key: use a long random secret, keep it out of shell history
+     and do not bind workers to 0.0.0.0 or other interfaces reachable
+     from untrusted networks.
+
+
+"""
+
+import os
+import sys
+import queue
+import argparse
+import threading
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import Listener, Client
+from concurrent.futures import Executor, Future
+
+_SHUTDOWN = None
+
+
+def serve_worker(authkey, host='localhost', port=6000, ready=None):
+    """
+
+    Run a worker: accept client connections and execute the tasks they
+    send, one at a time, until the process is stopped.
+
+    params:
+    authkey  Shared secret with the clients, bytes, required.
+    host     Interface to listen on, defaults to 'localhost'. Do not use
+             0.0.0.0 on untrusted networks.
+    port     Port to listen on, 0 picks a free port, defaults to 6000.
+    ready    Optional connection to send the bound address to.
+
+    """
+    if not authkey:
+        raise Exception("A non-empty authkey must be given")
+    listener = Listener((host, port), authkey=authkey)
+    if ready is not None:
+        ready.send(listener.address)
+        ready.close()
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, mp.AuthenticationError):
+                continue
+            with conn:
+                _serve_connection(conn)
+    finally:
+        listener.close()
+
+
+def _serve_connection(conn):
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is _SHUTDOWN:
+            return
+        fn, args, kwargs = msg
+        try:
+            reply = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            reply = (False, (e, traceback.format_exc()))
+        try:
+            conn.send(reply)
+        except Exception as e:  # i.e., unpicklable result
+            conn.send((False, (e, traceback.format_exc())))
+
+
+class SocketExecutor(Executor):
+    """
+
+    concurrent.futures compatible executor sending tasks to workers
+    started with `serve_worker`, i.e., on several hosts. Each worker
+    pulls the next task when it is done, so that load is balanced. A task
+    in flight on a worker whose connection is lost is given to another
+    worker, at most `max_retries` times, so that a task crashing every
+    worker it runs on does not take down the cluster: its future then
+    fails with ConnectionError.
+
+    params:
+    addresses    List of (host, port) of workers.
+    authkey      Shared secret with the workers, bytes, required.
+    max_retries  Number of times a task of a lost worker is resubmitted,
+                 defaults to 2.
+
+    """
+
+    def __init__(self, addresses, authkey, max_retries=2):
+        self.max_retries = max_retries
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._threads = []
+        for address in addresses:
+            conn = Client(tuple(address), authkey=authkey)
+            t = threading.Thread(target=self._feed, args=(conn,), daemon=True)
+            self._threads.append(t)
+        self._alive = len(self._threads)
+        for t in self._threads:
+            t.start()
+
+    def _feed(self, conn):
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is _SHUTDOWN:
+                    try:
+                        conn.send(_SHUTDOWN)
+                    except (OSError, EOFError):
+                        pass
+                    return
+                future, fn, args, kwargs, retries = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    conn.send((fn, args, kwargs))
+                    ok, value = conn.recv()
+                except (OSError, EOFError):
+                    if retries < self.max_retries:
+                        self._requeue(future, fn, args, kwargs, retries + 1)
+                    else:
+                        future.set_exception(ConnectionError(
+                            "bristol worker lost while running the task, " +
+                            str(retries + 1) + " times"))
+                    return
+                except Exception as e:  # i.e., unpicklable task
+                    future.set_exception(e)
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value[0])
+        finally:
+            conn.close()
+            with self._lock:
+                self._alive = self._alive - 1
+                alive = self._alive
+            if alive == 0:
+                self._fail_pending()
+
+    def _requeue(self, future, fn, args, kwargs, retries):
+        # back to pending for another worker
+        retry = Future()
+        retry.add_done_callback(lambda f: _copy_future(f, future))
+        self._tasks.put((retry, fn, args, kwargs, retries))
+
+    def _fail_pending(self):
+        while True:
+            try:
+                item = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _SHUTDOWN:
+                if item[0].set_running_or_notify_cancel():
+                    item[0].set_exception(
+                        ConnectionError("No bristol worker left"))
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot submit after shutdown')
+            if self._alive == 0:
+                raise ConnectionError("No bristol worker left")
+            future = Future()
+            self._tasks.put((future, fn, args, kwargs, 0))
+            return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+        if cancel_futures:
+            self._fail_pending()
+        for _ in self._threads:
+            self._tasks.put(_SHUTDOWN)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+
+def _copy_future(src, dst):
+    if src.cancelled():
+        dst.cancel()
+    elif src.exception() is not None:
+        dst.set_exception(src.exception())
+    else:
+        dst.set_result(src.result())
+
+
+class LocalCluster:
+    """
+
+    Stand-in for a cluster: `nworkers` worker processes on localhost,
+    sharing a random authkey.
+
+    Example:
+    from bristol.distributed import LocalCluster
+    with LocalCluster(4) as cluster:
+        with cluster.executor() as ex:
+            list(ex.map(abs, [-1, -2]))
+
+    """
+
+    def __init__(self, nworkers=2):
+        self.authkey = os.urandom(32)
+        self.processes = []
+        self.addresses = []
+        for _ in range(nworkers):
+            recv_end, send_end = mp.Pipe(duplex=False)
+            p = mp.Process(target=serve_worker,
+                           kwargs={'host': 'localhost', 'port': 0,
+                                   'authkey': self.authkey,
+                                   'ready': send_end},
+                           daemon=True)
+            p.start()
+            send_end.close()
+            self.addresses.append(recv_end.recv())
+            recv_end.close()
+            self.processes.append(p)
+
+    def executor(self, max_retries=2):
+        return SocketExecutor(self.addresses, authkey=self.authkey,
+                              max_retries=max_retries)
+
+    def close(self):
+        for p in self.processes:
+            p.terminate()
+            p.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bristol.distributed',
+                                     description='bristol socket worker')
+    parser.add_argument('--host', default='localhost',
+                        help='interface to listen on, do not use 0.0.0.0 ' +
+                        'on untrusted networks')
+    parser.add_argument('--port', type=int, default=6000)
+    parser.add_argument('--authkey', default=None,
+                        help='shared secret, defaults to environment ' +
+                        'variable BRISTOL_AUTHKEY, required')
+    args = parser.parse_args(argv)
+    authkey = args.authkey
+    if authkey is None:
+        authkey = os.environ.get('BRISTOL_AUTHKEY')
+    if not authkey:
+        parser.error('an authkey must be given with --authkey or ' +
+                     'BRISTOL_AUTHKEY')
+    serve_worker(authkey.encode(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+
+     Dense eigensolver backends
+
+     All eigen computations in bristol go through `eig` and `eigvals`,
+     which route to the configured backend:
+
+       'numpy'  np.linalg, default, same results as earlier releases.
+       'scipy'  scipy.linalg, no input copies (overwrite_a), optional
+                finiteness checks and LAPACK driver choice for
+                symmetric/Hermitian problems.
+
+     With structured=True, matrices known to be symmetric or Hermitian,
+     i.e., the Hermitian matrix in `gen_cue` and the Gram matrices in
+     cPSE, are solved with eigh/eigvalsh. Eigenvalues then come in
+     ascending order and eigenvectors may differ in phase, so that
+     seeded matrices and cPSE values differ from the default.
+
+     The backend is set per process, worker processes started by fork
+     inherit it, others read environment variable BRISTOL_EIGEN_BACKEND,
+     checked as in `set_backend` at import. The scipy backend needs the
+     optional scipy dependency, pip install bristol[scipy].
+
+     Example:
+     from bristol import eigensolver
+     from bristol.ensembles import Circular
+     ce = Circular()
+     with eigensolver.use_backend('scipy', driver='evr', structured=True):
+         e = ce.eigen_circular(64, ensemble='COE')
+
+
+"""
+
+import os
+import numpy as np
+
+BACKENDS = ['numpy', 'scipy']
+DRIVERS = [None, 'ev', 'evd', 'evr', 'evx']
+
+_config = {'backend': 'numpy', 'driver': None, 'overwrite_a': True,
+           'check_finite': False, 'structured': False}
+
+
+def set_backend(backend='numpy', driver=None, overwrite_a=True,
+                check_finite=False, structured=False):
+    """
+
+    Set the eigensolver backend of this process.
+
+    params:
+    backend       'numpy' or 'scipy', defaults to 'numpy'.
+    driver        LAPACK driver of scipy.linalg.eigh for symmetric/Hermitian
+                  matrices, 'ev', 'evd', 'evr' or 'evx', defaults to None,
+                  scipy's choice.
+    overwrite_a   scipy may overwrite the input matrix, bristol only passes
+                  temporaries, defaults to True.
+    check_finite  scipy checks the input for inf/nan, defaults to False.
+    structured    Use symmetric/Hermitian solvers where the structure is
+                  known, defaults to False.
+
+    """
+    if backend not in BACKENDS:
+        raise Exception("Eigensolver backend must be one of " +
+                        ", ".join(BACKENDS))
+    if driver not in DRIVERS:
+        raise Exception("Driver must be one of 'ev', 'evd', 'evr', 'evx', " +
+                        "generalized drivers are not used in bristol")
+    if backend == 'scipy':
+        import scipy.linalg  # fail early if scipy is not installed
+    _config.update({'backend': backend, 'driver': driver,
+                    'overwrite_a': overwrite_a, 'check_finite': check_finite,
+                    'structured': structured})
+
+
+def get_backend():
+    """
+
+    Current backend settings as a dictionary, see `set_backend`.
+
+    """
+    return dict(_config)
+
+
+set_backend(os.environ.get('BRISTOL_EIGEN_BACKEND', 'numpy'))
+
+
+class use_backend:
+    """
+
+    Context manager setting the backend temporarily, see `set_backend`.
+
+    """
+
+    def __init__(self, backend='numpy', **options):
+        self.settings = dict(options, backend=backend)
+
+    def __enter__(self):
+        self.saved = get_backend()
+        set_backend(**self.settings)
+        return self
+
+    def __exit__(self, *exc):
+        _config.update(self.saved)
+        return False
+
+
+def eig(a, hermitian=False, compute_vectors=True):
+    """
+
+    Eigenvalues and right eigenvectors of square matrix a, the input
+    may be overwritten.
+
+    params:
+    a                Square ndarray.
+    hermitian        a is known to be symmetric/Hermitian, used if the
+                     backend is structured, defaults to False.
+    compute_vectors  If False, the eigenvector output is None and backends
+                     other than numpy skip computing them. numpy always
+                     uses np.linalg.eig so that eigenvalue order is the same
+                     as in earlier releases, defaults to True.
+
+    output:
+    (w, v) eigenvalues and eigenvectors as columns.
+
+    """
+    structured = hermitian and _config['structured']
+    if _config['backend'] == 'numpy':
+        if structured:
+            if compute_vectors:
+                return np.linalg.eigh(a)
+            return np.linalg.eigvalsh(a), None
+        w, v = np.linalg.eig(a)
+        return w, (v if compute_vectors else None)
+    import scipy.linalg
+    if structured:
+        res = scipy.linalg.eigh(a, eigvals_only=not compute_vectors,
+                                driver=_config['driver'],
+                                overwrite_a=_config['overwrite_a'],
+                                check_finite=_config['check_finite'])
+    else:
+        res = scipy.linalg.eig(a, right=compute_vectors,
+                               overwrite_a=_config['overwrite_a'],
+                               check_finite=_config['check_finite'])
+    if compute_vectors:
+        return res
+    return res, None
+
+
+def eigvals(a, hermitian=False):
+    """
+
+    Eigenvalues of square matrix a, the input may be overwritten.
+
+    params:
+    a          Square ndarray.
+    hermitian  a is known to be symmetric/Hermitian, used if the backend
+               is structured, defaults to False.
+
+    output:
+    Eigenvalues as numpy array.
+
+    """
+    structured = hermitian and _config['structured']
+    if _config['backend'] == 'numpy':
+        if structured:
+            return np.linalg.eigvalsh(a)
+        return np.linalg.eigvals(a)
+    import scipy.linalg
+    if structured:
+        return scipy.linalg.eigh(a, eigvals_only=True,
+                                 driver=_config['driver'],
+                                 overwrite_a=_config['overwrite_a'],
+                                 check_finite=_config['check_finite'])
+    return scipy.linalg.eigvals(a, overwrite_a=_config['overwrite_a'],
+                                check_finite=_config['check_finite'])
+
+
+def eigvalsh_tridiagonal(d, e):
+    """
+
+    Eigenvalues of the symmetric tridiagonal matrix with diagonal d and
+    off-diagonal e, in O(N^2) with scipy.linalg.eigvalsh_tridiagonal,
+    falls back to a dense np.linalg.eigvalsh without scipy.
+
+    output:
+    Eigenvalues in ascending order.
+
+    """
+    try:
+        import scipy.linalg
+    except ImportError:
+        return np.linalg.eigvalsh(np.diag(d) + np.diag(e, 1) + np.diag(e, -1))
+    return scipy.linalg.eigvalsh_tridiagonal(d, e, check_finite=False)
@@ -9,18 +9,110 @@ import numpy as np
 import multiprocessing as mp
 from builtins import map
 from functools import partial
+from bristol import instrument
+from bristol import eigensolver
+from bristol.spectral import _row_counts
+from bristol.ragged import RaggedEigenvalues
 
 def _n_eigen_circular2(seed, N, size, ensemble='CUE',
-                       adir='lower', set_seed=False):
+                       adir='lower', set_seed=False, instrumented=False,
+                       vector_stats=False):
         """
         This is a wrapper for _n_eigen_circular, so `seed` comes
         as first argument.
+
+        If instrumented, spans and counters of the call are recorded
+        in this process and returned in key `instrument`.
         
 
         """
         ce = Circular()
-        return(ce._n_eigen_circular(N, size, ensemble=ensemble,
-                     adir='lower', set_seed=set_seed, seed=seed))
+        if not instrumented:
+            return(ce._n_eigen_circular(N, size, ensemble=ensemble,
+                     adir='lower', set_seed=set_seed, seed=seed,
+                     vector_stats=vector_stats))
+        with instrument.Recorder() as rec:
+            res = ce._n_eigen_circular(N, size, ensemble=ensemble,
+                     adir='lower', set_seed=set_seed, seed=seed,
+                     vector_stats=vector_stats)
+        res['instrument'] = rec.summary()
+        return res
+
+
+def _n_binned_circular2(seed, N, size, bin_edges, ensemble='CUE',
+                        adir='lower', reduce='counts', instrumented=False):
+        """
+        This is a wrapper for _n_binned_circular, so `seed` comes
+        as first argument.
+
+        """
+        ce = Circular()
+        if not instrumented:
+            return(ce._n_binned_circular(N, size, bin_edges, ensemble=ensemble,
+                     adir='lower', seed=seed, reduce=reduce))
+        with instrument.Recorder() as rec:
+            res = ce._n_binned_circular(N, size, bin_edges, ensemble=ensemble,
+                     adir='lower', seed=seed, reduce=reduce)
+        res['instrument'] = rec.summary()
+        return res
+
+
+def _n_eigen_circular_all2(seed, N, size, adir='lower', set_seed=False):
+        """
+        This is a wrapper for _n_eigen_circular_all, so `seed` comes
+        as first argument.
+
+        """
+        ce = Circular()
+        return(ce._n_eigen_circular_all(N, size, adir='lower',
+                                        set_seed=set_seed, seed=seed))
+
+
+def _n_eigen_gaussian2(seed, N, size, beta=1, normalize=False):
+        """
+        This is a wrapper for _n_eigen_gaussian, so `seed` comes
+        as first argument.
+
+        """
+        ge = Gaussian()
+        return(ge._n_eigen_gaussian(N, size, beta=beta, set_seed=True,
+                                    seed=seed, normalize=normalize))
+
+
+def _eigen_gaussian_bucket(bucket, beta=1, seed=42391, scale=1.0):
+        """
+        Eigenvalues of `count` beta-Hermite matrices of one order, drawn
+        in one batch from a stream of (seed, order), for worker processes.
+
+        """
+        order, count = bucket
+        if order == 0:
+            return np.empty((count, 0))
+        ge   = Gaussian()
+        rng  = np.random.default_rng([seed, order])
+        d, e = ge.gen_tridiagonal(order, beta=beta, rng=rng, size=count)
+        return np.array([eigensolver.eigvalsh_tridiagonal(d[i], e[i])
+                         for i in range(count)]) / scale
+
+
+ENSEMBLE_CODES = {'CUE':0, 'COE':1, 'CSE':2}
+
+GAUSSIAN_BETAS = {'GOE':1, 'GUE':2, 'GSE':4}
+
+AMPLITUDE_EDGES = np.linspace(0.0, 20.0, 81)
+
+
+def _eigen_circular_indexed(indices, N, root_seed, ensemble='CUE',
+                            adir='lower'):
+        """
+        This is a wrapper for eigen_circular_indexed over a set of
+        matrix indices, for worker processes.
+
+        """
+        ce = Circular()
+        return np.array([ce.eigen_circular_indexed(N, i, root_seed,
+                                                   ensemble=ensemble, adir=adir)
+                         for i in indices])
 
 
 class Circular:
@@ -83,7 +175,7 @@ class Circular:
         z = self.unit_anti(2, adir=adir)
         return np.kron(np.eye(N), z).astype(int)
 
-    def gen_cue(self, N, set_seed=False, seed=42391):
+    def gen_cue(self, N, set_seed=False, seed=42391, rng=None):
         """
         
         Generate random matrix Circular Unitary Ensemble (CUE)
@@ -94,6 +186,8 @@ class Circular:
         N          Size of rectangular array NxN.
         set_seed  Option to pass seed, defaults to False, no seed set.
         seed      If set_seed is set, seed value will be used, defaults to 42391.
+        rng       Optional numpy Generator to draw from instead of the global
+                  state, see `matrix_rng`, set_seed and seed are then ignored.
 
         output:
         NxN matrix in  Circular Unitary Ensemble (CUE)
@@ -114,18 +208,23 @@ class Circular:
 
                    
         """
-        if set_seed:
-            np.random.seed(seed)
-        f_uni   = lambda n: list(np.random.uniform(0, np.pi *2, n))
-        G       = list(map(lambda theta: np.cos(theta)+np.sin(theta)*1j, f_uni(N)))
-        A       = np.random.random((N, N))
-        B       = np.random.random((N, N))
-        H       = 0.5 * (A+B*1j+np.transpose(A)-np.transpose(B)*1j)
-        E, U    = np.linalg.eig(H)
+        with instrument.span('gen_cue.random'):
+            if rng is None:
+                if set_seed:
+                    np.random.seed(seed)
+                rng = np.random
+            f_uni   = lambda n: list(rng.uniform(0, np.pi *2, n))
+            G       = list(map(lambda theta: np.cos(theta)+np.sin(theta)*1j, f_uni(N)))
+            A       = rng.random((N, N))
+            B       = rng.random((N, N))
+            H       = 0.5 * (A+B*1j+np.transpose(A)-np.transpose(B)*1j)
+        with instrument.span('gen_cue.eig'):
+            E, U    = eigensolver.eig(H, hermitian=True)
         Hcue    = G * U
+        instrument.count('gen_cue.matrices')
         return Hcue
 
-    def gen_coe(self, N, set_seed=False, seed=42391):
+    def gen_coe(self, N, set_seed=False, seed=42391, rng=None):
        """
 
         Generate random matrix Circular Orthogonal Ensemble (COE)
@@ -135,6 +234,7 @@ class Circular:
         N          Size of rectangular array NxN.
         set_seed  Option to pass seed, defaults to False, no seed set.
         seed      If set_seed is set, seed value will be used, defaults to 42391.
+        rng       Optional numpy Generator, see `gen_cue`.
 
         output:
         NxN matrix in  Circular Orthogonal Ensemble (COE)
@@ -155,10 +255,10 @@ class Circular:
         n0, n1
 
        """
-       Hcue = self.gen_cue(N,set_seed,seed)
+       Hcue = self.gen_cue(N,set_seed,seed,rng=rng)
        return Hcue.transpose()*Hcue
 
-    def gen_cse(self, N, set_seed=False, seed=42391, adir='lower'):
+    def gen_cse(self, N, set_seed=False, seed=42391, adir='lower', rng=None):
        """
 
         Generate random matrix Circular Symplectic Ensemble (CSE)
@@ -169,6 +269,7 @@ class Circular:
         set_seed  Option to pass seed, defaults to False, no seed set.
         seed      If set_seed is set, seed value will be used, defaults to 42391.
         adir      Direction of Antisymmetry, 'upper' or 'lower' triangular,  defaults to 'lower'.
+        rng       Optional numpy Generator, see `gen_cue`.
 
         output:
         NxN matrix in  Circular Symlectic Ensemble (CSE)
@@ -195,12 +296,15 @@ class Circular:
         n0, n1
 
        """
-       Z    = self.unit_symplectic(N, adir=adir)
-       Hcue = self.gen_cue(2*N,set_seed,seed)
+       Hcue = self.gen_cue(2*N,set_seed,seed,rng=rng)
+       return self._cse_from_cue(Hcue, adir=adir)
+
+    def _cse_from_cue(self, Hcue, adir='lower'):
+       Z = self.unit_symplectic(Hcue.shape[0] // 2, adir=adir)
        return (Z*Hcue.transpose()*Z)*Hcue
 
     def eigen_circular(self, N, ensemble='CUE', set_seed=False,
-                       seed=42391, adir='lower'):
+                       seed=42391, adir='lower', rng=None):
         """
 
            Generate eigenvalues of a matrix that is a realization from circular 
@@ -213,6 +317,7 @@ class Circular:
            set_seed  Option to pass seed, defaults to False, no seed set.
            seed     If set_seed is set, seed value will be used, defaults to 42391.
            adir     Direction of Antisymmetry, 'upper' or 'lower' triangular,  defaults to 'lower'.
+           rng      Optional numpy Generator, see `gen_cue`.
            
            output:
            e  eigenvalues as numpy array
@@ -230,21 +335,118 @@ class Circular:
            n_cse   = np.imag(e_cse).sum() 
 
         """
+        H = self._gen_circular(N, ensemble, set_seed, seed, adir, rng)
+        with instrument.span('eigen_circular.eig'):
+            e, u = eigensolver.eig(H, compute_vectors=False)
+        instrument.count('eigen_circular.matrices')
+        return(e)
+
+    def eigen_circular_all(self, N, set_seed=False, seed=42391,
+                           adir='lower', rng=None):
+        """
+
+           Eigenvalues of a CUE, a COE and a CSE matrix from shared draws:
+           the COE matrix is derived from the NxN CUE draw, the CSE matrix
+           still needs its own 2Nx2N CUE draw, as in `gen_cse`. With
+           set_seed, results are the same as three `eigen_circular` calls
+           with the same seed, with one NxN CUE generation less. The 2Nx2N
+           draw and eigensolve dominate, so that the saving is small,
+           about 2-7% of the work for N = 32 to 128. A block of the 2Nx2N
+           draw is not Haar distributed and would change CUE/COE results,
+           so it is not used.
+
+           output:
+           Dictionary of eigenvalues keyed by 'CUE', 'COE' and 'CSE'.
+
+           Example:
+           from bristol.ensembles import Circular
+           ce  = Circular()
+           e   = ce.eigen_circular_all(8, set_seed=True, seed=2963416)
+           all(e['COE'] == ce.eigen_circular(8, ensemble='COE', set_seed=True,
+                                             seed=2963416))
+
+        """
+        Hcue  = self.gen_cue(N, seed=seed, set_seed=set_seed, rng=rng)
+        Hcue2 = self.gen_cue(2*N, seed=seed, set_seed=set_seed, rng=rng)
+        H     = {'CUE':Hcue, 'COE':Hcue.transpose()*Hcue,
+                 'CSE':self._cse_from_cue(Hcue2, adir=adir)}
+        e = {}
+        for ensemble in ['CUE', 'COE', 'CSE']:
+            with instrument.span('eigen_circular.eig'):
+                e[ensemble], u = eigensolver.eig(H[ensemble],
+                                                 compute_vectors=False)
+            instrument.count('eigen_circular.matrices')
+        return e
+
+    def _gen_circular(self, N, ensemble, set_seed, seed, adir, rng):
         if(not ensemble in ['CUE', 'COE', 'CSE']):
             raise Exception("Circular ensemble of \
                      CUE, COE or CSE must \
                      be selected.")
         if ensemble == 'CUE':
-            H     = self.gen_cue(N,seed=seed,set_seed=set_seed)
+            H     = self.gen_cue(N,seed=seed,set_seed=set_seed,rng=rng)
         elif ensemble == 'COE':
-            H     = self.gen_coe(N,seed=seed,set_seed=set_seed)
+            H     = self.gen_coe(N,seed=seed,set_seed=set_seed,rng=rng)
         elif ensemble == 'CSE':
-            H     = self.gen_cse(N,seed=seed,set_seed=set_seed,adir=adir)
-        e, u = np.linalg.eig(H)
-        return(e)
+            H     = self.gen_cse(N,seed=seed,set_seed=set_seed,adir=adir,rng=rng)
+        return H
+
+    def eigenvector_statistics(self, u, amplitude_edges=AMPLITUDE_EDGES):
+        """
+
+           Localisation statistics of eigenvectors, columns of u.
+
+
+           params:
+           u                Eigenvectors as columns, n x n ndarray.
+           amplitude_edges  Bin edges of scaled component amplitudes
+                            n|psi_i|^2, defaults to AMPLITUDE_EDGES.
+
+           output:
+           Dictionary with keys `ipr`, inverse participation ratio
+           sum_i |psi_i|^4 of each eigenvector, and `amplitude_counts`,
+           histogram of n|psi_i|^2 over all components of all eigenvectors,
+           to compare against Porter-Thomas, exp(-y) for CUE.
+
+        """
+        a = np.power(np.abs(u), 2)
+        a = a / a.sum(axis=0)
+        ipr = (a * a).sum(axis=0)
+        counts = _row_counts(np.ravel(a) * a.shape[0], amplitude_edges)[0]
+        return {'ipr':ipr, 'amplitude_counts':counts}
+
+    def eigen_circular_statistics(self, N, ensemble='CUE', set_seed=False,
+                                  seed=42391, adir='lower', rng=None,
+                                  amplitude_edges=AMPLITUDE_EDGES):
+        """
+
+           Eigenvalues of a matrix as `eigen_circular`, with eigenvector
+           statistics computed right after diagonalisation, see
+           `eigenvector_statistics`. Eigenvectors are not kept, memory
+           of the output is O(N).
+
+           output:
+           Dictionary with keys `c_eigen`, `ipr` and `amplitude_counts`.
+
+           Example:
+           from bristol.ensembles import Circular
+           ce  = Circular()
+           res = ce.eigen_circular_statistics(64, set_seed=True, seed=2963416)
+           res['ipr'].mean()   # ~ 2/64 for CUE
+
+        """
+        H = self._gen_circular(N, ensemble, set_seed, seed, adir, rng)
+        with instrument.span('eigen_circular.eig'):
+            e, u = eigensolver.eig(H)
+        instrument.count('eigen_circular.matrices')
+        with instrument.span('eigen_circular.vector_statistics'):
+            res = self.eigenvector_statistics(u, amplitude_edges)
+        res['c_eigen'] = e
+        return res
 
     def _n_eigen_circular(self, N, size, ensemble='CUE',
-                          adir='lower', set_seed=False, seed=9876):
+                          adir='lower', set_seed=False, seed=9876,
+                          vector_stats=False):
         """
 
         Compute eigenvalues of a given circular ensemble, 
@@ -259,10 +461,13 @@ class Circular:
         set_seed   Option to pass seed, defaults to False, no seed set.
         seed       If set_seed is set, seed value will be used, defaults to 9876.
         adir       Direction of Antisymmetry, 'upper' or 'lower' triangular,  defaults to 'lower'.
+        vector_stats  Compute eigenvector statistics, see `eigen_circular_statistics`,
+                      defaults to False.
 
         output:
         Dictionary with keys `local_seed` an integer, and numpy array of eigenvalues
-        for each matrix in key `c_eigen`.
+        for each matrix in key `c_eigen`. With vector_stats, `ipr` of each
+        eigenvector per matrix and `amplitude_counts` summed over matrices.
        
         Example:
         res = _n_eigen_circular(10, 10) 
@@ -273,14 +478,92 @@ class Circular:
         if set_seed:
            np.random.seed(seed)
            local_seed = seed
+        if vector_stats:
+           rr = [self.eigen_circular_statistics(N, ensemble=ensemble,
+                      set_seed=set_seed, seed=local_seed, adir=adir)
+                 for i in range(size)]
+           return {'local_seed':local_seed,
+                   'c_eigen':np.array([r['c_eigen'] for r in rr]),
+                   'ipr':np.array([r['ipr'] for r in rr]),
+                   'amplitude_counts':sum(r['amplitude_counts'] for r in rr)}
         c_eigen = np.array([self.eigen_circular(N, ensemble=ensemble, set_seed=set_seed,
                                    seed=local_seed, adir=adir) for i in range(size)])
         return {'local_seed':local_seed, 'c_eigen':c_eigen}
 
 
+    def _n_eigen_circular_all(self, N, size, adir='lower', set_seed=False,
+                              seed=9876):
+        """
+
+        Compute eigenvalues of `size` matrices of each circular ensemble
+        from shared draws, see `eigen_circular_all` and `_n_eigen_circular`.
+
+        output:
+        Dictionary with keys `local_seed` and `c_eigen`, a dictionary of
+        eigenvalues for each matrix keyed by ensemble.
+
+        """
+        local_seed = np.random.choice(1000000, 1)
+        np.random.seed(local_seed[0])
+        if set_seed:
+           np.random.seed(seed)
+           local_seed = seed
+        rr = [self.eigen_circular_all(N, set_seed=set_seed, seed=local_seed,
+                                      adir=adir) for i in range(size)]
+        c_eigen = {e:np.array([r[e] for r in rr]) for e in ['CUE', 'COE', 'CSE']}
+        return {'local_seed':local_seed, 'c_eigen':c_eigen}
+
+    def eigen_circular_ensemble_all(self, N, cSize=100, nchunks=4,
+                                    adir='lower', seeds=list(),
+                                    parallel=True, executor=None):
+        """
+
+        Compute eigenvalues of CUE, COE and CSE in one pass, each chunk
+        derives the three ensembles from shared draws, see
+        `eigen_circular_all`. Results are the same as three
+        `eigen_circular_ensemble` calls with the same seeds. Savings are
+        one NxN CUE generation per matrix and one pool pass instead of
+        three, not a threefold cut, CSE draws dominate.
+
+        params:
+        As `eigen_circular_ensemble`.
+
+        output:
+        Dictionary keyed by 'CUE', 'COE' and 'CSE', with values as the
+        output of `eigen_circular_ensemble`.
+
+        Example:
+        from bristol.ensembles import Circular
+        ce  = Circular()
+        res = ce.eigen_circular_ensemble_all(16, cSize=2, nchunks=2,
+                                             seeds=[123, 125])
+        res['CSE']['c_eigen'].shape
+
+        """
+        if len(seeds) != nchunks:
+          raise Exception("Seeds vector must be provided for each chunk")
+        wrap_f = partial(_n_eigen_circular_all2, N=N, size=cSize,
+                         adir='lower', set_seed=True)
+        if not parallel:
+          rrp = [wrap_f(seed) for seed in seeds]
+        elif executor is not None:
+          rrp = list(executor.map(wrap_f, seeds))
+        else:
+          pool = mp.Pool(processes=nchunks)
+          rrp  = pool.map(wrap_f, seeds)
+          pool.close()
+          pool.join()
+        local_seeds = [r['local_seed'] for r in rrp]
+        return {e:{'local_seeds':local_seeds,
+                   'c_eigen':np.concatenate([np.ravel(r['c_eigen'][e])
+                                             for r in rrp]),
+                   'matrix_size':N, 'number_of_matrices':nchunks*cSize}
+                for e in ['CUE', 'COE', 'CSE']}
+
     def eigen_circular_ensemble(self, N, cSize=100, nchunks=4,
                                 ensemble='CUE', adir='lower',
-                                seeds=list(), parallel=True):
+                                seeds=list(), parallel=True, executor=None,
+                                vector_stats=False):
         """
          
         Compute eigenvalues of given circular ensemble, in parallel or serial.
@@ -294,10 +577,19 @@ class Circular:
         adir       Direction of Antisymmetry, 'upper' or 'lower' triangular,  defaults to 'lower'.
         seeds      List of integer to use in random seed in every chunk.
         parallel   Run in multicore, number of cores as nchunks, defaults to True
+        executor   Optional concurrent.futures compatible executor that the
+                   chunks are submitted to when parallel, instead of a new
+                   multiprocessing pool, i.e., bristol.distributed.SocketExecutor
+                   for several hosts, defaults to None.
+        vector_stats  Compute eigenvector statistics in the workers right after
+                      diagonalisation, eigenvectors are not returned, see
+                      `eigen_circular_statistics`, defaults to False.
 
         output:
         Dictionary with keys `local_seed` an integer, and numpy array of eigenvalues
-        for each matrix in key `c_eigen`.
+        for each matrix in key `c_eigen`. With vector_stats, `ipr` inverse
+        participation ratios, matrix after matrix, and `amplitude_counts`
+        histogram of scaled amplitudes on AMPLITUDE_EDGES over the ensemble.
 
         Example:
 
@@ -330,27 +622,495 @@ class Circular:
         if(not parallel):
          local_seeds = []
          c_eigen     = np.empty(0)
+         rrs         = []
          for i in range(nchunks):
              res = {}
              res = self._n_eigen_circular(N=N, size=cSize, ensemble=ensemble,
                          adir='lower', set_seed=True,
-                         seed=seeds[i])
+                         seed=seeds[i], vector_stats=vector_stats)
              local_seeds.append(res['local_seed'])
              c_eigen = np.append(c_eigen, res['c_eigen'])
-         return({'local_seeds':local_seeds, 'c_eigen':c_eigen})
+             rrs.append(res)
+         out = {'local_seeds':local_seeds, 'c_eigen':c_eigen}
+         if vector_stats:
+             out.update(self._vector_stats_assemble(rrs))
+         return(out)
         if parallel:
+          instrumented = instrument.enabled()
           wrap_f      = partial(_n_eigen_circular2, N=N,
                                 size=cSize, ensemble=ensemble,
-                                adir='lower', set_seed=True)
-          pool        = mp.Pool(processes=nchunks)
-          rrp         = pool.map(wrap_f, seeds)
+                                adir='lower', set_seed=True,
+                                instrumented=instrumented,
+                                vector_stats=vector_stats)
+          with instrument.span('eigen_circular_ensemble.pool'):
+            if executor is not None:
+              rrp       = list(executor.map(wrap_f, seeds))
+            else:
+              pool        = mp.Pool(processes=nchunks)
+              rrp         = pool.map(wrap_f, seeds)
+              pool.close()
+              pool.join()
+          with instrument.span('eigen_circular_ensemble.assemble'):
+            local_seeds = []
+            c_eigen      = np.empty(0)
+            for j in range(nchunks):
+               local_seeds.append(rrp[j]['local_seed'])
+               c_eigen = np.append(c_eigen, rrp[j]['c_eigen'])
+               if instrumented:
+                  instrument.merge(rrp[j]['instrument'])
+                  instrument.count('eigen_circular_ensemble.ipc_bytes',
+                                   rrp[j]['c_eigen'].nbytes)
+          out = {'local_seeds':local_seeds, 'c_eigen':c_eigen,
+                 'matrix_size':N, 'number_of_matrices':nchunks*cSize}
+          if vector_stats:
+            out.update(self._vector_stats_assemble(rrp))
+          return out
+
+    def _vector_stats_assemble(self, rrp):
+        return {'ipr':np.concatenate([np.ravel(r['ipr']) for r in rrp]),
+                'amplitude_counts':sum(r['amplitude_counts'] for r in rrp),
+                'amplitude_edges':AMPLITUDE_EDGES}
+
+
+    def _n_binned_circular(self, N, size, bin_edges, ensemble='CUE',
+                           adir='lower', seed=9876, reduce='counts'):
+        """
+
+        Generate `size` matrices as `_n_eigen_circular` with seed set,
+        diagonalise and bin eigenphases of each matrix on `bin_edges`
+        right away, eigenvalues are not kept.
+
+        params:
+        reduce   'counts' per matrix count vectors, or 'sums' their sum
+                 and sum of squares over the chunk, defaults to 'counts'.
+
+        output:
+        Dictionary with keys `local_seed` and `counts` (size x bins), or
+        `S1`, `S2` (bins) and `number_of_matrices`.
+
+        """
+        res = self._n_eigen_circular(N, size, ensemble=ensemble, adir=adir,
+                                     set_seed=True, seed=seed)
+        with instrument.span('eigen_circular_ensemble_binned.bin'):
+            counts = _row_counts(np.angle(res['c_eigen']), bin_edges)
+        if reduce == 'counts':
+            return {'local_seed':res['local_seed'], 'counts':counts}
+        return {'local_seed':res['local_seed'], 'S1':counts.sum(axis=0),
+                'S2':(counts * counts).sum(axis=0),
+                'number_of_matrices':size}
+
+    def eigen_circular_ensemble_binned(self, N, cSize=100, nchunks=4,
+                                       ensemble='CUE', adir='lower',
+                                       seeds=list(), delta_rad=0.2,
+                                       reduce='counts', parallel=True,
+                                       executor=None):
+        """
+
+        Reduction mode of `eigen_circular_ensemble`: each chunk generates
+        its matrices, diagonalises them and bins eigenphases on shared
+        edges, bins of `Ergodicity.spectral_density`, in the worker. Only
+        integer counts are sent back, O(M x bins) or O(bins) per chunk,
+        instead of O(M x N) complex eigenvalues. Use with
+        `Ergodicity.thirumalai_mountain_binned`.
+
+        params:
+        N          Size of the rectangular matrix, NxN.
+        cSize      Number of random matrices to generate in a chunk.
+        nchunks    number of cSize chunks.
+        ensemble   One of the circular ensemble 'CUE', 'COE', 'CSE', defaults to 'CUE'
+        adir       Direction of Antisymmetry, defaults to 'lower'.
+        seeds      List of integer to use in random seed in every chunk.
+        delta_rad  Bin spacing in radians, defaults to 0.2.
+        reduce     'counts' per matrix count vectors, or 'sums' running sum
+                   and sum of squares of counts per chunk, defaults to 'counts'.
+        parallel   Run in multicore, number of cores as nchunks, defaults to True
+        executor   Optional concurrent.futures compatible executor, see
+                   `eigen_circular_ensemble`.
+
+        output:
+        Dictionary with keys `local_seeds`, `bin_edges`, `matrix_size`,
+        `number_of_matrices` and either `counts` (M x bins) or `S1`, `S2`
+        (bins).
+
+        Example:
+        from bristol.ensembles import Circular
+        from bristol.spectral import Ergodicity
+        ce     = Circular()
+        ergo   = Ergodicity()
+        binned = ce.eigen_circular_ensemble_binned(64, cSize=10, nchunks=4,
+                                                   seeds=[1, 2, 3, 4],
+                                                   reduce='sums')
+        tm     = ergo.thirumalai_mountain_binned(binned)
+
+        """
+        if len(seeds) != nchunks:
+          raise Exception("Seeds vector must be provided for each chunk")
+        if reduce not in ['counts', 'sums']:
+          raise Exception("reduce must be 'counts' or 'sums'")
+        bin_edges    = np.arange(-np.pi, np.pi, delta_rad)
+        instrumented = parallel and instrument.enabled()
+        wrap_f = partial(_n_binned_circular2, N=N, size=cSize,
+                         bin_edges=bin_edges, ensemble=ensemble,
+                         adir='lower', reduce=reduce,
+                         instrumented=instrumented)
+        if not parallel:
+          rrp = [wrap_f(seed) for seed in seeds]
+        elif executor is not None:
+          rrp = list(executor.map(wrap_f, seeds))
+        else:
+          pool = mp.Pool(processes=nchunks)
+          rrp  = pool.map(wrap_f, seeds)
+          pool.close()
+          pool.join()
+        res = {'local_seeds':[r['local_seed'] for r in rrp],
+               'bin_edges':bin_edges, 'matrix_size':N,
+               'number_of_matrices':nchunks*cSize}
+        if reduce == 'counts':
+          res['counts'] = np.concatenate([r['counts'] for r in rrp])
+        else:
+          res['S1'] = sum(r['S1'] for r in rrp)
+          res['S2'] = sum(r['S2'] for r in rrp)
+        if instrumented:
+          for r in rrp:
+            instrument.merge(r['instrument'])
+            instrument.count('eigen_circular_ensemble.ipc_bytes',
+                             sum(r[k].nbytes for k in ['counts', 'S1', 'S2']
+                                 if k in r))
+        return res
+
+    def matrix_rng(self, root_seed, ensemble, N, index):
+        """
+
+        Counter-based random generator of a single matrix, addressed by
+        (root_seed, ensemble, N, index). Philox is keyed by root_seed and
+        the stream of matrix `index` starts at counter [0, 0, index, code],
+        code encoding N and the ensemble. Streams of different matrices
+        never overlap, so that any matrix can be drawn on its own.
+
+        params:
+        root_seed  Integer root seed of a run, 0 <= root_seed < 2^128.
+        ensemble   One of the circular ensemble 'CUE', 'COE', 'CSE'
+        N          Size of the matrix.
+        index      Index of the matrix in the run.
+
+        output:
+        numpy Generator
+
+        """
+        code = int(N) * len(ENSEMBLE_CODES) + ENSEMBLE_CODES[ensemble]
+        counter = np.array([0, 0, index, code], dtype=np.uint64)
+        return np.random.Generator(np.random.Philox(key=root_seed,
+                                                    counter=counter))
+
+    def eigen_circular_indexed(self, N, index, root_seed, ensemble='CUE',
+                               adir='lower'):
+        """
+
+        Eigenvalues of matrix number `index` of a circular ensemble run
+        with `root_seed`, see `matrix_rng`.
+
+        Example:
+        from bristol.ensembles import Circular
+        ce = Circular()
+        e7 = ce.eigen_circular_indexed(16, 7, root_seed=2963416, ensemble='COE')
+
+        """
+        rng = self.matrix_rng(root_seed, ensemble, N, index)
+        return self.eigen_circular(N, ensemble=ensemble, adir=adir, rng=rng)
+
+    def eigen_circular_ensemble_indexed(self, N, M=100, root_seed=42391,
+                                        ensemble='CUE', adir='lower',
+                                        nchunks=4, parallel=True,
+                                        executor=None):
+        """
+
+        Compute eigenvalues of M matrices of given circular ensemble, each
+        matrix drawn from its own counter-based stream, see `matrix_rng`.
+        Results do not depend on nchunks, parallel or executor: work can be
+        split over any number of workers and single matrices can be
+        regenerated with `eigen_circular_indexed`.
+
+        params:
+        N          Size of the rectangular matrix, NxN.
+        M          Number of matrices, defaults to 100.
+        root_seed  Integer root seed, defaults to 42391.
+        ensemble   One of the circular ensemble 'CUE', 'COE', 'CSE', defaults to 'CUE'
+        adir       Direction of Antisymmetry, defaults to 'lower'.
+        nchunks    Number of chunks the M matrices are split into.
+        parallel   Run in multicore, number of cores as nchunks, defaults to True
+        executor   Optional concurrent.futures compatible executor, see
+                   `eigen_circular_ensemble`.
+
+        output:
+        Dictionary with keys `root_seed`, `c_eigen` eigenvalues of the
+        matrices one after another, `matrix_size` and `number_of_matrices`.
+
+        Example:
+        from bristol.ensembles import Circular
+        ce = Circular()
+        r2 = ce.eigen_circular_ensemble_indexed(16, M=12, nchunks=2)
+        r3 = ce.eigen_circular_ensemble_indexed(16, M=12, nchunks=3)
+        all(r2['c_eigen'] == r3['c_eigen'])
+
+        """
+        chunks = [c for c in np.array_split(np.arange(M), nchunks) if len(c) > 0]
+        wrap_f = partial(_eigen_circular_indexed, N=N, root_seed=root_seed,
+                         ensemble=ensemble, adir=adir)
+        if not parallel:
+            rrp = [wrap_f(c) for c in chunks]
+        elif executor is not None:
+            rrp = list(executor.map(wrap_f, chunks))
+        else:
+            pool = mp.Pool(processes=len(chunks))
+            rrp  = pool.map(wrap_f, chunks)
+            pool.close()
+            pool.join()
+        c_eigen = np.concatenate([np.ravel(r) for r in rrp])
+        return {'root_seed':root_seed, 'c_eigen':c_eigen,
+                'matrix_size':N, 'number_of_matrices':M}
+
+
+class Gaussian:
+    """
+
+    Gaussian beta-Hermite ensembles, GOE (beta=1), GUE (beta=2), GSE
+    (beta=4) or any beta > 0, from the Dumitriu-Edelman tridiagonal
+    model: sampling is O(N) and eigenvalues are O(N^2), instead of
+    building and diagonalising dense N x N matrices.
+
+    References:
+    * I. Dumitriu and A. Edelman, J. Math. Phys. 43, 5830 (2002)
+
+    """
+
+    def __init__(self):
+       pass
+
+    def _beta(self, beta):
+        if isinstance(beta, str):
+            if beta not in GAUSSIAN_BETAS:
+                raise Exception("beta must be positive or one of GOE, GUE, GSE")
+            return GAUSSIAN_BETAS[beta]
+        if not beta > 0:
+            raise Exception("beta must be positive or one of GOE, GUE, GSE")
+        return beta
+
+    def gen_tridiagonal(self, N, beta=1, set_seed=False, seed=42391,
+                        rng=None, size=None):
+        """
+
+        Generate tridiagonal beta-Hermite matrices
+
+          H = 1/sqrt(2) tridiag(chi_{beta(N-1)}, ..., chi_beta;
+                                N(0, 2) x N;
+                                chi_{beta(N-1)}, ..., chi_beta)
+
+        whose eigenvalues have joint density of the beta-Hermite ensemble,
+        prop. to |Delta(l)|^beta exp(-sum l^2 / 2).
+
+
+        params:
+        N         Size of the matrix.
+        beta      Dyson index or 'GOE', 'GUE', 'GSE', defaults to 1.
+        set_seed  Option to pass seed, defaults to False, no seed set.
+        seed      If set_seed is set, seed value will be used, defaults to 42391.
+        rng       Optional numpy Generator to draw from instead of the global
+                  state, set_seed and seed are then ignored.
+        size      Number of matrices drawn in one batch, defaults to None,
+                  a single matrix.
+
+        output:
+        (d, e) diagonal and off-diagonal, arrays of shape (N,) and (N-1,),
+        or (size, N) and (size, N-1).
+
+        Example:
+        from bristol.ensembles import Gaussian
+        ge   = Gaussian()
+        d, e = ge.gen_tridiagonal(8, beta='GUE', set_seed=True, seed=2963416)
+
+        """
+        beta  = self._beta(beta)
+        shape = (N,) if size is None else (size, N)
+        df    = beta * np.arange(N - 1, 0, -1)
+        if rng is None:
+            if set_seed:
+                np.random.seed(seed)
+            rng = np.random
+        d = rng.normal(0.0, np.sqrt(2.0), size=shape)
+        e = np.sqrt(rng.chisquare(df, size=shape[:-1] + (N - 1,)))
+        return d / np.sqrt(2.0), e / np.sqrt(2.0)
+
+    def eigen_gaussian(self, N, beta=1, set_seed=False, seed=42391,
+                       rng=None, normalize=False):
+        """
+
+        Eigenvalues of a beta-Hermite matrix, see `gen_tridiagonal`.
+
+        params:
+        normalize  Scale eigenvalues by sqrt(beta N / 2), so that the
+                   semicircle is on [-2, 2], defaults to False.
+
+        output:
+        e  eigenvalues as numpy array, ascending
+
+        Example:
+        from bristol.ensembles import Gaussian
+        ge = Gaussian()
+        e  = ge.eigen_gaussian(1000, beta='GOE', normalize=True)
+
+        """
+        d, e = self.gen_tridiagonal(N, beta=beta, set_seed=set_seed,
+                                    seed=seed, rng=rng)
+        with instrument.span('eigen_gaussian.eig'):
+            ev = eigensolver.eigvalsh_tridiagonal(d, e)
+        instrument.count('eigen_gaussian.matrices')
+        if normalize:
+            ev = ev / np.sqrt(self._beta(beta) * N / 2.0)
+        return ev
+
+    def _n_eigen_gaussian(self, N, size, beta=1, set_seed=False, seed=9876,
+                          normalize=False):
+        """
+
+        Compute eigenvalues of `size` beta-Hermite matrices, drawn in one
+        batch after seeding once. A choice of seed is generated if
+        set_seed is False.
+
+        output:
+        Dictionary with keys `local_seed` an integer, and numpy array of
+        eigenvalues for each matrix in key `c_eigen`.
+
+        """
+        local_seed = np.random.choice(1000000, 1)
+        np.random.seed(local_seed[0])
+        if set_seed:
+           np.random.seed(seed)
+           local_seed = seed
+        d, e = self.gen_tridiagonal(N, beta=beta, size=size)
+        scale = np.sqrt(self._beta(beta) * N / 2.0) if normalize else 1.0
+        c_eigen = np.empty((size, N))
+        with instrument.span('eigen_gaussian.eig'):
+            for i in range(size):
+                c_eigen[i] = eigensolver.eigvalsh_tridiagonal(d[i], e[i]) / scale
+        instrument.count('eigen_gaussian.matrices', size)
+        return {'local_seed':local_seed, 'c_eigen':c_eigen}
+
+    def eigen_gaussian_ensemble(self, N, cSize=100, nchunks=4, beta=1,
+                                seeds=list(), normalize=False, parallel=True,
+                                executor=None):
+        """
+
+        Compute eigenvalues of a beta-Hermite ensemble, in parallel or
+        serial, with the seeding interface of
+        `Circular.eigen_circular_ensemble`: one seed per chunk, and the
+        same result in parallel and serial.
+
+
+        params:
+        N          Size of the matrices.
+        cSize      Number of random matrices to generate in a chunk.
+        nchunks    number of cSize chunks.
+        beta       Dyson index or 'GOE', 'GUE', 'GSE', defaults to 1.
+        seeds      List of integer to use in random seed in every chunk.
+        normalize  Semicircle on [-2, 2], see `eigen_gaussian`, defaults to False.
+        parallel   Run in multicore, number of cores as nchunks, defaults to True
+        executor   Optional concurrent.futures compatible executor, see
+                   `Circular.eigen_circular_ensemble`.
+
+        output:
+        Dictionary with keys `local_seeds`, `c_eigen` eigenvalues of the
+        matrices one after another, `matrix_size` and `number_of_matrices`.
+
+        Example:
+        from bristol.ensembles import Gaussian
+        ge  = Gaussian()
+        res = ge.eigen_gaussian_ensemble(1000, cSize=25, nchunks=4,
+                                         beta='GOE', seeds=[1, 2, 3, 4],
+                                         normalize=True)
+
+        """
+        if len(seeds) != nchunks:
+          raise Exception("Seeds vector must be provided for each chunk")
+        self._beta(beta)
+        wrap_f = partial(_n_eigen_gaussian2, N=N, size=cSize, beta=beta,
+                         normalize=normalize)
+        if not parallel:
+          rrp = [wrap_f(seed) for seed in seeds]
+        elif executor is not None:
+          rrp = list(executor.map(wrap_f, seeds))
+        else:
+          pool = mp.Pool(processes=nchunks)
+          rrp  = pool.map(wrap_f, seeds)
           pool.close()
           pool.join()
-          local_seeds = []
-          c_eigen      = np.empty(0)
-          for j in range(nchunks):
-             local_seeds.append(rrp[j]['local_seed'])
-             c_eigen = np.append(c_eigen, rrp[j]['c_eigen'])
-          return {'local_seeds':local_seeds, 'c_eigen':c_eigen,
-              'matrix_size':N, 'number_of_matrices':nchunks*cSize}
+        return {'local_seeds':[r['local_seed'] for r in rrp],
+                'c_eigen':np.concatenate([np.ravel(r['c_eigen']) for r in rrp]),
+                'matrix_size':N, 'number_of_matrices':nchunks*cSize}
+
+    def eigen_gaussian_mixed(self, N, p=0.7, M=100, beta=1, seed=42391,
+                             normalize=False, processes=None, parallel=True,
+                             executor=None):
+        """
+
+        Compute eigenvalues of a mixed-order beta-Hermite ensemble: the
+        order of each of M matrices is drawn from Binomial(N, p). Matrices
+        are grouped by order and each group is generated in one batch, on
+        a single pool, largest orders first. Results do not depend on the
+        number of workers.
+
+
+        params:
+        N          Maximum matrix order, number of Bernoulli trials.
+        p          Mixing coefficient, probability of success, defaults to 0.7.
+        M          Number of matrices, defaults to 100.
+        beta       Dyson index or 'GOE', 'GUE', 'GSE', defaults to 1.
+        seed       Integer seed of the orders and of the per order streams,
+                   defaults to 42391.
+        normalize  Scale eigenvalues by sqrt(beta N / 2), the semicircle of
+                   order N on [-2, 2], defaults to False.
+        processes  Number of worker processes, defaults to number of cores.
+        parallel   Run in multicore, defaults to True
+        executor   Optional concurrent.futures compatible executor, see
+                   `Circular.eigen_circular_ensemble`.
 
+        output:
+        Dictionary with keys `seed`, `orders` of the matrices, `c_eigen`
+        a RaggedEigenvalues container with the eigenvalues of each matrix,
+        in draw order, `matrix_size` N and `number_of_matrices` M.
+
+        Example:
+        from bristol.ensembles import Gaussian
+        from bristol.spectral import Ergodicity
+        ge     = Gaussian()
+        ergo   = Ergodicity()
+        res    = ge.eigen_gaussian_mixed(400, p=0.7, M=100, beta='GOE')
+        stairs, dos = ergo.spectral_staircase(res['c_eigen'], 100)
+
+        """
+        beta   = self._beta(beta)
+        orders = np.random.default_rng(seed).binomial(N, p, M)
+        sizes, counts = np.unique(orders, return_counts=True)
+        buckets = sorted(zip(sizes.tolist(), counts.tolist()),
+                         key=lambda b: -b[1] * float(b[0]) ** 2)
+        scale  = np.sqrt(beta * N / 2.0) if normalize else 1.0
+        wrap_f = partial(_eigen_gaussian_bucket, beta=beta, seed=seed,
+                         scale=scale)
+        if not parallel:
+          rrp = [wrap_f(b) for b in buckets]
+        elif executor is not None:
+          rrp = list(executor.map(wrap_f, buckets))
+        else:
+          pool = mp.Pool(processes=processes)
+          rrp  = pool.map(wrap_f, buckets, chunksize=1)
+          pool.close()
+          pool.join()
+        by_order = {b[0]:r for b, r in zip(buckets, rrp)}
+        # matrix i is the k-th of its order, in draw order
+        rank = np.zeros(M, dtype=np.int64)
+        for order in by_order:
+          ix = np.flatnonzero(orders == order)
+          rank[ix] = np.arange(len(ix))
+        c_eigen = RaggedEigenvalues.from_sets([by_order[o][k]
+                                               for o, k in zip(orders, rank)])
+        return {'seed':seed, 'orders':orders, 'c_eigen':c_eigen,
+                'matrix_size':N, 'number_of_matrices':M}
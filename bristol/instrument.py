@@ -0,0 +1,157 @@
+"""
+
+     Stage-level instrumentation: spans and counters
+
+
+"""
+
+import time
+import contextvars
+
+# stack of active recorders, a tuple per context, so that threads and
+# asyncio tasks each see their own
+_active = contextvars.ContextVar('bristol_recorders', default=())
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_span(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class Recorder:
+    """
+
+    Collects wall time of named stages (spans) and counters, from bristol
+    routines called while it is active, including their worker processes.
+    When no recorder is active, instrumentation is a no-op. Recorders
+    are active per thread and per asyncio task context.
+
+    Example:
+    from bristol.ensembles import Circular
+    from bristol.instrument import Recorder
+    ce = Circular()
+    with Recorder() as rec:
+        ce.eigen_circular_ensemble(64, cSize=4, nchunks=2, seeds=[1, 2])
+    print(rec.report())
+
+    """
+
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_active.set(_active.get() + (self,)))
+        return self
+
+    def __exit__(self, *exc):
+        _active.reset(self._tokens.pop())
+        return False
+
+    def add_span(self, name, seconds, count=1):
+        s = self.spans.setdefault(name, [0, 0.0])
+        s[0] = s[0] + count
+        s[1] = s[1] + seconds
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """
+
+        Spans and counters as a plain dictionary, that can be sent
+        between processes or dumped as JSON.
+
+        """
+        return {'spans': {k: {'count': v[0], 'seconds': v[1]}
+                          for k, v in self.spans.items()},
+                'counters': dict(self.counters)}
+
+    def merge(self, summary):
+        """
+
+        Add a summary from another recorder, i.e., of a worker process.
+
+        """
+        for k, v in summary['spans'].items():
+            self.add_span(k, v['seconds'], count=v['count'])
+        for k, v in summary['counters'].items():
+            self.count(k, v)
+
+    def report(self):
+        """
+
+        Human readable table of spans and counters.
+
+        """
+        lines = []
+        for k, v in sorted(self.spans.items(), key=lambda kv: -kv[1][1]):
+            lines.append('%-40s %8d calls %12.6f s' % (k, v[0], v[1]))
+        for k, v in sorted(self.counters.items()):
+            lines.append('%-40s %14d' % (k, v))
+        return '\n'.join(lines)
+
+
+def enabled():
+    """
+
+    True if a recorder is active.
+
+    """
+    return len(_active.get()) > 0
+
+
+def span(name):
+    """
+
+    Context manager timing stage `name` on the active recorder.
+
+    """
+    active = _active.get()
+    if not active:
+        return _NULL_SPAN
+    return _Span(active[-1], name)
+
+
+def count(name, value=1):
+    """
+
+    Add `value` to counter `name` on the active recorder.
+
+    """
+    active = _active.get()
+    if active:
+        active[-1].count(name, value)
+
+
+def merge(summary):
+    """
+
+    Merge a recorder summary, i.e., returned by a worker process,
+    into the active recorder.
+
+    """
+    active = _active.get()
+    if active:
+        active[-1].merge(summary)
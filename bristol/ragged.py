@@ -0,0 +1,116 @@
+"""
+
+     Ragged eigenvalue sets: flat values with offsets
+
+
+"""
+
+import numpy as np
+
+
+def periodic_weights(size, upper_bound):
+    """
+
+    Multiplicity of each element of a set of length `size` when
+    it is extended periodically, i.e., cycled, to length `upper_bound`.
+
+    params:
+    size          Length of the set.
+    upper_bound   Length of the periodic extension.
+
+    output:
+    Integer numpy array of length `size`.
+
+    Example:
+    periodic_weights(3, 8) # array([3, 3, 2])
+
+    """
+    w = np.full(size, upper_bound // size, dtype=np.int64)
+    w[:upper_bound % size] += 1
+    return w
+
+
+class RaggedEigenvalues:
+    """
+
+    Ordered sets of eigenvalues of possibly different lengths, stored as
+    one flat numpy array `values` and `offsets`, set i being
+    values[offsets[i]:offsets[i+1]].
+
+    Example:
+    from bristol.ragged import RaggedEigenvalues
+    r = RaggedEigenvalues.from_sets([[1.0, 2.0], [3.0, 4.0, 5.0]])
+    len(r), r[1], r.sizes()
+
+    """
+
+    def __init__(self, values, offsets):
+        self.values = np.asarray(values)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.values):
+            raise Exception("Offsets must start at 0 and end at len(values)")
+
+    @classmethod
+    def from_sets(cls, sets):
+        """
+
+        Build from a list of 1D arrays or lists.
+
+        """
+        sets = [np.ravel(s) for s in sets]
+        offsets = np.zeros(len(sets) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(s) for s in sets])
+        if len(sets) == 0:
+            return cls(np.empty(0), offsets)
+        return cls(np.concatenate(sets), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """
+
+        Set i as a view on values, or a RaggedEigenvalues for a slice.
+
+        """
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise Exception("Only contiguous slices are supported")
+            stop = max(start, stop)
+            lo, hi = self.offsets[start], self.offsets[stop]
+            return RaggedEigenvalues(self.values[lo:hi],
+                                     self.offsets[start:stop + 1] - lo)
+        if i < 0:
+            i = i + len(self)
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def sizes(self):
+        """
+
+        Length of each set.
+
+        """
+        return np.diff(self.offsets)
+
+    def max_size(self):
+        """
+
+        Length of the longest set.
+
+        """
+        return int(self.sizes().max())
+
+    def periodic(self, i, upper_bound):
+        """
+
+        Set i extended periodically to `upper_bound` values, with
+        modular indexing.
+
+        """
+        e = self[i]
+        return e[np.arange(upper_bound) % len(e)]
@@ -6,13 +6,234 @@
 """
 
 import numpy as np
+import multiprocessing as mp
+from collections import OrderedDict
+from bristol.ragged import RaggedEigenvalues, periodic_weights
+from bristol.stats import histogram
+from bristol import instrument
+
+
+def _sorted_counts(e_sorted, edges, weights=None):
+    """
+
+    Histogram counts of sorted values `e_sorted` on `edges`,
+    identical to np.histogram, i.e., last bin is closed.
+    Optional `weights` are aligned with `e_sorted`.
+
+    """
+    ix = np.searchsorted(e_sorted, edges[:-1], side='left')
+    ix = np.append(ix, np.searchsorted(e_sorted, edges[-1], side='right'))
+    if weights is None:
+        return np.diff(ix)
+    cum_w = np.concatenate(([0], np.cumsum(weights)))
+    return np.diff(cum_w[ix])
+
+
+def _is_real(c_eigen):
+    return np.abs(np.imag(c_eigen)).sum() < 1e-9
+
+
+def _row_counts(values, edges):
+    """
+
+    Histogram counts of each row of 2D `values` on shared `edges`,
+    in one vectorised pass, identical to np.histogram per row.
+
+    """
+    values = np.atleast_2d(values)
+    nrows, nbins = values.shape[0], len(edges) - 1
+    ix = np.searchsorted(edges, values, side='right') - 1
+    ix[values == edges[-1]] = nbins - 1  # last bin is closed
+    valid = (ix >= 0) & (ix < nbins)
+    rows = np.broadcast_to(np.arange(nrows)[:, None], values.shape)
+    counts = np.bincount(rows[valid] * nbins + ix[valid],
+                         minlength=nrows * nbins)
+    return counts.reshape(nrows, nbins)
+
+
+_REFERENCE_CACHE = OrderedDict()  # sampled reference densities, LRU
+_REFERENCE_CACHE_SIZE = 64
+
+
+def _kl_block(rows, P, L, d):
+    """
+
+    Rows `rows` (start, stop) of the symmetric KL matrix,
+    sum_k (P_i - P_j)(L_i - L_j) = d_i + d_j - P_i.L_j - P_j.L_i.
+
+    """
+    i0, i1 = rows
+    D = d[i0:i1, None] + d[None, :] - np.matmul(P[i0:i1], L.T) - \
+        np.matmul(L[i0:i1], P.T)
+    return D
+
+
+_kl_arrays = None  # (P, L, d) of a pool worker, set once by the initializer
+
+
+def _init_kl_worker(P, L, d):
+    global _kl_arrays
+    _kl_arrays = (P, L, d)
+
+
+def _kl_block_worker(rows):
+    P, L, d = _kl_arrays
+    return _kl_block(rows, P, L, d)
+
+
+def _plane_coords(c_eigen, coords):
+    if coords == 'polar':
+        return np.abs(c_eigen), np.angle(c_eigen)
+    if coords == 'cartesian':
+        return np.real(c_eigen), np.imag(c_eigen)
+    raise Exception("Coordinates 'polar' or 'cartesian' must be selected.")
+
+
+def _bin_index(values, edges):
+    """
+
+    Bin index of each value as np.histogram, last bin closed, -1 if
+    outside the edges.
+
+    """
+    nbins = len(edges) - 1
+    ix = np.searchsorted(edges, values, side='right') - 1
+    ix[values == edges[-1]] = nbins - 1
+    ix[(ix < 0) | (ix >= nbins)] = -1
+    return ix
+
+
+def _row_counts_2d(x, y, x_edges, y_edges):
+    """
+
+    2D histogram counts of each row of `x`, `y`, one flat bincount
+    over all rows, identical to np.histogram2d per row.
+
+    """
+    nrows = x.shape[0]
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    ix, iy = _bin_index(x, x_edges), _bin_index(y, y_edges)
+    valid = (ix >= 0) & (iy >= 0)
+    rows = np.broadcast_to(np.arange(nrows)[:, None], x.shape)
+    counts = np.bincount((rows[valid] * nx + ix[valid]) * ny + iy[valid],
+                         minlength=nrows * nx * ny)
+    return counts.reshape(nrows, nx, ny)
+
+
+def _disc_area_below(x, y, radius):
+    """
+
+    Area of the disc of `radius` with u <= x and v <= y, exact with the
+    primitive of the chord half-length sqrt(radius^2 - u^2).
+
+    """
+    R = radius
+    G = lambda u: 0.5 * (u * np.sqrt(R * R - u * u) + R * R * np.arcsin(u / R))
+    x = min(max(x, -R), R)
+    if y >= R:
+        return 2.0 * (G(x) - G(-R))
+    if y <= -R:
+        return 0.0
+    uc = np.sqrt(R * R - y * y)  # chord at height y
+    area = 0.0
+    for lo, hi, inner in [(-R, -uc, False), (-uc, uc, True), (uc, R, False)]:
+        hi = min(hi, x)
+        if hi <= lo:
+            continue
+        if inner:
+            area = area + y * (hi - lo) + G(hi) - G(lo)
+        elif y > 0:
+            area = area + 2.0 * (G(hi) - G(lo))
+    return area
+
+
+def _poisson_cdf(n, x):
+    """
+
+    P(Poisson(x) <= n - 1), the regularized upper incomplete gamma
+    Q(n, x), summed in log space.
+
+    """
+    k = np.arange(n)
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, n)))))
+    x = np.asarray(x, dtype=float)
+    log_x = np.log(np.maximum(x, 1e-300))[..., None]
+    return np.exp(-x[..., None] + k * log_x - log_fact).sum(axis=-1)
+
+
+def _bin_integral(f, edges, panels=1, order=16):
+    """
+
+    Integral of density f over each bin of `edges`, composite
+    Gauss-Legendre with `panels` panels per bin.
+
+    """
+    x, w = np.polynomial.legendre.leggauss(order)
+    mass = np.zeros(len(edges) - 1)
+    for i in range(len(edges) - 1):
+        if edges[i + 1] <= edges[i]:
+            continue
+        p = np.linspace(edges[i], edges[i + 1], panels + 1)
+        mid, half = (p[1:] + p[:-1]) / 2.0, (p[1:] - p[:-1]) / 2.0
+        nodes = mid[:, None] + half[:, None] * x[None, :]
+        mass[i] = np.sum(half[:, None] * w[None, :] * f(nodes))
+    return mass
+
+
+def _semicircle_cdf(x, radius):
+    x = np.clip(x, -radius, radius)
+    return (0.5 + x * np.sqrt(radius ** 2 - x ** 2) / (np.pi * radius ** 2) +
+            np.arcsin(x / radius) / np.pi)
+
+
+def _gue_density(y, N, radius):
+    """
+
+    Exact one-point density of N x N GUE eigenvalues, sum of squared
+    Hermite functions, scaled to the semicircle of `radius`.
+
+    """
+    scale = np.sqrt(2.0 * N) / radius
+    x = y * scale
+    phi_prev = np.zeros_like(x)
+    phi = np.pi ** -0.25 * np.exp(-x * x / 2.0)
+    rho = phi * phi
+    for k in range(N - 1):
+        phi_prev, phi = phi, (np.sqrt(2.0 / (k + 1)) * x * phi -
+                              np.sqrt(k / (k + 1.0)) * phi_prev)
+        rho = rho + phi * phi
+    return rho * scale / N
+
+
+def _marchenko_pastur_mass(edges, ratio, variance):
+    """
+
+    Marchenko-Pastur probability mass of each bin, the continuous part is
+    integrated in angle, x = c - h cos(t), where it is smooth.
+
+    """
+    a = variance * (1.0 - np.sqrt(ratio)) ** 2
+    b = variance * (1.0 + np.sqrt(ratio)) ** 2
+    c, h = (a + b) / 2.0, (b - a) / 2.0
+    t = np.arccos(np.clip((c - np.asarray(edges, dtype=float)) / h, -1.0, 1.0))
+    f = lambda s: (h * np.sin(s)) ** 2 / (2.0 * np.pi * ratio * variance *
+                                          (c - h * np.cos(s)))
+    mass = _bin_integral(f, t, panels=4)
+    if ratio > 1.0:  # point mass at zero
+        ix = np.searchsorted(edges, 0.0, side='right') - 1
+        if edges[-1] == 0.0:
+            ix = len(edges) - 2
+        if 0 <= ix < len(edges) - 1:
+            mass[ix] = mass[ix] + 1.0 - 1.0 / ratio
+    return mass
 
 
 class Ergodicity:
     def __init__(self):
         pass
 
-    def spectral_density(self, c_eigen, ensemble_size, N, delta_rad=0.2):
+    def spectral_density(self, c_eigen, ensemble_size, N, delta_rad=0.2,
+                         bin_rule=None):
         """
              
            Compute spectral density
@@ -27,6 +248,9 @@ class Ergodicity:
                           scale the resulting spectrum.
            delta_rad      spacing to use in getting the density, 
                           defaults to 0.2 radians. Used only for complex
+           bin_rule       Bin rule for real eigenvalues, 'fd', 'scott' or 
+                          'knuth', see `stats.histogram.bin_edges`, defaults
+                          to None, 10 bins.
     
            Output
            A density in two dimensional numpy array, with bin centres in the 
@@ -59,16 +283,20 @@ class Ergodicity:
                 is_C = False
         except:
             pass
-        if (is_C):
-            b_ks = np.arange(-np.pi, np.pi, delta_rad)  # bin edges
-            b_ks_centres = b_ks[1:] - delta_rad / 2.0  # bin centres
-            rho_ensemble = np.histogram(np.angle(c_eigen), bins=b_ks)
-            den = np.column_stack(
-                (b_ks_centres, rho_ensemble[0] / float(ensemble_size)))
-        if (not is_C):
-            hist_v, bin_edge = np.histogram(c_eigen)
-            bin_centre = bin_edge[:-1] + (bin_edge[1] - bin_edge[0]) / 2.0
-            den = np.column_stack((bin_centre, hist_v / float(ensemble_size)))
+        with instrument.span('spectral_density.histogram'):
+            if (is_C):
+                b_ks = np.arange(-np.pi, np.pi, delta_rad)  # bin edges
+                b_ks_centres = b_ks[1:] - delta_rad / 2.0  # bin centres
+                rho_ensemble = np.histogram(np.angle(c_eigen), bins=b_ks)
+                den = np.column_stack(
+                    (b_ks_centres, rho_ensemble[0] / float(ensemble_size)))
+            if (not is_C):
+                bins = 10
+                if bin_rule is not None:
+                    bins = histogram().bin_edges(np.real(c_eigen), rule=bin_rule)
+                hist_v, bin_edge = np.histogram(c_eigen, bins=bins)
+                bin_centre = bin_edge[:-1] + (bin_edge[1] - bin_edge[0]) / 2.0
+                den = np.column_stack((bin_centre, hist_v / float(ensemble_size)))
 
         return den
 
@@ -76,17 +304,23 @@ class Ergodicity:
                             c_eigen_ensemble,
                             ensemble_size,
                             N,
-                            delta_rad=0.2):
+                            delta_rad=0.2,
+                            bin_rule=None):
         """
          
          Compute TM metric for given set of eigenvalues e_i.
     
     
          Input
-          c_eigen_ensemble : set of eigenvalues as a 1D np array
+          c_eigen_ensemble : set of eigenvalues as a 1D np array, or a 
+                             RaggedEigenvalues container where sets shorter
+                             than N are extended periodically.
           ensemble_size    : number of ensembles used, this is used to scale the resulting spectrum.
           N                : matrix size used to generate eigenvalues.
           delta_rad        : spacing to use in getting the density, defaults to 0.2 radians.
+          bin_rule         : Bin rule for real eigenvalues, 'fd', 'scott' or 'knuth',
+                             bins are chosen once from the ensemble and shared,
+                             see `thirumalai_mountain_shared`, defaults to None.
     
          Output
           Omega, TM metric 1d numpy array.
@@ -129,6 +363,15 @@ class Ergodicity:
                                                )
     
         """
+        if isinstance(c_eigen_ensemble, RaggedEigenvalues):
+            return self.thirumalai_mountain_prefix(
+                c_eigen_ensemble[0:ensemble_size], N, delta_rad)[-1]
+        if bin_rule is not None and _is_real(c_eigen_ensemble):
+            bin_edges = self.real_bin_edges([c_eigen_ensemble],
+                                            bin_rule=bin_rule)
+            return self.thirumalai_mountain_shared(c_eigen_ensemble,
+                                                   ensemble_size, N,
+                                                   bin_edges=bin_edges)
         sden_ensemble = self.spectral_density(c_eigen_ensemble, ensemble_size,
                                               N, delta_rad)
         omega = np.zeros(sden_ensemble.shape[0])
@@ -140,6 +383,624 @@ class Ergodicity:
                 (sden_spec[:, 1] - sden_ensemble[:, 1]), 2) + omega
         return omega / ensemble_size / N
 
+    def real_bin_edges(self, c_eigen_sets, bins=10, value_range=None,
+                       bin_rule=None):
+        """
+
+         Compute shared bin edges for real eigenvalues once, so that all
+         densities are binned on the same edges.
+
+
+         Input
+          c_eigen_sets : iterable of arrays of real eigenvalues, can be a 
+                         generator of chunks, only their range is used, in
+                         a single streaming pass.
+          bins         : number of bins, defaults to 10 as in np.histogram.
+          value_range  : (lower, upper) fixed range, skips the pass over 
+                         c_eigen_sets, defaults to None.
+          bin_rule     : 'fd', 'scott' or 'knuth', number of bins is chosen
+                         from a streaming quantile sketch of c_eigen_sets in 
+                         the same single pass, in bounded memory, 
+                         see `stats.histogram.bin_edges`, defaults to None.
+
+         Output
+          Bin edges, 1d numpy array of length bins+1.
+
+         Example:
+
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo  = Ergodicity()
+            np.random.seed(42)
+            edges = ergo.real_bin_edges([np.random.random(10) for _ in range(5)])
+
+        """
+        if bin_rule is not None:
+            return histogram().bin_edges(iter(c_eigen_sets), rule=bin_rule)
+        if value_range is None:
+            lo, hi = np.inf, -np.inf
+            for e in c_eigen_sets:
+                e = np.real(e)
+                if e.size > 0:
+                    lo, hi = min(lo, e.min()), max(hi, e.max())
+            if lo > hi:
+                raise Exception("No eigenvalues to get a range from")
+            value_range = (lo, hi)
+        return np.histogram_bin_edges(np.asarray(value_range, dtype=float),
+                                      bins=bins)
+
+    def spectral_density_shared(self, c_eigen, ensemble_size, bin_edges):
+        """
+
+           Compute spectral density of real eigenvalues on given
+           shared bin edges, see `real_bin_edges`.
+
+           Input
+           c_eigen        set of real eigenvalues as an np array.
+           ensemble_size  number of ensembles used, this is used to 
+                          scale the resulting spectrum.
+           bin_edges      bin edges
+
+           Output
+           A density in two dimensional numpy array, with bin centres in the 
+           first column and the density in the second column.
+
+        """
+        hist_v = _row_counts(np.ravel(np.real(c_eigen)), bin_edges)[0]
+        bin_centre = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+        return np.column_stack((bin_centre, hist_v / float(ensemble_size)))
+
+    def thirumalai_mountain_shared(self, c_eigen_ensemble, ensemble_size, N,
+                                   bin_edges=None, bins=10):
+        """
+
+         Compute TM metric for real eigenvalues, where each matrix density
+         and the ensemble density are binned on the same shared edges.
+         All matrices are binned in one vectorised pass. This is the 
+         consistent counterpart of `thirumalai_mountain` for real 
+         eigenvalues, where bins of each matrix follow its own range.
+
+
+         Input
+          c_eigen_ensemble : set of real eigenvalues as a 1D np array, matrix
+                             after matrix.
+          ensemble_size    : number of matrices.
+          N                : matrix size used to generate eigenvalues.
+          bin_edges        : shared bin edges, from `real_bin_edges`, computed
+                             from the range of c_eigen_ensemble if None.
+          bins             : number of bins if bin_edges is None, defaults to 10.
+
+         Output
+          Omega, TM metric 1d numpy array.
+
+         Example:
+
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo  = Ergodicity()
+            np.random.seed(42)
+            e     = np.random.random(100)
+            edges = ergo.real_bin_edges([e], value_range=(0.0, 1.0))
+            tm    = ergo.thirumalai_mountain_shared(e, 10, 10, bin_edges=edges)
+
+        """
+        e = np.real(c_eigen_ensemble)[0:ensemble_size * N]
+        e = e.reshape(ensemble_size, N)
+        if bin_edges is None:
+            bin_edges = self.real_bin_edges([e], bins=bins)
+        h = _row_counts(e, bin_edges)
+        rho = h.mean(axis=0)
+        return np.power(h - rho, 2).sum(axis=0) / ensemble_size / N
+
+    def thirumalai_mountain_binned(self, binned, N=None):
+        """
+
+         Compute TM metric from per matrix bin counts, as returned by
+         `Circular.eigen_circular_ensemble_binned`, without eigenvalues.
+         Same result as `thirumalai_mountain` on the eigenvalues.
+
+
+         Input
+          binned : dictionary with `bin_edges`, `number_of_matrices` and
+                   either `counts` (M x bins) or their sums `S1`, `S2`.
+          N      : matrix size, defaults to binned['matrix_size'].
+
+         Output
+          Omega, TM metric 1d numpy array.
+
+        """
+        if N is None:
+            N = binned['matrix_size']
+        if 'counts' in binned:
+            h = np.asarray(binned['counts'], dtype=float)
+            S1, S2, M = h.sum(axis=0), (h * h).sum(axis=0), h.shape[0]
+        else:
+            S1 = np.asarray(binned['S1'], dtype=float)
+            S2 = np.asarray(binned['S2'], dtype=float)
+            M = binned['number_of_matrices']
+        rho = S1 / float(M)
+        return (S2 - 2.0 * rho * S1 + M * rho * rho) / M / N
+
+    def spectral_density_binned(self, binned):
+        """
+
+           Spectral density from bin counts, see `thirumalai_mountain_binned`,
+           same as `spectral_density` on the eigenvalues with ensemble_size
+           number of matrices.
+
+        """
+        edges = binned['bin_edges']
+        if 'counts' in binned:
+            H = np.asarray(binned['counts']).sum(axis=0)
+        else:
+            H = np.asarray(binned['S1'])
+        centres = edges[1:] - (edges[1] - edges[0]) / 2.0
+        return np.column_stack((centres,
+                                H / float(binned['number_of_matrices'])))
+
+    def thirumalai_mountain_prefix(self, c_eigen_sets, N, delta_rad=0.2,
+                                   bin_edges=None):
+        """
+
+         Compute TM metric for every prefix of an ordered list of
+         eigenvalue sets, incrementally.
+
+         Result l-1 is the same as calling `thirumalai_mountain` on the
+         first l sets, but each set is binned only once: running sums and
+         sums of squares of the per-set densities, and a running prefix
+         histogram, are updated as sets are appended. The prefix histogram
+         is re-assembled from the per-set sorted eigenvalues only when
+         the prefix range grows and moves the bin edges (real eigenvalues).
+
+         Sets shorter than N, e.g. from a RaggedEigenvalues container, are
+         extended periodically to N through histogram weights, as in
+         cPSE, without materialising the extension.
+
+
+         Input
+          c_eigen_sets : ordered list of eigenvalue sets or RaggedEigenvalues.
+          N            : number of eigenvalues in each (periodic) set.
+          delta_rad    : spacing to use in getting the density, defaults to 0.2 radians.
+          bin_edges    : shared bin edges for real eigenvalues, see `real_bin_edges`,
+                         defaults to None, bins of `thirumalai_mountain` are used.
+
+         Output
+          List of Omega, TM metric 1d numpy arrays, one for each prefix.
+
+         Example:
+
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo   = Ergodicity()
+            np.random.seed(42)
+            esets  = [np.random.random(32) for _ in range(10)]
+            omegas = ergo.thirumalai_mountain_prefix(esets, 32)
+            tm3    = ergo.thirumalai_mountain(np.ravel(esets[0:3]), 3, 32)
+            np.allclose(omegas[2], tm3)
+
+        """
+        if not isinstance(c_eigen_sets, RaggedEigenvalues):
+            c_eigen_sets = [np.asarray(e) for e in c_eigen_sets]
+        is_C = True
+        try:
+            sum_c = sum([np.abs(e.imag).sum() for e in c_eigen_sets])
+            if (sum_c < 1e-9):
+                is_C = False
+        except:
+            pass
+        omegas = []
+        S1 = S2 = H = None
+        if (is_C):
+            b_ks = np.arange(-np.pi, np.pi, delta_rad)  # bin edges
+        else:
+            sorted_sets = []
+            lo, hi = np.inf, -np.inf
+            edges = None
+        for l, e in enumerate(c_eigen_sets, start=1):
+            w = None
+            if len(e) != N:
+                w = periodic_weights(len(e), N)
+            if (is_C):
+                h = np.histogram(np.angle(e), bins=b_ks, weights=w)[0]
+                H = h if H is None else H + h
+            else:
+                order = np.argsort(e.real, kind='stable')
+                e = e.real[order]
+                if w is not None:
+                    w = w[order]
+                if bin_edges is not None:
+                    # shared edges, prefix histogram is the running sum
+                    h = _sorted_counts(e, bin_edges, w)
+                    H = h if H is None else H + h
+                else:
+                    sorted_sets.append((e, w))
+                    h = np.histogram(e, weights=w)[0]
+                    lo, hi = min(lo, e[0]), max(hi, e[-1])
+                    new_edges = np.histogram_bin_edges([lo, hi])
+                    if edges is not None and np.array_equal(new_edges, edges):
+                        H = H + _sorted_counts(e, edges, w)
+                    else:
+                        edges = new_edges
+                        H = sum(_sorted_counts(s, edges, sw)
+                                for s, sw in sorted_sets)
+            h = h.astype(float)
+            S1 = h if S1 is None else S1 + h
+            S2 = h * h if S2 is None else S2 + h * h
+            rho = H / float(l)
+            omega = S2 - 2.0 * rho * S1 + l * rho * rho
+            omegas.append(omega / l / N)
+        return omegas
+
+    def reference_density(self, kind, bin_edges, N=None, radius=2.0,
+                          ratio=1.0, variance=1.0):
+        """
+
+         Exact binned expectation of a reference spectral density: the
+         probability mass of each bin, instead of sampling a large
+         reference ensemble.
+
+
+         Input
+          kind      : 'circular', flat eigenphase density on (-pi, pi] of
+                      CUE, exact at any N by rotation invariance,
+                      'semicircle', Wigner semicircle of `radius`, exact
+                      GUE density at finite N if N is given,
+                      'marchenko_pastur', eigenvalues of X X^T / M for
+                      X of N x M with entry `variance` and ratio = N/M,
+                      including the mass at zero for ratio > 1.
+          bin_edges : bin edges, eigenphases for 'circular'.
+          N         : matrix size for the finite-N GUE density, defaults to
+                      None, large N limit.
+          radius    : semicircle radius, defaults to 2.0.
+          ratio     : Marchenko-Pastur ratio N/M, defaults to 1.0.
+          variance  : Marchenko-Pastur entry variance, defaults to 1.0.
+
+         Output
+          Probability mass of each bin, 1d numpy array.
+
+         Example:
+
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo  = Ergodicity()
+            edges = np.linspace(-2.5, 2.5, 11)
+            m_inf = ergo.reference_density('semicircle', edges)
+            m_16  = ergo.reference_density('semicircle', edges, N=16)
+
+        """
+        bin_edges = np.asarray(bin_edges, dtype=float)
+        if kind == 'circular':
+            e = np.clip(bin_edges, -np.pi, np.pi)
+            return np.diff(e) / (2.0 * np.pi)
+        if kind == 'semicircle':
+            if N is None:
+                return np.diff(_semicircle_cdf(bin_edges, radius))
+            panels = int(np.ceil(N * (bin_edges[-1] - bin_edges[0]) /
+                                 (2.0 * radius) / (len(bin_edges) - 1))) + 1
+            return _bin_integral(lambda x: _gue_density(x, N, radius),
+                                 bin_edges, panels=panels)
+        if kind == 'marchenko_pastur':
+            return _marchenko_pastur_mass(bin_edges, ratio, variance)
+        raise Exception("Reference density 'circular', 'semicircle' or " +
+                        "'marchenko_pastur' must be selected.")
+
+    def reference_spectral_density(self, kind, N, delta_rad=0.2,
+                                   bin_edges=None, **params):
+        """
+
+         Expected spectral density of a single N x N matrix from a
+         reference density, same layout as `spectral_density`, so that it
+         can replace a sampled reference ensemble in TM and KL comparisons.
+
+
+         Input
+          kind      : see `reference_density`.
+          N         : matrix size, number of eigenvalues.
+          delta_rad : spacing of eigenphase bins for 'circular', bins of 
+                      `spectral_density`, defaults to 0.2 radians.
+          bin_edges : bin edges, required for real densities.
+          params    : passed to `reference_density`, N is passed for the
+                      finite-N semicircle with `finite_N=True`.
+
+         Output
+          A density in two dimensional numpy array, with bin centres in the 
+          first column and the expected counts in the second column.
+
+         Example:
+
+            from bristol.spectral import Ergodicity
+            ergo = Ergodicity()
+            ref  = ergo.reference_spectral_density('circular', 64)
+
+        """
+        if bin_edges is None:
+            if kind != 'circular':
+                raise Exception("Bin edges must be given for real densities")
+            bin_edges = np.arange(-np.pi, np.pi, delta_rad)
+        finite_N = params.pop('finite_N', False)
+        mass = self.reference_density(kind, bin_edges,
+                                      N=N if finite_N else None, **params)
+        centres = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+        return np.column_stack((centres, N * mass))
+
+    def sampled_reference_density(self, ensemble, N, bin_edges=None,
+                                  delta_rad=0.2, M=1000, root_seed=42391,
+                                  sampler=None):
+        """
+
+         Probability mass of each bin of a sampled reference ensemble,
+         where no closed form is known, i.e., COE and CSE as generated
+         in `bristol.ensembles`. Results are cached in memory, keyed by
+         (ensemble, N, bins, M, root_seed), so a reference is sampled only
+         once per process, the least recently used of more than
+         _REFERENCE_CACHE_SIZE references are dropped.
+
+
+         Input
+          ensemble  : 'CUE', 'COE' or 'CSE', eigenphases of matrices from
+                      `Circular.eigen_circular_ensemble_indexed`, or a name
+                      for `sampler`.
+          N         : matrix size.
+          bin_edges : bin edges, defaults to eigenphase bins of
+                      `spectral_density` with delta_rad.
+          delta_rad : spacing of eigenphase bins, defaults to 0.2 radians.
+          M         : number of sampled matrices, defaults to 1000.
+          root_seed : root seed, defaults to 42391.
+          sampler   : optional callable sampler(N, M, rng) returning real
+                      eigenvalues of M matrices, rng is a numpy Generator.
+
+         Output
+          Probability mass of each bin, 1d numpy array.
+
+        """
+        if bin_edges is None:
+            bin_edges = np.arange(-np.pi, np.pi, delta_rad)
+        bin_edges = np.asarray(bin_edges, dtype=float)
+        key = (ensemble, N, bin_edges.tobytes(), M, root_seed)
+        if key in _REFERENCE_CACHE:
+            _REFERENCE_CACHE.move_to_end(key)
+            return _REFERENCE_CACHE[key].copy()
+        with instrument.span('sampled_reference_density'):
+            if sampler is not None:
+                e = np.ravel(sampler(N, M, np.random.default_rng(root_seed)))
+                e = np.real(e)
+            else:
+                from bristol.ensembles import Circular
+                res = Circular().eigen_circular_ensemble_indexed(
+                          N, M=M, root_seed=root_seed, ensemble=ensemble,
+                          parallel=False)
+                e = np.angle(res['c_eigen'])
+            mass = _row_counts(e, bin_edges)[0] / float(len(e))
+        _REFERENCE_CACHE[key] = mass
+        if len(_REFERENCE_CACHE) > _REFERENCE_CACHE_SIZE:
+            _REFERENCE_CACHE.popitem(last=False)
+        return mass.copy()
+
+    def plane_bin_edges(self, c_eigen=None, bins=(10, 16), coords='polar',
+                        value_range=None):
+        """
+
+         Bin edges of the complex plane, radius x angle or Re x Im.
+
+
+         Input
+          c_eigen     : complex eigenvalues, used for the range if
+                        value_range is None.
+          bins        : number of bins in each coordinate, defaults to (10, 16).
+          coords      : 'polar' radius from 0 and angle on (-pi, pi], or
+                        'cartesian' real and imaginary parts, defaults to 'polar'.
+          value_range : largest radius for 'polar', ((re_lo, re_hi),
+                        (im_lo, im_hi)) for 'cartesian', defaults to None,
+                        range of c_eigen.
+
+         Output
+          (x_edges, y_edges) 1d numpy arrays.
+
+        """
+        if coords == 'polar':
+            r_max = value_range
+            if r_max is None:
+                r_max = np.abs(c_eigen).max()
+            return (np.linspace(0.0, r_max, bins[0] + 1),
+                    np.linspace(-np.pi, np.pi, bins[1] + 1))
+        _plane_coords(0j, coords)
+        if value_range is None:
+            value_range = ((np.real(c_eigen).min(), np.real(c_eigen).max()),
+                           (np.imag(c_eigen).min(), np.imag(c_eigen).max()))
+        return (np.linspace(value_range[0][0], value_range[0][1], bins[0] + 1),
+                np.linspace(value_range[1][0], value_range[1][1], bins[1] + 1))
+
+    def _plane_sums(self, c_eigen_ensemble, ensemble_size, N, edges, coords,
+                    block_size):
+        S1 = S2 = None
+        e = np.asarray(c_eigen_ensemble)[0:ensemble_size * N]
+        e = e.reshape(ensemble_size, N)
+        for i in range(0, ensemble_size, block_size):
+            x, y = _plane_coords(e[i:i + block_size], coords)
+            h = _row_counts_2d(x, y, edges[0], edges[1]).astype(float)
+            s1, s2 = h.sum(axis=0), (h * h).sum(axis=0)
+            S1 = s1 if S1 is None else S1 + s1
+            S2 = s2 if S2 is None else S2 + s2
+        return S1, S2
+
+    def spectral_density_2d(self, c_eigen, ensemble_size, N, bins=(10, 16),
+                            coords='polar', value_range=None, edges=None,
+                            block_size=1024):
+        """
+
+           Compute spectral density on the complex plane, radius x angle
+           or Re x Im, so that radial structure of eigenvalues of
+           non-normal matrices is kept, see `plane_bin_edges`. Matrices
+           are binned `block_size` at a time, in bounded memory.
+
+           Input
+           c_eigen        complex eigenvalues, matrix after matrix.
+           ensemble_size  number of matrices.
+           N              number of eigenvalues per matrix.
+           bins, coords, value_range   see `plane_bin_edges`.
+           edges          (x_edges, y_edges), overrides bins and value_range.
+           block_size     number of matrices binned at a time, defaults to 1024.
+
+           Output
+           (density, x_edges, y_edges), density 2D array of counts per
+           matrix.
+
+          Example:
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo = Ergodicity()
+            np.random.seed(42)
+            G    = [(np.random.normal(size=(64, 64)) +
+                     1j*np.random.normal(size=(64, 64))) / np.sqrt(128)
+                    for _ in range(10)]
+            e    = np.concatenate([np.linalg.eigvals(g) for g in G])
+            den, r_edges, a_edges = ergo.spectral_density_2d(e, 10, 64)
+
+        """
+        if edges is None:
+            edges = self.plane_bin_edges(c_eigen, bins, coords, value_range)
+        with instrument.span('spectral_density_2d.histogram'):
+            S1, S2 = self._plane_sums(c_eigen, ensemble_size, N, edges,
+                                      coords, block_size)
+        return S1 / float(ensemble_size), edges[0], edges[1]
+
+    def thirumalai_mountain_2d(self, c_eigen_ensemble, ensemble_size, N,
+                               bins=(10, 16), coords='polar', value_range=None,
+                               edges=None, block_size=1024):
+        """
+
+         Compute TM metric on the complex plane, see `spectral_density_2d`:
+         each matrix density and the ensemble density are binned on the
+         same 2D edges, with one flat bincount per block of matrices.
+         Memory is bounded by block_size x N, not the ensemble size.
+
+         Input
+          As `spectral_density_2d`.
+
+         Output
+          (omega, x_edges, y_edges), Omega 2D numpy array.
+
+        """
+        if edges is None:
+            edges = self.plane_bin_edges(c_eigen_ensemble, bins, coords,
+                                         value_range)
+        S1, S2 = self._plane_sums(c_eigen_ensemble, ensemble_size, N, edges,
+                                  coords, block_size)
+        rho = S1 / float(ensemble_size)
+        omega = S2 - 2.0 * rho * S1 + ensemble_size * rho * rho
+        return omega / ensemble_size / N, edges[0], edges[1]
+
+    def reference_density_2d(self, x_edges, y_edges, coords='polar',
+                             radius=1.0, N=None):
+        """
+
+         Probability mass of each 2D bin under the circular law of
+         complex Ginibre matrices, uniform on the disc of `radius`, entries
+         of variance radius^2/N. With N, exact finite-N Ginibre density
+         (1/pi) Q(N, N|z|^2) for radius 1.
+
+         Input
+          x_edges, y_edges : radius x angle, or Re x Im edges.
+          coords           : 'polar' or 'cartesian', defaults to 'polar'.
+          radius           : disc radius, defaults to 1.0.
+          N                : matrix size for the finite-N density, defaults
+                             to None, large N limit.
+
+         Output
+          2D numpy array of probability mass.
+
+         Example:
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo = Ergodicity()
+            mass = ergo.reference_density_2d(np.linspace(0, 1.5, 7),
+                                             np.linspace(-np.pi, np.pi, 9))
+
+        """
+        x_edges = np.asarray(x_edges, dtype=float)
+        y_edges = np.asarray(y_edges, dtype=float)
+        if N is None:
+            f = lambda r: 2.0 * r / radius ** 2 * (r <= radius)
+        else:
+            f = lambda r: 2.0 * r / radius ** 2 * _poisson_cdf(
+                                       N, N * (r / radius) ** 2)
+        if coords == 'polar':
+            if N is None:
+                r = np.clip(x_edges, 0.0, radius)
+                radial = np.diff(r * r) / radius ** 2
+            else:
+                radial = _bin_integral(f, np.clip(x_edges, 0.0, None),
+                                       panels=8)
+            a = np.clip(y_edges, -np.pi, np.pi)
+            return radial[:, None] * (np.diff(a) / (2.0 * np.pi))[None, :]
+        _plane_coords(0j, coords)
+        mass = np.zeros((len(x_edges) - 1, len(y_edges) - 1))
+        if N is None:
+            A = np.array([[_disc_area_below(x, y, radius) for y in y_edges]
+                          for x in x_edges])
+            return np.diff(np.diff(A, axis=0), axis=1) / (np.pi * radius ** 2)
+        # finite-N density over the plane, integrated cell by cell
+        xg, wg = np.polynomial.legendre.leggauss(24)
+        for i in range(len(x_edges) - 1):
+            for j in range(len(y_edges) - 1):
+                xm, xh = (x_edges[i] + x_edges[i + 1]) / 2.0, \
+                         (x_edges[i + 1] - x_edges[i]) / 2.0
+                ym, yh = (y_edges[j] + y_edges[j + 1]) / 2.0, \
+                         (y_edges[j + 1] - y_edges[j]) / 2.0
+                X = xm + xh * xg[:, None]
+                Y = ym + yh * xg[None, :]
+                R = np.sqrt(X * X + Y * Y)
+                den = f(R) / (2.0 * np.pi * np.maximum(R, 1e-300))
+                mass[i, j] = xh * yh * np.sum(wg[:, None] * wg[None, :] * den)
+        return mass
+
+    def spectral_staircase(self, c_eigen, number_bin=100, stairs=None,
+                           periodic=None):
+        """
+
+         Spectral staircase, cumulative density of states: the fraction
+         of eigenvalues <= each stair, vectorised with searchsorted on
+         the sorted eigenvalues.
+
+
+         Input
+          c_eigen    : real eigenvalues as an np array, or RaggedEigenvalues.
+          number_bin : number of stairs between min and max, defaults to 100.
+          stairs     : stairs to evaluate at, defaults to None, number_bin
+                       points from min to max.
+          periodic   : for RaggedEigenvalues, extend each set periodically to
+                       this length through weights, as in cPSE, defaults to
+                       None, no extension.
+
+         Output
+          (stairs, dos) 1d numpy arrays.
+
+         Example:
+
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo = Ergodicity()
+            np.random.seed(42)
+            stairs, dos = ergo.spectral_staircase(np.random.normal(size=1000))
+
+        """
+        w = None
+        if isinstance(c_eigen, RaggedEigenvalues):
+            if periodic is not None:
+                w = np.concatenate([periodic_weights(n, periodic)
+                                    for n in c_eigen.sizes() if n > 0])
+            c_eigen = c_eigen.values
+        e = np.real(np.ravel(c_eigen))
+        order = np.argsort(e, kind='stable')
+        e = e[order]
+        if stairs is None:
+            stairs = np.linspace(e[0], e[-1], number_bin)
+        ix = np.searchsorted(e, stairs, side='right')
+        if w is None:
+            return stairs, ix / float(len(e))
+        cum_w = np.concatenate(([0], np.cumsum(w[order])))
+        return stairs, cum_w[ix] / float(cum_w[-1])
+
     def kl_distance_symmetric(self, Nk, Nk_minus, shift=1e-9):
         """
     
@@ -171,6 +1032,62 @@ class Ergodicity:
             (Nk_minus + shift) / (Nk + shift)))
         return ((KL_k + KL_k_minus))
 
+    def kl_distance_matrix(self, densities, shift=1e-9, block_size=1024,
+                           parallel=False, processes=None, executor=None):
+        """
+
+        Pairwise symmetric KL distances, see `kl_distance_symmetric`, of a
+        stack of K densities, in vectorised form: logs are computed once
+        per row and the K x K matrix comes from matrix products,
+        `block_size` rows at a time to bound memory. Pool workers receive
+        the densities once, at start up, and only row ranges per block.
+
+
+        Input:
+         densities    (K, bins) numpy array, or a list of 1D arrays.
+         shift        Epsilon shift distribution upwards, defaults to 1e-9.
+         block_size   Number of rows computed at a time, defaults to 1024.
+         parallel     Compute blocks on a multiprocessing pool, defaults to False.
+         processes    Number of worker processes, defaults to number of cores.
+         executor     Optional concurrent.futures compatible executor, used
+                      instead of a pool when parallel. A generic executor
+                      has no way to send the densities to its workers once,
+                      so the whole matrix is a single task there, not
+                      blocked, as each block task would carry all densities.
+
+        Output:
+          K x K symmetric numpy array, zero diagonal.
+
+        Example:
+            import numpy as np
+            from bristol.spectral import Ergodicity
+            ergo = Ergodicity()
+            np.random.seed(1235)
+            P    = np.random.random((50, 100))
+            D    = ergo.kl_distance_matrix(P)
+            np.isclose(D[3, 7], ergo.kl_distance_symmetric(P[3], P[7]))
+
+        """
+        P = np.atleast_2d(np.asarray(densities, dtype=float))
+        L = np.log2(P + shift)
+        d = np.sum(P * L, axis=1)
+        K = P.shape[0]
+        blocks = [(i, min(i + block_size, K)) for i in range(0, K, block_size)]
+        with instrument.span('kl_distance_matrix'):
+            if not parallel:
+                rrp = [_kl_block(b, P, L, d) for b in blocks]
+            elif executor is not None:
+                rrp = [executor.submit(_kl_block, (0, K), P, L, d).result()]
+            else:
+                pool = mp.Pool(processes=processes, initializer=_init_kl_worker,
+                               initargs=(P, L, d))
+                rrp = pool.map(_kl_block_worker, blocks)
+                pool.close()
+                pool.join()
+        D = np.concatenate(rrp, axis=0)
+        np.fill_diagonal(D, 0.0)
+        return D
+
     def approach_se(self, Ns, ensemble_size, eigen_data, delta_rad=0.2):
         """
      
@@ -1,23 +1,157 @@
 """
-   
+
      Statistics Helper Methods
 
 """
 
+import math
+import numpy as np
+
+
+class QuantileSketch:
+    """
+
+    Mergeable streaming quantile sketch, KLL style: a stack of compactors
+    where level h holds items of weight 2^h. Memory is O(k log(n/k)),
+    rank error is O(1/k) relative.
+
+    params:
+    k     Accuracy parameter, capacity of the top compactor, defaults to 256.
+    seed  Seed for the random compaction offsets, defaults to None.
+
+    Example:
+    import numpy as np
+    from bristol.stats import QuantileSketch
+    sk = QuantileSketch()
+    for _ in range(10):
+        sk.update(np.random.normal(size=100000))
+    sk.quantile([0.25, 0.5, 0.75])
+
+    """
+
+    def __init__(self, k=256, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sum = 0.0
+        self.sum2 = 0.0
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * np.power(2.0 / 3.0, depth))))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                buf = np.sort(self.levels[h])
+                n_even = len(buf) - len(buf) % 2
+                offset = self.rng.integers(2)
+                self.levels[h] = buf[n_even:]  # odd one out stays
+                self.levels[h + 1] = np.concatenate((self.levels[h + 1],
+                                                     buf[offset:n_even:2]))
+            h = h + 1
+
+    def update(self, x):
+        """
+
+        Add values x, any array, to the sketch.
+
+        """
+        x = np.ravel(np.asarray(x, dtype=float))
+        if x.size == 0:
+            return self
+        self.n = self.n + x.size
+        self.min = min(self.min, x.min())
+        self.max = max(self.max, x.max())
+        self.sum = self.sum + x.sum()
+        self.sum2 = self.sum2 + np.dot(x, x)
+        self.levels[0] = np.concatenate((self.levels[0], x))
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+
+        Merge another sketch into this one, i.e., from another chunk or
+        worker.
+
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, buf in enumerate(other.levels):
+            self.levels[h] = np.concatenate((self.levels[h], buf))
+        self.n = self.n + other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum = self.sum + other.sum
+        self.sum2 = self.sum2 + other.sum2
+        self._compress()
+        return self
+
+    def weighted_items(self):
+        """
+
+        Sorted retained items and their weights.
+
+        """
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(buf), 2.0 ** h)
+                                  for h, buf in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q):
+        """
+
+        Approximate quantiles q, in [0, 1].
+
+        """
+        values, weights = self.weighted_items()
+        cum_w = np.cumsum(weights)
+        ix = np.searchsorted(cum_w, np.asarray(q) * cum_w[-1], side='left')
+        return values[np.minimum(ix, len(values) - 1)]
+
+    def std(self):
+        """
+
+        Exact standard deviation from running sums.
+
+        """
+        mean = self.sum / self.n
+        return np.sqrt(max(self.sum2 / self.n - mean * mean, 0.0))
+
+
+def _log_knuth(counts, n, M):
+    """
+
+    Knuth's log posterior for M equal width bins.
+
+    """
+    lg_counts = sum([math.lgamma(c + 0.5) for c in counts])
+    return (n * np.log(M) + math.lgamma(M / 2.0) - M * math.lgamma(0.5) -
+            math.lgamma(n + M / 2.0) + lg_counts)
+
 
 class histogram:
 
     def __init__(self):
-       print("histogram")    
+       pass
 
     def h_freedman_diaconis(self, x):
         """
 
           Find optimal bin size for histogram of x vector.
-          
+
 
           param:
-          x    numpy array
+          x    numpy array, or a QuantileSketch, where quantiles are
+               approximated in bounded memory.
 
           output:
           h    return estimated bin size in freedman_diaconis
@@ -27,7 +161,119 @@ class histogram:
           h_freedman_diaconis(x)
 
         """
-        q75, q25 = np.percentile(x,[75,25])
+        if isinstance(x, QuantileSketch):
+            q75, q25 = x.quantile([0.75, 0.25])
+            n = x.n
+        else:
+            q75, q25 = np.percentile(x,[75,25])
+            n = len(x)
         iqr      = q75 - q25
-        n3       = np.power(len(x),-1.0/3.0)
+        n3       = np.power(n,-1.0/3.0)
         return(2*iqr*n3)
+
+    def h_scott(self, x):
+        """
+
+          Find optimal bin size for histogram of x vector, Scott's rule.
+
+
+          param:
+          x    numpy array or a QuantileSketch
+
+          output:
+          h    return estimated bin size in Scott's normal reference rule
+
+          Example:
+          x = np.random.random(100)
+          h_scott(x)
+
+        """
+        if isinstance(x, QuantileSketch):
+            sigma, n = x.std(), x.n
+        else:
+            sigma, n = np.std(x), len(x)
+        return(3.49*sigma*np.power(n,-1.0/3.0))
+
+    def n_knuth(self, x, max_bins=100):
+        """
+
+          Find optimal number of bins for histogram of x vector, maximising
+          Knuth's Bayesian posterior for equal width bins.
+
+
+          param:
+          x         numpy array or a QuantileSketch, where counts are
+                    approximated from its weighted items.
+          max_bins  Largest number of bins tried, defaults to 100.
+
+          output:
+          M    return estimated number of bins
+
+          References:
+          * K. H. Knuth, Optimal data-based binning for histograms,
+            arXiv:physics/0605197
+
+        """
+        if isinstance(x, QuantileSketch):
+            values, weights = x.weighted_items()
+            lo, hi, n = x.min, x.max, x.n
+        else:
+            values, weights = np.ravel(x), None
+            lo, hi, n = values.min(), values.max(), len(values)
+        best_M, best_logp = 1, -np.inf
+        for M in range(1, max_bins + 1):
+            counts = np.histogram(values, bins=M, range=(lo, hi),
+                                  weights=weights)[0]
+            logp = _log_knuth(counts, n, M)
+            if logp > best_logp:
+                best_M, best_logp = M, logp
+        return best_M
+
+    def bin_edges(self, x, rule='fd', max_bins=10000):
+        """
+
+          Bin edges for histogram of x vector from a bin rule.
+
+
+          param:
+          x         numpy array, a QuantileSketch, or an iterable of chunks of
+                    values that is sketched in one pass.
+          rule      Bin rule, 'fd' Freedman-Diaconis, 'scott' or 'knuth',
+                    defaults to 'fd'.
+          max_bins  Upper bound of number of bins, defaults to 10000.
+
+          output:
+          edges    numpy array of equal width bin edges over range of x
+
+          Example:
+          from bristol.stats import histogram
+          hist  = histogram()
+          x     = np.random.normal(size=1000)
+          edges = hist.bin_edges(x, rule='scott')
+
+        """
+        if not isinstance(x, (QuantileSketch, np.ndarray)):
+            sketch = QuantileSketch()
+            for chunk in x:
+                sketch.update(np.real(chunk))
+            x = sketch
+        if isinstance(x, QuantileSketch):
+            lo, hi = x.min, x.max
+        else:
+            x = np.ravel(np.real(x))
+            lo, hi = x.min(), x.max()
+        if rule == 'knuth':
+            M = self.n_knuth(x, max_bins=min(max_bins, 100))
+        elif rule in ['fd', 'scott']:
+            if rule == 'fd':
+                h = self.h_freedman_diaconis(x)
+            else:
+                h = self.h_scott(x)
+            if h > 0:
+                M = int(np.ceil((hi - lo) / h))
+            else:
+                M = 1
+            M = min(max(M, 1), max_bins)
+        else:
+            raise Exception("Bin rule 'fd', 'scott' or 'knuth' must be selected.")
+        return np.histogram_bin_edges(np.array([lo, hi], dtype=float), bins=M)
@@ -0,0 +1,168 @@
+"""
+
+     cPSE sweeps over many models and checkpoints
+
+
+"""
+
+import os
+import json
+import time
+import multiprocessing as mp
+import numpy as np
+from bristol import cPSE
+
+_large_layer_lock = None
+
+
+def _init_sweep_worker(lock):
+    global _large_layer_lock
+    _large_layer_lock = lock
+
+
+def _cpse_spec(spec, state_key=None, pretrained=True, cache_dir=None,
+               large_layer_size=4096):
+    """
+
+    Compute cPSE for a single spec, a checkpoint path or a torchvision
+    model name. Errors are returned in the record, not raised, so that
+    a sweep carries on.
+
+    """
+    t0 = time.time()
+    record = {'spec': spec}
+    try:
+        cache = None
+        if cache_dir is not None:
+            from bristol.cache import SpectrumCache
+            cache = SpectrumCache(cache_dir)
+        if os.path.exists(spec):
+            named_weights = cPSE.iter_checkpoint_weights(spec, state_key)
+        else:
+            pmodel = getattr(cPSE.models, spec)(pretrained=pretrained)
+            # parameters named `weight`, as in `cPSE.iter_checkpoint_weights`,
+            # so that the layers match `cPSE.cpse_measure`
+            named_weights = ((name, w) for name, w in
+                             pmodel.state_dict().items()
+                             if name.split('.')[-1] == 'weight')
+        eset, names = cPSE.get_eigenvals_named_weights(
+                                          named_weights,
+                                          cache=cache,
+                                          large_layer_lock=_large_layer_lock,
+                                          large_layer_size=large_layer_size
+                                         )
+        d_layers = cPSE.d_layers_pse(cPSE.eigenvals_set_to_ragged(eset),
+                                     verbose=False)
+        record['d_layers'] = [float(d) for d in d_layers]
+        record['cpse'] = float(np.mean(np.log10(d_layers)))
+        record['layers'] = names
+        record['error'] = None
+    except Exception as e:
+        record['error'] = repr(e)
+    record['seconds'] = time.time() - t0
+    return record
+
+
+def read_sweep(out_path):
+    """
+
+    Read results table of a sweep.
+
+    params:
+    out_path  JSON lines file written by `cpse_sweep`.
+
+    output:
+    Dictionary of records keyed by spec, later lines win.
+
+    """
+    records = {}
+    if not os.path.exists(out_path):
+        return records
+    with open(out_path) as fp:
+        for line in fp:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partially written line of an interrupted run
+            records[record['spec']] = record
+    return records
+
+
+def cpse_sweep(specs, out_path, processes=4, max_large_layers=1,
+               large_layer_size=4096, state_key=None, pretrained=True,
+               cache_dir=None, resume=True):
+    """
+
+    Compute cPSE over many models or checkpoints with a process pool.
+
+    Each finished spec is appended as a JSON line to `out_path`, so that
+    a run can be interrupted and resumed: specs with a successful record
+    are skipped.
+
+
+    params:
+    specs             List of checkpoint paths or torchvision model names.
+    out_path          JSON lines file for the results table.
+    processes         Number of worker processes, defaults to 4.
+                      Runs serially in this process if 1.
+    max_large_layers  Number of layers with N >= large_layer_size that can be
+                      processed at the same time across workers, bounding
+                      memory, defaults to 1. None for no bound.
+    large_layer_size  Number of rows that make a layer large, defaults to 4096.
+    state_key         See `cPSE.iter_checkpoint_weights`.
+    pretrained        Passed to torchvision model constructors, defaults to True.
+    cache_dir         Optional directory of a bristol.cache.SpectrumCache
+                      shared by the workers.
+    resume            Skip specs already in `out_path`, defaults to True.
+
+    output:
+    Dictionary of records keyed by spec, with keys `d_layers`, `cpse`,
+    `layers`, `seconds` and `error`.
+
+    Example:
+    from bristol.sweep import cpse_sweep
+    res = cpse_sweep(['vgg11', 'resnet18', 'ckpt/epoch10.pt'], 'cpse.jsonl')
+
+    """
+    done = {}
+    if resume:
+        done = {spec: r for spec, r in read_sweep(out_path).items()
+                if r.get('error') is None}
+    todo = [spec for spec in specs if spec not in done]
+    results = dict(done)
+    if len(todo) == 0:
+        return results
+    lock = None
+    if max_large_layers is not None:
+        lock = mp.BoundedSemaphore(max_large_layers)
+    kwargs = {'state_key': state_key, 'pretrained': pretrained,
+              'cache_dir': cache_dir, 'large_layer_size': large_layer_size}
+    with open(out_path, 'a') as fp:
+        if processes == 1:
+            _init_sweep_worker(lock)
+            records = (_cpse_spec(spec, **kwargs) for spec in todo)
+            for record in records:
+                fp.write(json.dumps(record) + '\n')
+                fp.flush()
+                results[record['spec']] = record
+        else:
+            pool = mp.Pool(processes=processes,
+                           initializer=_init_sweep_worker, initargs=(lock,))
+            try:
+                for record in pool.imap_unordered(_spec_worker,
+                                                  [(spec, kwargs) for spec in todo]):
+                    fp.write(json.dumps(record) + '\n')
+                    fp.flush()
+                    results[record['spec']] = record
+            finally:
+                pool.close()
+                pool.join()
+    return results
+
+
+def _spec_worker(args):
+    spec, kwargs = args
+    return _cpse_spec(spec, **kwargs)
@@ -26,6 +26,12 @@ setup(
                         'torch >= 1.3.0', 
                         'torchvision >= 0.4.1'
                        ],
+      extras_require={
+                      'scipy': ['scipy >= 1.5']
+                     },
+      entry_points={
+                    'console_scripts': ['bristol=bristol.cli:main']
+                   },
       test_suite="test",
       zip_safe=False
      )
@@ -0,0 +1,39 @@
+import unittest
+from bristol.adaptive import adaptive_thirumalai_mountain, adaptive_approach_se
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+import numpy as np
+
+class test_adaptive(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_adaptive_thirumalai_mountain_01(self):
+          ce   = Circular()
+          ergo = Ergodicity()
+          res  = adaptive_thirumalai_mountain(8, tol=1.0, batch_size=6,
+                                              nchunks=2, root_seed=2963416)
+          self.assertTrue(res['converged'])
+          self.assertTrue(res['batches'] == 3)
+          M  = res['number_of_matrices']
+          e  = ce.eigen_circular_ensemble_indexed(8, M=M, root_seed=2963416,
+                                                  parallel=False)
+          tm = ergo.thirumalai_mountain(e['c_eigen'], M, 8)
+          self.assertTrue(np.abs(tm - res['omega']).max() < self.epsilon)
+          self.assertTrue(res['precision'] <= 1.0)
+
+      def test_adaptive_thirumalai_mountain_02(self):
+          res = adaptive_thirumalai_mountain(8, tol=1e-12, batch_size=4,
+                                             nchunks=2, max_matrices=20)
+          self.assertFalse(res['converged'])
+          self.assertTrue(res['number_of_matrices'] == 20)
+          self.assertTrue(len(res['history']) == 5)
+
+      def test_adaptive_approach_se_01(self):
+          ergo = Ergodicity()
+          res  = adaptive_approach_se([4, 8, 12], tol=1e-12, batch_size=4,
+                                      nchunks=2, max_matrices=12)
+          self.assertTrue(len(res['D_se']) == 2)
+          d = ergo.kl_distance_symmetric(res['omegas'][8], res['omegas'][4])
+          self.assertTrue(np.abs(d - res['D_se'][0]) < self.epsilon)
+          self.assertTrue(np.all(np.isfinite(res['stderr'])))
@@ -0,0 +1,76 @@
+import unittest
+import asyncio
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+from bristol.aio import AsyncBristol
+
+class test_aio(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_aio_01(self):
+          ce     = Circular()
+          mseeds = [2963416, 235124, 786134]
+          ref    = ce.eigen_circular_ensemble(seeds=mseeds, N=5, cSize=2,
+                                              nchunks=3, parallel=False)
+          async def main():
+              async with AsyncBristol(max_workers=2, max_concurrency=2) as ab:
+                  reqs = [ab.eigen_circular_ensemble(5, cSize=2, nchunks=3,
+                                                     seeds=mseeds)
+                          for _ in range(4)]
+                  res  = await asyncio.gather(*reqs)
+                  tm   = await ab.thirumalai_mountain(res[0]['c_eigen'], 6, 5)
+                  chunks = [c async for c in ab.eigen_circular_ensemble_chunks(
+                                               5, cSize=2, nchunks=3,
+                                               seeds=mseeds, ordered=True)]
+                  np.random.seed(42)
+                  matrices = [np.random.normal(size=(64,64)) for _ in range(10)]
+                  cpse = await ab.cpse_measure_vanilla(matrices)
+              return res, tm, chunks, cpse
+          res, tm, chunks, cpse = asyncio.run(main())
+          for r in res:
+              self.assertTrue(r['local_seeds'] == ref['local_seeds'])
+              self.assertTrue(np.abs(r['c_eigen'] - ref['c_eigen']).max() < self.epsilon)
+          tm_ref = Ergodicity().thirumalai_mountain(ref['c_eigen'], 6, 5)
+          self.assertTrue(np.abs(tm - tm_ref).max() < self.epsilon)
+          self.assertTrue([c['chunk'] for c in chunks] == [0, 1, 2])
+          self.assertTrue(np.abs(cpse[1]+1.4814662381222536) < self.epsilon)
+
+      def test_aio_02(self):
+          async def main():
+              with ProcessPoolExecutor(1) as ex:
+                  ab   = AsyncBristol(executor=ex, max_concurrency=1)
+                  task = asyncio.ensure_future(ab.eigen_circular_ensemble(
+                                    120, cSize=4, nchunks=4, seeds=[1, 2, 3, 4]))
+                  await asyncio.sleep(0.05)
+                  task.cancel()
+                  try:
+                      await task
+                  except asyncio.CancelledError:
+                      cancelled = True
+                  # semaphore is released, next request runs
+                  res = await ab.eigen_circular_ensemble(4, cSize=1, nchunks=1,
+                                                         seeds=[1])
+              return cancelled, res
+          cancelled, res = asyncio.run(main())
+          self.assertTrue(cancelled)
+          self.assertTrue(len(res['c_eigen']) == 4)
+
+      def test_aio_03(self):
+          async def main():
+              with ProcessPoolExecutor(1) as ex:
+                  ab     = AsyncBristol(executor=ex, max_concurrency=1)
+                  chunks = ab.eigen_circular_ensemble_chunks(
+                                    4, cSize=1, nchunks=3, seeds=[1, 2, 3],
+                                    ordered=True)
+                  first  = await chunks.__anext__()
+                  # consumer holds the generator, other requests still run
+                  res = await asyncio.wait_for(ab.eigen_circular_ensemble(
+                                    4, cSize=1, nchunks=1, seeds=[1]), 30)
+                  await chunks.aclose()
+              return first, res
+          first, res = asyncio.run(main())
+          self.assertTrue(first['chunk'] == 0)
+          self.assertTrue(len(res['c_eigen']) == 4)
@@ -0,0 +1,53 @@
+import unittest
+import os
+import json
+import tempfile
+from bristol import bench
+
+class test_bench(unittest.TestCase):
+
+      def test_bench_01(self):
+          res = bench.run_benchmarks(Ns=[8, 16], repeat=1,
+                                     names=['gen_cue', 'thirumalai_mountain',
+                                            'cpse_measure_vanilla'])
+          for name in ['gen_cue', 'thirumalai_mountain', 'cpse_measure_vanilla']:
+              for N in ['N8', 'N16']:
+                  self.assertTrue(res['results'][name][N]['seconds'] >= 0)
+                  self.assertTrue(res['results'][name][N]['peak_bytes'] > 0)
+          self.assertTrue(len(bench.compare(res, res)) == 0)
+          slow = json.loads(json.dumps(res))
+          slow['results']['gen_cue']['N8']['seconds'] *= 10
+          regressions = bench.compare(slow, res, threshold=2.0)
+          self.assertTrue(len(regressions) == 1)
+          self.assertTrue(regressions[0]['name'] == 'gen_cue')
+
+      def test_bench_02(self):
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               path = os.path.join(tmp_dir, 'bench.json')
+               argv = ['--Ns', '8', '--repeat', '1', '--only', 'gen_coe',
+                       'gen_cse', '--output', path]
+               self.assertTrue(bench.main(argv) == 0)
+               self.assertTrue(bench.main(argv[:-2] + ['--baseline', path,
+                                                       '--threshold', '1e6'])
+                               == 0)
+
+      def test_bench_03(self):
+          names = ['eigen_backend_numpy', 'eigen_backend_scipy',
+                   'eigen_backend_scipy_evr']
+          res   = bench.run_benchmarks(Ns=[8], repeat=1, names=names)
+          for name in names:
+              self.assertTrue(res['results'][name]['N8']['seconds'] >= 0)
+
+      def test_bench_04(self):
+          cwd = os.getcwd()
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               os.chdir(tmp_dir)
+               try:
+                   argv = ['--Ns', '8', '--repeat', '1', '--only', 'gen_cue']
+                   self.assertTrue(bench.main(argv + ['--save']) == 0)
+                   self.assertTrue(os.path.exists(bench.DEFAULT_BASELINE))
+                   self.assertTrue(bench.main(argv + ['--baseline',
+                                                      '--threshold', '1e6'])
+                                   == 0)
+               finally:
+                   os.chdir(cwd)
@@ -0,0 +1,72 @@
+import unittest
+import os
+import json
+import tempfile
+import numpy as np
+from bristol import cli
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+
+class test_cli(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_cli_01(self):
+          job = {
+                 'name': 'job01',
+                 'ensembles': ['CUE', 'CSE'],
+                 'Ns': [4, 8],
+                 'cSize': 2,
+                 'nchunks': 2,
+                 'seeds': [997123, 1091645],
+                 'metrics': ['TM', 'D_se']
+                }
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               path = os.path.join(tmp_dir, 'job01.json')
+               with open(path, 'w') as fp:
+                    json.dump(job, fp)
+               out = os.path.join(tmp_dir, 'out')
+               self.assertTrue(cli.main(['run', path, '--out', out,
+                                         '--workers', '2']) == 0)
+               job_dir = os.path.join(out, 'job01')
+               tm = np.load(os.path.join(job_dir, 'TM_CSE_N8.npy'))
+               with open(os.path.join(job_dir, 'D_se.json')) as fp:
+                    d_se = json.load(fp)
+               with open(os.path.join(job_dir, 'timings.json')) as fp:
+                    timings = json.load(fp)
+               self.assertTrue(os.path.exists(os.path.join(job_dir, 'spectra',
+                                                           'manifest.json')))
+          ce  = Circular()
+          ref = ce.eigen_circular_ensemble(8, cSize=2, nchunks=2,
+                                           ensemble='CSE', seeds=job['seeds'],
+                                           parallel=False)
+          tm_ref = Ergodicity().thirumalai_mountain(ref['c_eigen'], 4, 8)
+          self.assertTrue(np.abs(tm - tm_ref).max() < self.epsilon)
+          self.assertTrue(len(d_se['D_se']['CUE']) == 1)
+          eigen_data = {'N'+str(N): ce.eigen_circular_ensemble(N, cSize=2,
+                                        nchunks=2, ensemble='CSE',
+                                        seeds=job['seeds'], parallel=False)
+                        for N in [4, 8]}
+          dse_ref = Ergodicity().approach_se([4, 8], 4, eigen_data)
+          self.assertTrue(np.abs(d_se['D_se']['CSE'][0] - dse_ref[0]) < self.epsilon)
+          self.assertTrue('generate' in timings['spans'])
+          # spans of the workers are merged
+          self.assertTrue(timings['counters']['eigen_circular.matrices'] == 16)
+          self.assertTrue('spectral_density.histogram' in timings['spans'])
+
+      def test_cli_02(self):
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               path = os.path.join(tmp_dir, 'job.json')
+               with open(path, 'w') as fp:
+                    json.dump({'metrics': ['TM'], 'nchunks': 3}, fp)
+               job = cli.load_job(path)
+               self.assertTrue(job['name'] == 'job')
+               self.assertTrue(job['seeds'] == [1, 2, 3])
+               with open(path, 'w') as fp:
+                    json.dump({'metrics': ['cPSE']}, fp)
+               self.assertRaises(Exception, cli.load_job, path)
+               for bad in [{'ensembles': 'CUE'}, {'ensembles': ['GUE']},
+                           {'Ns': 64}, {'Ns': [64, 0]}, {'metrics': 'TM'}]:
+                   with open(path, 'w') as fp:
+                        json.dump(bad, fp)
+                   self.assertRaises(Exception, cli.load_job, path)
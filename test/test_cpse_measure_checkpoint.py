@@ -0,0 +1,38 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import torch
+from bristol import cPSE
+
+class test_cpse_measure_checkpoint(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_cpse_measure_checkpoint_01(self):
+          torch.manual_seed(42)
+          pmodel = torch.nn.Sequential(
+                                       torch.nn.Conv2d(3, 16, 3),
+                                       torch.nn.BatchNorm2d(16),
+                                       torch.nn.Conv2d(16, 24, 3),
+                                       torch.nn.Conv2d(24, 32, 3),
+                                       torch.nn.Flatten(),
+                                       torch.nn.Linear(32, 40),
+                                       torch.nn.Linear(40, 20),
+                                       torch.nn.Linear(20, 10)
+                                      )
+          d_layers, cpse = cPSE.cpse_measure(pmodel)
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               path = os.path.join(tmp_dir, 'model.pt')
+               torch.save(pmodel.state_dict(), path)
+               d_ckpt, cpse_ckpt = cPSE.cpse_measure_checkpoint(path)
+               path = os.path.join(tmp_dir, 'model_wrapped.pt')
+               torch.save({'state_dict':pmodel.state_dict()}, path)
+               d_wrap, cpse_wrap = cPSE.cpse_measure_checkpoint(
+                                                    path,
+                                                    state_key='state_dict'
+                                                   )
+          self.assertTrue(len(d_ckpt) == len(d_layers))
+          self.assertTrue(np.abs(np.array(d_ckpt)-d_layers).max() < self.epsilon)
+          self.assertTrue(np.abs(cpse_ckpt-cpse) < self.epsilon)
+          self.assertTrue(np.abs(cpse_wrap-cpse) < self.epsilon)
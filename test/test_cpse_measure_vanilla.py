@@ -0,0 +1,26 @@
+import unittest
+import numpy as np
+from bristol import cPSE
+
+class test_cpse_measure_vanilla(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_cpse_measure_vanilla_01(self):
+          np.random.seed(42)
+          matrices = [np.random.normal(size=(64,64)) for _ in range(10)]
+          d_layers, cpse = cPSE.cpse_measure_vanilla(matrices)
+          self.assertTrue(len(d_layers) == 8)
+          self.assertTrue(np.abs(d_layers[0]-0.7155422839005451) < self.epsilon)
+          self.assertTrue(np.abs(d_layers[5]-0.008616721234418135) < self.epsilon)
+          self.assertTrue(np.abs(cpse+1.4814662381222536) < self.epsilon)
+
+      def test_cpse_measure_vanilla_02(self):
+          np.random.seed(42)
+          layers   = [np.random.normal(size=(16+4*i,32)) for i in range(8)]
+          matrices = [np.matmul(m, m.T) for m in layers]
+          d_layers, cpse = cPSE.cpse_measure_vanilla(matrices)
+          self.assertTrue(len(d_layers) == 6)
+          self.assertTrue(np.abs(d_layers[1]-8.244316341940923) < self.epsilon)
+          self.assertTrue(np.abs(d_layers[5]-0.788292167215699) < self.epsilon)
+          self.assertTrue(np.abs(cpse+0.01640714817542913) < self.epsilon)
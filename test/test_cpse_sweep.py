@@ -0,0 +1,68 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import torch
+from bristol import cPSE
+from bristol.sweep import cpse_sweep, read_sweep
+
+class test_cpse_sweep(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_cpse_sweep_01(self):
+          torch.manual_seed(42)
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               paths = []
+               for i in range(3):
+                   pmodel = torch.nn.Sequential(
+                                                torch.nn.Linear(16, 32+8*i),
+                                                torch.nn.Linear(32+8*i, 24),
+                                                torch.nn.Linear(24, 20),
+                                                torch.nn.Linear(20, 12),
+                                                torch.nn.Linear(12, 10)
+                                               )
+                   path = os.path.join(tmp_dir, 'model'+str(i)+'.pt')
+                   torch.save(pmodel.state_dict(), path)
+                   paths.append(path)
+               out_path = os.path.join(tmp_dir, 'cpse.jsonl')
+               res = cpse_sweep(paths[0:2], out_path, processes=2,
+                                large_layer_size=32)
+               self.assertTrue(len(read_sweep(out_path)) == 2)
+               # resumes, only the new spec is computed
+               res = cpse_sweep(paths, out_path, processes=1)
+               with open(out_path) as fp:
+                    self.assertTrue(len(fp.readlines()) == 3)
+               for path in paths:
+                   d_layers, cpse = cPSE.cpse_measure_checkpoint(path)
+                   self.assertTrue(res[path]['error'] is None)
+                   self.assertTrue(np.abs(res[path]['cpse']-cpse) < self.epsilon)
+               res = cpse_sweep(['not_a_model'], out_path, processes=1)
+               self.assertTrue(res['not_a_model']['error'] is not None)
+
+      def test_cpse_sweep_02(self):
+          # attention in_proj_weight is a 2D parameter not named `weight`,
+          # cpse_measure does not use it
+          def tiny_model(pretrained=False):
+              torch.manual_seed(42)
+              return torch.nn.Sequential(
+                                         torch.nn.Linear(16, 32),
+                                         torch.nn.MultiheadAttention(32, 4),
+                                         torch.nn.Linear(32, 24),
+                                         torch.nn.Linear(24, 12)
+                                        )
+          cPSE.models.bristol_tiny_model = tiny_model
+          try:
+              with tempfile.TemporaryDirectory() as tmp_dir:
+                   out_path = os.path.join(tmp_dir, 'cpse.jsonl')
+                   res = cpse_sweep(['bristol_tiny_model'], out_path,
+                                    processes=1, pretrained=False)
+              d_layers, cpse = cPSE.cpse_measure(tiny_model())
+          finally:
+              del cPSE.models.bristol_tiny_model
+          record = res['bristol_tiny_model']
+          self.assertTrue(record['error'] is None)
+          self.assertTrue(record['layers'] == ['0.weight', '1.out_proj.weight',
+                                               '2.weight', '3.weight'])
+          self.assertTrue(len(record['d_layers']) == len(d_layers))
+          self.assertTrue(np.abs(record['cpse']-cpse) < self.epsilon)
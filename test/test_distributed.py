@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from bristol.ensembles import Circular
+from bristol.data import Generate
+from bristol.distributed import LocalCluster
+
+class test_distributed(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_distributed_01(self):
+          ce     = Circular()
+          mseeds = [2963416, 235124, 786134]
+          ref    = ce.eigen_circular_ensemble(seeds=mseeds, N=5, cSize=2,
+                                              nchunks=3, parallel=False)
+          with LocalCluster(2) as cluster:
+               with cluster.executor() as ex:
+                    res = ce.eigen_circular_ensemble(seeds=mseeds, N=5,
+                                                     cSize=2, nchunks=3,
+                                                     executor=ex)
+                    self.assertTrue(list(ex.map(abs, [-1, -2, 3])) == [1, 2, 3])
+                    future = ex.submit(int, 'not a number')
+                    self.assertRaises(ValueError, future.result)
+                    gen     = Generate()
+                    data_ce = gen.spectra_ce(range_N=[4, 8], cSize=2,
+                                             nchunks=3, seeds=mseeds,
+                                             ensemble='COE', parallel=True,
+                                             executor=ex)
+          self.assertTrue(res['local_seeds'] == ref['local_seeds'])
+          self.assertTrue(np.abs(res['c_eigen'] - ref['c_eigen']).max() < self.epsilon)
+          ref8 = ce.eigen_circular_ensemble(seeds=mseeds, N=8, cSize=2,
+                                            nchunks=3, ensemble='COE',
+                                            parallel=False)
+          self.assertTrue(np.abs(data_ce['COE']['N8']['c_eigen'] -
+                                 ref8['c_eigen']).max() < self.epsilon)
+
+      def test_distributed_02(self):
+          ce     = Circular()
+          mseeds = [2963416, 235124]
+          ref    = ce.eigen_circular_ensemble(seeds=mseeds, N=6, cSize=2,
+                                              nchunks=2, parallel=False)
+          with ProcessPoolExecutor(2) as ex:
+               res = ce.eigen_circular_ensemble(seeds=mseeds, N=6, cSize=2,
+                                                nchunks=2, executor=ex)
+          self.assertTrue(np.abs(res['c_eigen'] - ref['c_eigen']).max() < self.epsilon)
+
+      def test_distributed_03(self):
+          with LocalCluster(2) as cluster:
+               ex = cluster.executor()
+               # tasks of a lost worker go to the remaining one
+               cluster.processes[0].terminate()
+               cluster.processes[0].join()
+               self.assertTrue(list(ex.map(abs, range(-6, 0))) == [6, 5, 4, 3, 2, 1])
+               ex.shutdown()
+
+      def test_distributed_04(self):
+          from bristol import distributed
+          import os
+          with LocalCluster(1) as c0, LocalCluster(1) as c1:
+               self.assertTrue(len(c0.authkey) == 32)
+               self.assertTrue(c0.authkey != c1.authkey)
+          saved = os.environ.pop('BRISTOL_AUTHKEY', None)
+          try:
+              with self.assertRaises(SystemExit):
+                  distributed.main(['--port', '0'])
+          finally:
+              if saved is not None:
+                  os.environ['BRISTOL_AUTHKEY'] = saved
+          with self.assertRaises(TypeError):
+              distributed.SocketExecutor([('localhost', 6000)])
+
+      def test_distributed_05(self):
+          import os
+          with LocalCluster(3) as cluster:
+               with cluster.executor(max_retries=1) as ex:
+                    # a task that kills every worker it runs on is given up
+                    future = ex.submit(os._exit, 1)
+                    self.assertRaises(ConnectionError, future.result)
+                    for p in cluster.processes:
+                        p.join(0.5)  # reap the lost workers
+                    alive = [p.is_alive() for p in cluster.processes]
+                    self.assertTrue(list(ex.map(abs, [-1, -2])) == [1, 2])
+          # first run and one retry, the third worker is left
+          self.assertTrue(sum(alive) == 1)
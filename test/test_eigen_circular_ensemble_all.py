@@ -0,0 +1,51 @@
+import unittest
+import tempfile
+from bristol.ensembles import Circular
+from bristol.data import Generate, read_manifest
+import numpy as np
+
+class test_eigen_circular_ensemble_all(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigen_circular_ensemble_all_01(self):
+          ce    = Circular()
+          seeds = [997123, 1091645]
+          for parallel in [False, True]:
+              res = ce.eigen_circular_ensemble_all(6, cSize=2, nchunks=2,
+                                                   seeds=seeds,
+                                                   parallel=parallel)
+              for e in ['CUE', 'COE', 'CSE']:
+                  ref = ce.eigen_circular_ensemble(6, cSize=2, nchunks=2,
+                                                   ensemble=e, seeds=seeds,
+                                                   parallel=False)
+                  self.assertTrue(res[e]['local_seeds'] == ref['local_seeds'])
+                  delta = np.abs(res[e]['c_eigen'] - ref['c_eigen']).max()
+                  self.assertTrue(delta < self.epsilon)
+
+      def test_eigen_circular_ensemble_all_02(self):
+          gen   = Generate()
+          seeds = [997123, 1091645]
+          spec  = {'range_N':[4, 8], 'cSize':2, 'nchunks':2, 'seeds':seeds,
+                   'shared':True}
+          tasks = gen.plan_spectra_ce(**spec)
+          self.assertTrue(len(tasks) == 4)
+          self.assertTrue(all(t['ensemble'] == 'all' for t in tasks))
+          separate = gen.plan_spectra_ce(**dict(spec, shared=False))
+          for t in tasks:
+              cost = sum(s['cost'] for s in separate
+                         if s['N'] == t['N'] and s['chunk'] == t['chunk'])
+              self.assertTrue(t['cost'] == cost - 2 * t['N'] ** 3)
+          ref   = gen.spectra_ce(**dict(spec, shared=False))
+          with tempfile.TemporaryDirectory() as out_dir:
+               gen.run_plan(tasks[0:1], parallel=False, out_dir=out_dir)
+               self.assertTrue(len(read_manifest(out_dir)['completed']) == 3)
+               data_ce = gen.spectra_ce(parallel=True, processes=2,
+                                        out_dir=out_dir, **spec)
+               self.assertTrue(len(read_manifest(out_dir)['completed']) == 12)
+          for e in ['CUE', 'COE', 'CSE']:
+              for N in [4, 8]:
+                  res = data_ce[e]['N'+str(N)]
+                  r0  = ref[e]['N'+str(N)]
+                  delta = np.abs(res['c_eigen'] - r0['c_eigen']).max()
+                  self.assertTrue(delta < self.epsilon)
@@ -0,0 +1,33 @@
+import unittest
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+import numpy as np
+
+class test_eigen_circular_ensemble_binned(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigen_circular_ensemble_binned_01(self):
+          ce    = Circular()
+          ergo  = Ergodicity()
+          seeds = [2963416, 235124, 786134]
+          N     = 8
+          for ensemble in ['CUE', 'COE']:
+              e  = ce.eigen_circular_ensemble(N, cSize=2, nchunks=3,
+                                              ensemble=ensemble,
+                                              seeds=seeds, parallel=False)
+              tm = ergo.thirumalai_mountain(e['c_eigen'], 6, N)
+              sd = ergo.spectral_density(e['c_eigen'], 6, N)
+              for reduce in ['counts', 'sums']:
+                  b = ce.eigen_circular_ensemble_binned(N, cSize=2, nchunks=3,
+                                                        ensemble=ensemble,
+                                                        seeds=seeds,
+                                                        reduce=reduce,
+                                                        parallel=(reduce == 'sums'))
+                  tmb = ergo.thirumalai_mountain_binned(b)
+                  sdb = ergo.spectral_density_binned(b)
+                  self.assertTrue(np.abs(tm - tmb).max() < self.epsilon)
+                  self.assertTrue(np.abs(sd - sdb).max() < self.epsilon)
+          b = ce.eigen_circular_ensemble_binned(N, cSize=2, nchunks=3,
+                                                seeds=seeds, parallel=False)
+          self.assertTrue(b['counts'].shape == (6, len(b['bin_edges']) - 1))
@@ -0,0 +1,36 @@
+import unittest
+from bristol.ensembles import Circular
+import numpy as np
+
+class test_eigen_circular_indexed(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigen_circular_indexed_01(self):
+          ce    = Circular()
+          mseed = 2963416
+          for ensemble in ['CUE', 'COE', 'CSE']:
+              r2 = ce.eigen_circular_ensemble_indexed(6, M=7, root_seed=mseed,
+                                                      ensemble=ensemble,
+                                                      nchunks=2, parallel=False)
+              r3 = ce.eigen_circular_ensemble_indexed(6, M=7, root_seed=mseed,
+                                                      ensemble=ensemble,
+                                                      nchunks=3, parallel=True)
+              n  = 12 if ensemble == 'CSE' else 6
+              self.assertTrue(len(r2['c_eigen']) == 7*n)
+              self.assertTrue(np.abs(r2['c_eigen'] - r3['c_eigen']).max() < self.epsilon)
+              e5 = ce.eigen_circular_indexed(6, 5, mseed, ensemble=ensemble)
+              self.assertTrue(np.abs(r2['c_eigen'][5*n:6*n] - e5).max() < self.epsilon)
+              if ensemble == 'CUE':
+                  self.assertTrue(np.abs(np.abs(r2['c_eigen']) - 1.0).max() < 1e-6)
+
+      def test_eigen_circular_indexed_02(self):
+          ce = Circular()
+          e0 = ce.eigen_circular_indexed(6, 0, 1, ensemble='CUE')
+          e1 = ce.eigen_circular_indexed(6, 1, 1, ensemble='CUE')
+          f0 = ce.eigen_circular_indexed(6, 0, 2, ensemble='CUE')
+          self.assertTrue(np.abs(e0 - e1).max() > 1e-3)
+          self.assertTrue(np.abs(e0 - f0).max() > 1e-3)
+          r0 = ce.matrix_rng(1, 'CUE', 6, 0).random(3)
+          r1 = ce.matrix_rng(1, 'COE', 6, 0).random(3)
+          self.assertTrue(np.abs(r0 - r1).max() > 1e-3)
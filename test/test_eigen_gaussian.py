@@ -0,0 +1,36 @@
+import unittest
+from bristol.ensembles import Gaussian
+from bristol import eigensolver
+import numpy as np
+
+class test_eigen_gaussian(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigen_gaussian_01(self):
+          ge   = Gaussian()
+          d, e = ge.gen_tridiagonal(12, beta='GUE', set_seed=True, seed=2963416)
+          H    = np.diag(d) + np.diag(e, 1) + np.diag(e, -1)
+          ev   = ge.eigen_gaussian(12, beta=2, set_seed=True, seed=2963416)
+          self.assertTrue(np.abs(ev - np.linalg.eigvalsh(H)).max() < self.epsilon)
+          self.assertTrue(np.abs(ev - eigensolver.eigvalsh_tridiagonal(d, e)).max()
+                          < self.epsilon)
+
+      def test_eigen_gaussian_02(self):
+          ge    = Gaussian()
+          seeds = [2963416, 235124, 786134]
+          r0 = ge.eigen_gaussian_ensemble(50, cSize=4, nchunks=3, beta='GOE',
+                                          seeds=seeds, normalize=True,
+                                          parallel=False)
+          r1 = ge.eigen_gaussian_ensemble(50, cSize=4, nchunks=3, beta='GOE',
+                                          seeds=seeds, normalize=True,
+                                          parallel=True)
+          self.assertTrue(r0['local_seeds'] == seeds)
+          self.assertTrue(len(r0['c_eigen']) == 600)
+          self.assertTrue(np.abs(r0['c_eigen'] - r1['c_eigen']).max() < self.epsilon)
+          # semicircle on [-2, 2], second moment 1
+          self.assertTrue(np.abs(np.mean(r0['c_eigen']**2) - 1.0) < 0.1)
+          self.assertTrue(np.abs(r0['c_eigen']).max() < 2.5)
+          for beta in ['GXE', 0]:
+              with self.assertRaisesRegex(Exception, 'beta must be positive'):
+                  ge.eigen_gaussian(4, beta=beta)
@@ -0,0 +1,42 @@
+import unittest
+from bristol.ensembles import Gaussian
+from bristol.spectral import Ergodicity
+from bristol.ragged import RaggedEigenvalues
+from bristol import eigensolver
+import numpy as np
+
+class test_eigen_gaussian_mixed(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigen_gaussian_mixed_01(self):
+          ge = Gaussian()
+          r0 = ge.eigen_gaussian_mixed(40, p=0.7, M=30, beta='GOE',
+                                       seed=2963416, parallel=False)
+          r1 = ge.eigen_gaussian_mixed(40, p=0.7, M=30, beta='GOE',
+                                       seed=2963416, processes=2)
+          self.assertTrue(isinstance(r0['c_eigen'], RaggedEigenvalues))
+          self.assertTrue(len(r0['c_eigen']) == 30)
+          self.assertTrue(np.all(r0['c_eigen'].sizes() == r0['orders']))
+          self.assertTrue(np.abs(r0['c_eigen'].values -
+                                 r1['c_eigen'].values).max() < self.epsilon)
+          # first matrix of an order is the first of its batch
+          order = r0['orders'][0]
+          rng   = np.random.default_rng([2963416, order])
+          d, e  = ge.gen_tridiagonal(order, beta=1, rng=rng,
+                                     size=int((r0['orders'] == order).sum()))
+          ev    = eigensolver.eigvalsh_tridiagonal(d[0], e[0])
+          self.assertTrue(np.abs(r0['c_eigen'][0] - ev).max() < self.epsilon)
+
+      def test_spectral_staircase_01(self):
+          ergo = Ergodicity()
+          np.random.seed(42)
+          e    = np.random.normal(size=500)
+          stairs, dos = ergo.spectral_staircase(e, 50)
+          ref  = [np.sum(e <= s) / 500.0 for s in stairs]
+          self.assertTrue(np.abs(dos - ref).max() < self.epsilon)
+          self.assertTrue(dos[-1] == 1.0)
+          r = RaggedEigenvalues.from_sets([[1.0, 2.0], [3.0, 4.0, 5.0, 6.0]])
+          stairs, dos = ergo.spectral_staircase(r, stairs=[2.0, 6.0],
+                                                periodic=4)
+          self.assertTrue(np.abs(dos - [0.5, 1.0]).max() < self.epsilon)
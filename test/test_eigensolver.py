@@ -0,0 +1,66 @@
+import unittest
+import os
+import sys
+import subprocess
+from bristol import eigensolver
+from bristol.ensembles import Circular
+from bristol import cPSE
+import numpy as np
+
+class test_eigensolver(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigensolver_01(self):
+          ce    = Circular()
+          mseed = 2963416
+          e0    = ce.eigen_circular(16, ensemble='COE', set_seed=True, seed=mseed)
+          with eigensolver.use_backend('scipy'):
+              self.assertTrue(eigensolver.get_backend()['backend'] == 'scipy')
+              e1 = ce.eigen_circular(16, ensemble='COE', set_seed=True,
+                                     seed=mseed)
+          self.assertTrue(eigensolver.get_backend()['backend'] == 'numpy')
+          self.assertTrue(np.abs(np.sort_complex(e0) -
+                                 np.sort_complex(e1)).max() < self.epsilon)
+
+      def test_eigensolver_02(self):
+          np.random.seed(42)
+          A  = np.random.normal(size=(12, 12))
+          G  = np.matmul(A, A.transpose())
+          e0 = np.sort(np.linalg.eigvals(G).real)
+          for backend in ['numpy', 'scipy']:
+              for driver in [None, 'evd', 'evr', 'evx']:
+                  if backend == 'numpy' and driver is not None:
+                      continue
+                  with eigensolver.use_backend(backend, driver=driver,
+                                               structured=True):
+                      e1 = eigensolver.eigvals(G.copy(), hermitian=True)
+                      w, v = eigensolver.eig(G.copy(), hermitian=True)
+                  self.assertTrue(np.abs(e0 - e1).max() < self.epsilon)
+                  self.assertTrue(np.abs(np.matmul(G, v) - v * w).max() < 1e-8)
+
+      def test_eigensolver_03(self):
+          np.random.seed(42)
+          matrices = [np.random.normal(size=(10, 10)) for _ in range(4)]
+          r0 = cPSE.cpse_measure_vanilla(matrices)
+          with eigensolver.use_backend('scipy'):
+              r1 = cPSE.cpse_measure_vanilla(matrices)
+          self.assertTrue(np.abs(np.array(r0[0]) - np.array(r1[0])).max() < self.epsilon)
+          with self.assertRaises(Exception):
+              eigensolver.set_backend('lapack')
+          with self.assertRaises(Exception):
+              eigensolver.set_backend('scipy', driver='gvx')
+
+      def test_eigensolver_04(self):
+          # environment variable is checked like set_backend
+          code = 'from bristol import eigensolver; ' + \
+                 'print(eigensolver.get_backend()["backend"])'
+          for value, ok in [('scipy', True), ('scpiy', False)]:
+              env = dict(os.environ, BRISTOL_EIGEN_BACKEND=value)
+              res = subprocess.run([sys.executable, '-c', code], env=env,
+                                   capture_output=True, text=True)
+              self.assertTrue((res.returncode == 0) == ok)
+              if ok:
+                  self.assertTrue(res.stdout.strip() == value)
+              else:
+                  self.assertTrue('Eigensolver backend must be' in res.stderr)
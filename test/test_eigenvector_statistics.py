@@ -0,0 +1,37 @@
+import unittest
+from bristol.ensembles import Circular, AMPLITUDE_EDGES
+import numpy as np
+
+class test_eigenvector_statistics(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_eigenvector_statistics_01(self):
+          ce = Circular()
+          np.random.seed(42)
+          H  = np.random.normal(size=(8, 8)) + 1j*np.random.normal(size=(8, 8))
+          e, u = np.linalg.eig(H)
+          res  = ce.eigenvector_statistics(u)
+          a    = np.abs(u)**2
+          ipr  = (a**2).sum(axis=0)
+          self.assertTrue(np.abs(res['ipr'] - ipr).max() < self.epsilon)
+          self.assertTrue(res['amplitude_counts'].sum() == 64)
+          # fully localised and fully extended states
+          res = ce.eigenvector_statistics(np.eye(4))
+          self.assertTrue(np.abs(res['ipr'] - 1.0).max() < self.epsilon)
+          res = ce.eigenvector_statistics(np.ones((4, 4)) / 2.0)
+          self.assertTrue(np.abs(res['ipr'] - 0.25).max() < self.epsilon)
+
+      def test_eigenvector_statistics_02(self):
+          ce    = Circular()
+          seeds = [2963416, 235124]
+          e0 = ce.eigen_circular_ensemble(6, cSize=2, nchunks=2, seeds=seeds,
+                                          parallel=False)
+          for parallel in [False, True]:
+              e1 = ce.eigen_circular_ensemble(6, cSize=2, nchunks=2,
+                                              seeds=seeds, parallel=parallel,
+                                              vector_stats=True)
+              self.assertTrue(np.abs(e0['c_eigen'] - e1['c_eigen']).max() < self.epsilon)
+              self.assertTrue(len(e1['ipr']) == 24)
+              self.assertTrue(e1['amplitude_counts'].sum() == 4*36)
+              self.assertTrue(len(e1['amplitude_counts']) == len(AMPLITUDE_EDGES) - 1)
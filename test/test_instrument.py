@@ -0,0 +1,63 @@
+import unittest
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+from bristol import instrument
+import numpy as np
+
+class test_instrument(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_instrument_01(self):
+          ce     = Circular()
+          mseeds = [2963416, 235124, 786134]
+          self.assertFalse(instrument.enabled())
+          with instrument.Recorder() as rec:
+               self.assertTrue(instrument.enabled())
+               e_cue = ce.eigen_circular_ensemble(seeds=mseeds, N=5, cSize=2,
+                                                  nchunks=3, parallel=True)
+               ergo  = Ergodicity()
+               ergo.thirumalai_mountain(e_cue['c_eigen'], 6, 5)
+          self.assertFalse(instrument.enabled())
+          summary = rec.summary()
+          # spans and counters from the worker processes are merged
+          self.assertTrue(summary['counters']['gen_cue.matrices'] == 6)
+          self.assertTrue(summary['spans']['gen_cue.eig']['count'] == 6)
+          self.assertTrue(summary['spans']['eigen_circular.eig']['count'] == 6)
+          self.assertTrue(summary['counters']['eigen_circular_ensemble.ipc_bytes']
+                          == e_cue['c_eigen'].nbytes)
+          self.assertTrue(summary['spans']['spectral_density.histogram']['count'] == 7)
+          self.assertTrue(len(rec.report()) > 0)
+          # results do not change
+          n_cue = np.imag(e_cue['c_eigen']).sum()
+          self.assertTrue(np.abs(n_cue+1.2456899223502202) < self.epsilon)
+
+      def test_instrument_02(self):
+          ce  = Circular()
+          with instrument.Recorder() as rec:
+               H = ce.gen_cue(8, seed=2963416, set_seed=True)
+          self.assertTrue(rec.counters['gen_cue.matrices'] == 1)
+          n0 = float(np.imag(H[0,:].sum()))+0.1445812268759293
+          self.assertTrue(np.abs(n0) < self.epsilon)
+          self.assertTrue(instrument.span('noop') is instrument.span('noop2'))
+
+      def test_instrument_03(self):
+          # recorders in different threads do not see each other
+          import threading
+          recs    = [instrument.Recorder() for _ in range(2)]
+          barrier = threading.Barrier(2)
+          def work(rec, n):
+              with rec:
+                   barrier.wait()
+                   for _ in range(n):
+                       instrument.count('calls')
+                   barrier.wait()
+          threads = [threading.Thread(target=work, args=(rec, n))
+                     for rec, n in zip(recs, [3, 5])]
+          for t in threads:
+              t.start()
+          for t in threads:
+              t.join()
+          self.assertTrue(recs[0].counters['calls'] == 3)
+          self.assertTrue(recs[1].counters['calls'] == 5)
+          self.assertFalse(instrument.enabled())
@@ -0,0 +1,26 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from bristol.spectral import Ergodicity
+import numpy as np
+
+class test_kl_distance_matrix(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_kl_distance_matrix_01(self):
+          ergo = Ergodicity()
+          np.random.seed(1235)
+          P    = np.random.random((7, 20))
+          P[2, 3] = 0.0
+          ref  = np.array([[ergo.kl_distance_symmetric(P[i], P[j])
+                            for j in range(7)] for i in range(7)])
+          for block_size, parallel in [(1024, False), (3, False), (2, True)]:
+              D = ergo.kl_distance_matrix(P, block_size=block_size,
+                                          parallel=parallel, processes=2)
+              self.assertTrue(D.shape == (7, 7))
+              self.assertTrue(np.abs(D - ref).max() < self.epsilon)
+              self.assertTrue(np.abs(D - D.T).max() < self.epsilon)
+          with ThreadPoolExecutor(2) as ex:
+               D = ergo.kl_distance_matrix(P, block_size=2, parallel=True,
+                                           executor=ex)
+          self.assertTrue(np.abs(D - ref).max() < self.epsilon)
@@ -0,0 +1,57 @@
+import unittest
+from bristol.stats import QuantileSketch, histogram
+from bristol.spectral import Ergodicity
+import numpy as np
+
+class test_quantile_sketch(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_quantile_sketch_01(self):
+          np.random.seed(1235)
+          x     = np.random.normal(size=200000)
+          sk1   = QuantileSketch(seed=42)
+          sk2   = QuantileSketch(seed=43)
+          for chunk in np.split(x[0:100000], 10):
+              sk1.update(chunk)
+          sk2.update(x[100000:])
+          sk1.merge(sk2)
+          self.assertTrue(sk1.n == 200000)
+          self.assertTrue(sum([len(b) for b in sk1.levels]) < 5000)
+          q     = sk1.quantile([0.1, 0.25, 0.5, 0.75, 0.9])
+          q_ref = np.percentile(x, [10, 25, 50, 75, 90])
+          self.assertTrue(np.abs(q - q_ref).max() < 0.05)
+          self.assertTrue(np.abs(sk1.std() - np.std(x)) < self.epsilon)
+          self.assertTrue(np.abs(sk1.min - x.min()) < self.epsilon)
+
+      def test_quantile_sketch_02(self):
+          np.random.seed(1235)
+          x     = np.random.normal(size=20000)
+          hist  = histogram()
+          h_fd  = hist.h_freedman_diaconis(x)
+          q75, q25 = np.percentile(x, [75, 25])
+          self.assertTrue(np.abs(h_fd - 2*(q75-q25)*np.power(20000, -1.0/3.0)) < self.epsilon)
+          sk    = QuantileSketch().update(x)
+          self.assertTrue(np.abs(hist.h_freedman_diaconis(sk) - h_fd) < 0.01)
+          self.assertTrue(np.abs(hist.h_scott(sk) - hist.h_scott(x)) < self.epsilon)
+          for rule in ['fd', 'scott', 'knuth']:
+              edges = hist.bin_edges(x, rule=rule)
+              self.assertTrue(np.abs(edges[0] - x.min()) < self.epsilon)
+              self.assertTrue(np.abs(edges[-1] - x.max()) < self.epsilon)
+              self.assertTrue(len(edges) > 10)
+          edges_chunks = hist.bin_edges(np.split(x, 4), rule='scott')
+          self.assertTrue(len(edges_chunks) == len(hist.bin_edges(x, rule='scott')))
+
+      def test_quantile_sketch_03(self):
+          np.random.seed(42)
+          N     = 50
+          M     = 8
+          e     = np.random.random(N*M)
+          ergo  = Ergodicity()
+          edges = ergo.real_bin_edges([e], bin_rule='fd')
+          tm    = ergo.thirumalai_mountain(e, M, N, bin_rule='fd')
+          tm_s  = ergo.thirumalai_mountain_shared(e, M, N, bin_edges=edges)
+          self.assertTrue(tm.shape == (len(edges)-1,))
+          self.assertTrue(np.abs(tm - tm_s).max() < self.epsilon)
+          den   = ergo.spectral_density(e, M, N, bin_rule='scott')
+          self.assertTrue(np.abs(den[:, 1].sum()*M - N*M) < self.epsilon)
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from bristol.ragged import RaggedEigenvalues, periodic_weights
+from bristol.spectral import Ergodicity
+from bristol import cPSE
+
+class test_ragged(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_ragged_01(self):
+          r = RaggedEigenvalues.from_sets([[1.0, 2.0], [3.0, 4.0, 5.0], [6.0]])
+          self.assertTrue(len(r) == 3)
+          self.assertTrue(list(r.sizes()) == [2, 3, 1])
+          self.assertTrue(r.max_size() == 3)
+          self.assertTrue(list(r[1]) == [3.0, 4.0, 5.0])
+          self.assertTrue(list(r[-1]) == [6.0])
+          self.assertTrue(list(r[1:3][0]) == [3.0, 4.0, 5.0])
+          self.assertTrue(list(r.periodic(0, 5)) == [1.0, 2.0, 1.0, 2.0, 1.0])
+          self.assertTrue(list(periodic_weights(3, 8)) == [3, 3, 2])
+
+      def test_ragged_02(self):
+          np.random.seed(42)
+          esets    = [np.random.random(8+3*i) for i in range(6)]
+          N        = 23
+          eset_per = cPSE.eigenvals_set_to_periodic(esets)
+          ragged   = cPSE.eigenvals_set_to_ragged(esets)
+          ergo     = Ergodicity()
+          omegas   = ergo.thirumalai_mountain_prefix(ragged, N)
+          for l in range(1, 7):
+              tm  = ergo.thirumalai_mountain(np.ravel(eset_per[0:l]), l, N)
+              tmr = ergo.thirumalai_mountain(ragged, l, N)
+              self.assertTrue(np.abs(omegas[l-1]-tm).max() < self.epsilon)
+              self.assertTrue(np.abs(tmr-tm).max() < self.epsilon)
+          d_per    = cPSE.d_layers_pse(eset_per)
+          d_ragged = cPSE.d_layers_pse(ragged)
+          self.assertTrue(np.abs(np.array(d_per)-d_ragged).max() < self.epsilon)
@@ -0,0 +1,61 @@
+import unittest
+from bristol import spectral
+from bristol.spectral import Ergodicity
+from bristol.ensembles import Circular
+import numpy as np
+
+class test_reference_density(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_reference_density_01(self):
+          ergo  = Ergodicity()
+          edges = np.linspace(-2.0, 2.0, 9)
+          m_inf = ergo.reference_density('semicircle', edges)
+          self.assertTrue(np.abs(m_inf.sum() - 1.0) < self.epsilon)
+          self.assertTrue(np.abs(m_inf - m_inf[::-1]).max() < self.epsilon)
+          # finite N approaches the semicircle
+          m_400 = ergo.reference_density('semicircle', edges, N=400)
+          self.assertTrue(np.abs(m_400 - m_inf).max() < 1e-3)
+          # N=1 is a symmetric gaussian
+          m_1 = ergo.reference_density('semicircle', [-10.0, 0.0, 10.0], N=1)
+          self.assertTrue(np.abs(m_1 - 0.5).max() < self.epsilon)
+
+      def test_reference_density_02(self):
+          ergo  = Ergodicity()
+          np.random.seed(42)
+          N, M  = 100, 400
+          e     = np.concatenate([np.linalg.eigvalsh(np.matmul(X, X.T) / M)
+                                  for X in [np.random.normal(size=(N, M))
+                                            for _ in range(10)]])
+          edges = np.linspace(0.0, 2.5, 11)
+          mass  = ergo.reference_density('marchenko_pastur', edges, ratio=0.25)
+          self.assertTrue(np.abs(mass.sum() - 1.0) < 1e-6)
+          self.assertTrue(np.abs(np.histogram(e, edges)[0] / len(e) - mass).max()
+                          < 0.01)
+          mass = ergo.reference_density('marchenko_pastur', [-1.0, 1e-9, 10.0],
+                                        ratio=2.0)
+          self.assertTrue(np.abs(mass[0] - 0.5) < self.epsilon)
+
+      def test_reference_density_03(self):
+          ce   = Circular()
+          ergo = Ergodicity()
+          ref  = ergo.reference_spectral_density('circular', 32)
+          e    = ce.eigen_circular_ensemble_indexed(32, M=200, parallel=False)
+          sden = ergo.spectral_density(e['c_eigen'], 200, 32)
+          self.assertTrue(np.abs(ref[:, 0] - sden[:, 0]).max() < self.epsilon)
+          self.assertTrue(np.abs(ref[:, 1] - sden[:, 1]).max() < 0.2)
+          m0 = ergo.sampled_reference_density('COE', 8, M=20)
+          m1 = ergo.sampled_reference_density('COE', 8, M=20)
+          self.assertTrue(m0 is not m1)
+          self.assertTrue(np.array_equal(m0, m1))
+          # changing a returned array leaves the cached reference intact
+          m0[:] = 0.0
+          m2 = ergo.sampled_reference_density('COE', 8, M=20)
+          self.assertTrue(np.array_equal(m1, m2))
+          # the cache is bounded
+          for seed in range(spectral._REFERENCE_CACHE_SIZE + 1):
+              ergo.sampled_reference_density('CUE', 4, M=2, root_seed=seed)
+          self.assertTrue(len(spectral._REFERENCE_CACHE) ==
+                          spectral._REFERENCE_CACHE_SIZE)
+          self.assertTrue(m0.sum() <= 1.0)
@@ -0,0 +1,44 @@
+import unittest
+from bristol.ensembles import Circular
+from bristol.data import Generate
+import numpy as np
+
+class test_spectra_ce(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_spectra_ce_01(self):
+          gen     = Generate()
+          seeds   = [997123, 1091645]
+          tasks   = gen.plan_spectra_ce(range_N=[4, 8], cSize=2, nchunks=2,
+                                        seeds=seeds)
+          self.assertTrue(len(tasks) == 12)
+          self.assertTrue(tasks[0]['ensemble'] == 'CSE' and tasks[0]['N'] == 8)
+          self.assertTrue(all(tasks[i]['cost'] >= tasks[i+1]['cost']
+                              for i in range(11)))
+
+      def test_spectra_ce_02(self):
+          ce      = Circular()
+          gen     = Generate()
+          seeds   = [997123, 1091645]
+          for parallel in [False, True]:
+              data_ce = gen.spectra_ce(range_N=[4, 8], cSize=2, nchunks=2,
+                                       seeds=seeds, parallel=parallel,
+                                       processes=2)
+              for e in ['CUE', 'COE', 'CSE']:
+                  for N in [4, 8]:
+                      ref = ce.eigen_circular_ensemble(N, cSize=2, nchunks=2,
+                                                       ensemble=e, seeds=seeds,
+                                                       parallel=False)
+                      res = data_ce[e]['N'+str(N)]
+                      self.assertTrue(res['number_of_matrices'] == 4)
+                      self.assertTrue(res['local_seeds'] == ref['local_seeds'])
+                      delta = np.abs(res['c_eigen'] - ref['c_eigen']).max()
+                      self.assertTrue(delta < self.epsilon)
+
+      def test_spectra_ce_03(self):
+          gen     = Generate()
+          data_ce = gen.spectra_ce(range_N=[4], cSize=1, nchunks=1,
+                                   seeds=[997123], ensemble='CSE')
+          self.assertTrue('N4' in data_ce['CSE'])
+          self.assertTrue(len(data_ce['COE']) == 0)
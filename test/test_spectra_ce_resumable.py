@@ -0,0 +1,38 @@
+import unittest
+import os
+import tempfile
+from bristol.data import Generate, read_manifest, task_file
+import numpy as np
+
+class test_spectra_ce_resumable(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_spectra_ce_resumable_01(self):
+          gen     = Generate()
+          seeds   = [997123, 1091645]
+          spec    = {'range_N':[4, 8], 'cSize':2, 'nchunks':2, 'seeds':seeds}
+          ref     = gen.spectra_ce(**spec)
+          with tempfile.TemporaryDirectory() as out_dir:
+               # an interrupted run, only part of the tasks finished
+               tasks = gen.plan_spectra_ce(**spec)
+               gen.run_plan(tasks[0:5], parallel=False, out_dir=out_dir)
+               manifest = read_manifest(out_dir)
+               self.assertTrue(len(manifest['completed']) == 5)
+               mtime = os.path.getmtime(os.path.join(out_dir,
+                                                     task_file(tasks[0])))
+               data_ce = gen.spectra_ce(parallel=True, processes=2,
+                                        out_dir=out_dir, **spec)
+               manifest = read_manifest(out_dir)
+               self.assertTrue(len(manifest['completed']) == 12)
+               self.assertTrue(mtime == os.path.getmtime(
+                               os.path.join(out_dir, task_file(tasks[0]))))
+               rec = manifest['completed'][task_file(tasks[0])]
+               self.assertTrue(rec['seed'] in seeds)
+          for e in ['CUE', 'COE', 'CSE']:
+              for N in [4, 8]:
+                  res = data_ce[e]['N'+str(N)]
+                  r0  = ref[e]['N'+str(N)]
+                  self.assertTrue(res['local_seeds'] == r0['local_seeds'])
+                  delta = np.abs(res['c_eigen'] - r0['c_eigen']).max()
+                  self.assertTrue(delta < self.epsilon)
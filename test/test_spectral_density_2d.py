@@ -0,0 +1,59 @@
+import unittest
+from bristol.spectral import Ergodicity
+from bristol import cPSE
+import numpy as np
+
+class test_spectral_density_2d(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def ginibre(self, N, M):
+          np.random.seed(42)
+          return np.concatenate([np.linalg.eigvals(
+                     (np.random.normal(size=(N, N)) +
+                      1j*np.random.normal(size=(N, N))) / np.sqrt(2*N))
+                     for _ in range(M)])
+
+      def test_spectral_density_2d_01(self):
+          ergo = Ergodicity()
+          N, M = 32, 20
+          e    = self.ginibre(N, M)
+          for coords, value_range in [('polar', 1.5),
+                                      ('cartesian', ((-1.5, 1.5), (-1.5, 1.5)))]:
+              edges = ergo.plane_bin_edges(bins=(5, 6), coords=coords,
+                                           value_range=value_range)
+              den, x_edges, y_edges = ergo.spectral_density_2d(
+                                          e, M, N, coords=coords, edges=edges,
+                                          block_size=3)
+              if coords == 'polar':
+                  x, y = np.abs(e), np.angle(e)
+              else:
+                  x, y = e.real, e.imag
+              H = np.array([np.histogram2d(x[i*N:(i+1)*N], y[i*N:(i+1)*N],
+                                           bins=[x_edges, y_edges])[0]
+                            for i in range(M)])
+              self.assertTrue(np.abs(den - H.mean(axis=0)).max() < self.epsilon)
+              omega = ergo.thirumalai_mountain_2d(e, M, N, coords=coords,
+                                                  edges=edges, block_size=7)[0]
+              rho   = H.mean(axis=0)
+              ref   = np.power(H - rho, 2).sum(axis=0) / M / N
+              self.assertTrue(np.abs(omega - ref).max() < self.epsilon)
+              # circular law
+              mass  = ergo.reference_density_2d(x_edges, y_edges, coords=coords,
+                                                N=N)
+              self.assertTrue(np.abs(mass.sum() - 1.0) < 1e-4)
+              self.assertTrue(np.abs(den / N - mass).max() < 0.02)
+
+      def test_spectral_density_2d_02(self):
+          ergo = Ergodicity()
+          mass = ergo.reference_density_2d([-1.0, 0.0], [0.0, 1.0],
+                                           coords='cartesian')
+          self.assertTrue(np.abs(mass[0, 0] - 0.25) < self.epsilon)
+          mass = ergo.reference_density_2d([0.0, 0.5, 2.0], [-np.pi, np.pi])
+          self.assertTrue(np.abs(mass[:, 0] - [0.25, 0.75]).max() < self.epsilon)
+          np.random.seed(42)
+          A = [np.random.normal(size=(6, 6))]
+          e = cPSE.get_eigenvals_layer_matrix_set(A, gram=False)[0]
+          self.assertTrue(np.abs(np.sort_complex(e) -
+                                 np.sort_complex(np.linalg.eigvals(A[0]))).max()
+                          < self.epsilon)
@@ -0,0 +1,65 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from bristol.cache import SpectrumCache
+from bristol import cPSE
+
+class test_spectrum_cache(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_spectrum_cache_01(self):
+          np.random.seed(42)
+          matrices = [np.random.normal(size=(64,64)) for _ in range(10)]
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               cache = SpectrumCache(tmp_dir)
+               d0, cpse0 = cPSE.cpse_measure_vanilla(matrices, cache=cache)
+               self.assertTrue(cache.misses == 10 and cache.hits == 0)
+               d1, cpse1 = cPSE.cpse_measure_vanilla(matrices, cache=cache)
+               self.assertTrue(cache.misses == 10 and cache.hits == 10)
+          self.assertTrue(np.abs(cpse0+1.4814662381222536) < self.epsilon)
+          self.assertTrue(np.abs(cpse1-cpse0) < self.epsilon)
+
+      def test_spectrum_cache_02(self):
+          np.random.seed(42)
+          A = np.random.normal(size=(16,16))
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               cache = SpectrumCache(tmp_dir, max_bytes=300)
+               self.assertTrue(cache.key(A) != cache.key(A.astype(np.float32)))
+               self.assertTrue(cache.key(A) != cache.key(A.reshape(8, 32)))
+               self.assertTrue(cache.key(A) != cache.key(A, tag='other'))
+               for i in range(4):
+                   cache.get_or_compute(A+i, np.linalg.eigvalsh)
+               # only the last 16 float64 eigenvalues (~256 bytes) are kept
+               files = [f for f in os.listdir(tmp_dir) if f.endswith('.npy')]
+               self.assertTrue(len(files) == 1)
+               self.assertTrue(cache.get(cache.key(A+3)) is not None)
+
+      def test_spectrum_cache_03(self):
+          np.random.seed(42)
+          A = np.random.normal(size=(16,16))
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               cache = SpectrumCache(tmp_dir, max_bytes=1000)
+               scans = []
+               evict = cache.evict
+               cache.evict = lambda keep=None: scans.append(keep) or evict(keep)
+               for i in range(8):
+                   cache.get_or_compute(A+i, np.linalg.eigvalsh)
+               # scanned on the first write and when over the limit only
+               self.assertTrue(len(scans) < 8)
+               files = [f for f in os.listdir(tmp_dir) if f.endswith('.npy')]
+               total = sum([os.path.getsize(os.path.join(tmp_dir, f))
+                            for f in files])
+               self.assertTrue(total <= 1000 and total == cache.size)
+
+      def test_spectrum_cache_04(self):
+          # complex results with zero imaginary part keep their dtype
+          A = np.diag(np.arange(1.0, 5.0))
+          with tempfile.TemporaryDirectory() as tmp_dir:
+               cache = SpectrumCache(tmp_dir)
+               f  = lambda a: np.linalg.eigvals(a).astype(complex)
+               e0 = cache.get_or_compute(A, f)
+               e1 = cache.get_or_compute(A, f)
+          self.assertTrue(cache.hits == 1 and cache.misses == 1)
+          self.assertTrue(e0.dtype == e1.dtype == f(A).dtype)
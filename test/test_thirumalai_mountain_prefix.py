@@ -0,0 +1,41 @@
+import unittest
+from bristol.ensembles import Circular
+from bristol.spectral import Ergodicity
+import numpy as np
+
+class test_thirumalai_mountain_prefix(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_thirumalai_mountain_prefix_01(self):
+          ce       = Circular()
+          N        = 10
+          cSize    = 2
+          nchunks  = 3
+          e_cue    = ce.eigen_circular_ensemble(
+                                                N=N,
+                                                ensemble='CUE',
+                                                seeds=[978712, 34687, 43124],
+                                                cSize=cSize,
+                                                nchunks=nchunks,
+                                                parallel=False
+                                               )
+          c_eigen  = e_cue['c_eigen']
+          esets    = [c_eigen[N*i:N*(i+1)] for i in range(cSize*nchunks)]
+          ergo     = Ergodicity()
+          omegas   = ergo.thirumalai_mountain_prefix(esets, N)
+          self.assertTrue(len(omegas) == cSize*nchunks)
+          for l in range(1, cSize*nchunks+1):
+              tm = ergo.thirumalai_mountain(np.ravel(esets[0:l]), l, N)
+              self.assertTrue(np.abs(omegas[l-1]-tm).max() < self.epsilon)
+
+      def test_thirumalai_mountain_prefix_02(self):
+          np.random.seed(1235)
+          N        = 32
+          # growing range, so that the prefix bin edges move
+          esets    = [np.random.random(N)*(i+1) for i in range(8)]
+          ergo     = Ergodicity()
+          omegas   = ergo.thirumalai_mountain_prefix(esets, N)
+          for l in range(1, 9):
+              tm = ergo.thirumalai_mountain(np.ravel(esets[0:l]), l, N)
+              self.assertTrue(np.abs(omegas[l-1]-tm).max() < self.epsilon)
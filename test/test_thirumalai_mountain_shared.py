@@ -0,0 +1,45 @@
+import unittest
+from bristol.spectral import Ergodicity
+from bristol import cPSE
+import numpy as np
+
+class test_thirumalai_mountain_shared(unittest.TestCase):
+
+      epsilon = 1e-9
+
+      def test_thirumalai_mountain_shared_01(self):
+          np.random.seed(1235)
+          N        = 20
+          M        = 6
+          e        = np.random.normal(size=N*M)
+          ergo     = Ergodicity()
+          edges    = ergo.real_bin_edges([e[0:50], e[50:]], bins=8)
+          self.assertTrue(len(edges) == 9)
+          self.assertTrue(np.abs(edges[0]-e.min()) < self.epsilon)
+          self.assertTrue(np.abs(edges[-1]-e.max()) < self.epsilon)
+          tm       = ergo.thirumalai_mountain_shared(e, M, N, bin_edges=edges)
+          rho      = np.histogram(e, bins=edges)[0] / float(M)
+          omega    = np.zeros(8)
+          for i in range(M):
+              h     = np.histogram(e[N*i:N*(i+1)], bins=edges)[0]
+              omega = omega + np.power(h - rho, 2)
+          self.assertTrue(np.abs(tm - omega/M/N).max() < self.epsilon)
+          den      = ergo.spectral_density_shared(e, M, edges)
+          self.assertTrue(np.abs(den[:, 1] - rho).max() < self.epsilon)
+          tm_auto  = ergo.thirumalai_mountain_shared(e, M, N, bins=8)
+          self.assertTrue(np.abs(tm_auto - tm).max() < self.epsilon)
+
+      def test_thirumalai_mountain_shared_02(self):
+          np.random.seed(42)
+          N        = 16
+          esets    = [np.random.random(N)*(i+1) for i in range(6)]
+          ergo     = Ergodicity()
+          edges    = ergo.real_bin_edges(esets, bins=12)
+          omegas   = ergo.thirumalai_mountain_prefix(esets, N, bin_edges=edges)
+          for l in range(1, 7):
+              tm = ergo.thirumalai_mountain_shared(np.ravel(esets[0:l]), l, N,
+                                                   bin_edges=edges)
+              self.assertTrue(np.abs(omegas[l-1]-tm).max() < self.epsilon)
+          d_layers = cPSE.d_layers_pse(cPSE.eigenvals_set_to_ragged(esets),
+                                       verbose=False, bins=12)
+          self.assertTrue(len(d_layers) == 4)